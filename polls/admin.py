@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Poll, Option, Vote
+from .models import Poll, Option, Vote, VoteRollup
 
 
 class OptionInline(admin.TabularInline):
@@ -26,3 +26,9 @@ class VoteAdmin(admin.ModelAdmin):
     list_display = ('voter_id', 'poll', 'option', 'created_at')
     search_fields = ('voter_id',)
     list_filter = ('poll',)
+
+
+@admin.register(VoteRollup)
+class VoteRollupAdmin(admin.ModelAdmin):
+    list_display = ('poll', 'option', 'granularity', 'bucket', 'count')
+    list_filter = ('granularity',)
@@ -11,3 +11,12 @@ class PollsConfig(AppConfig):
             from . import signals  # noqa: F401
         except Exception:
             pass
+        from polls_backend import db_router
+        from . import vote_queue
+        # settings that only work with a shared cache (REDIS_URL)
+        vote_queue.check_configuration()
+        db_router.check_configuration()
+        from django.db.backends.signals import connection_created
+        from .metrics import install_db_wrapper
+        # per-view query counts and time for /api/metrics
+        connection_created.connect(install_db_wrapper, dispatch_uid='polls_metrics_db_wrapper')
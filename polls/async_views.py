@@ -0,0 +1,162 @@
+"""Native async read views for the ASGI server (uvicorn).
+
+polls_backend/asgi_urls.py routes the poll list, detail and results here. They build
+the same JSON as the DRF views (and share their rendered-response cache entries) with
+the async ORM and async cache calls, so a worker keeps accepting requests while one
+waits on I/O instead of tying up a whole sync worker. Anything beyond a plain JSON GET
+(writes, the browsable API, `?page=N`, bad tokens or cursors) is handed to the DRF view,
+so errors and edge cases behave exactly as under WSGI.
+"""
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework.exceptions import APIException
+from polls_backend.db_router import avoter_pinned, use_primary
+from users.authentication import CachedJWTAuthentication
+from .etags import aget_poll_version, poll_etag
+from .fast_serializers import apoll_detail_data, list_rows, poll_list_data
+from .metrics import TimedJSONRenderer
+from .models import Poll, Vote
+from .pagination import PollCursorPagination
+from .response_cache import aget_cached_body, astore_body
+from .results_cache import aget_results, with_voter_flags
+from .view_counts import apending_views, apending_views_many, arecord_view
+from .views import PollDetailView, PollListCreateView, PollResultsView
+from .voter_filter import might_have_voted, record_false_positive
+
+_list_view = PollListCreateView.as_view()
+_detail_view = PollDetailView.as_view()
+_results_view = PollResultsView.as_view()
+_jwt = CachedJWTAuthentication()
+_renderer = TimedJSONRenderer()
+
+
+def _fast_path(request):
+    # plain GETs that negotiate to JSON; the browsable API goes through DRF
+    if request.method != 'GET':
+        return False
+    requested = request.GET.get('format')
+    if requested:
+        return requested == 'json'
+    return 'text/html' not in request.headers.get('Accept', '')
+
+
+async def _drf(view, request, **kwargs):
+    return await sync_to_async(view)(request, **kwargs)
+
+
+async def _authenticated_user(request):
+    """JWT first, then the session, as in DEFAULT_AUTHENTICATION_CLASSES.
+
+    Raises the same APIException DRF would for a bad token.
+    """
+    result = await _jwt.aauthenticate(request)
+    if result is not None:
+        return result[0]
+    if hasattr(request, 'auser'):
+        user = await request.auser()
+        if user.is_authenticated and user.is_active:
+            return user
+    return None
+
+
+async def _voter_id(request):
+    voter_id = request.GET.get('voter_id') or request.GET.get('userId')
+    user = await _authenticated_user(request)
+    if voter_id:
+        return voter_id
+    return str(user.pk) if user is not None else None
+
+
+async def _voted_option_id(poll_id, voter_id):
+    # voted_option_id from polls/serializers.py, with the lookup on the async ORM
+    if not voter_id or not await sync_to_async(might_have_voted)(poll_id, voter_id):
+        return None
+    votes = Vote.objects.filter(poll_id=poll_id, voter_id=voter_id).values_list('option_id', flat=True)
+    if await avoter_pinned(voter_id):
+        with use_primary():
+            choice = await votes.afirst()
+    else:
+        choice = await votes.afirst()
+    if choice is None:
+        await sync_to_async(record_false_positive)()
+    return choice
+
+
+async def _detail_payload(pk, chosen):
+    # as in PollDetailView.retrieve: counted in the payload, recorded once the poll exists
+    data = await apoll_detail_data(pk, chosen, extra_views=await apending_views(pk) + 1)
+    if data is not None:
+        await arecord_view(pk)
+    return data
+
+
+async def _results_payload(pk, chosen):
+    data = await aget_results(pk)
+    if data is None:
+        return None
+    data = with_voter_flags(data, chosen)
+    data['views'] += await apending_views(pk)
+    return data
+
+
+async def _poll_response(request, pk, name, view, build):
+    """ConditionalPollMixin + the rendered-response cache, for one poll's JSON."""
+    version = await aget_poll_version(pk)
+    # no version without a shared cache: no ETag, and the response cache is skipped
+    etag = poll_etag(pk, request, version) if version is not None else None
+    if etag is not None and etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        try:
+            voter_id = await _voter_id(request)
+        except APIException:
+            return await _drf(view, request, pk=pk)
+        chosen = await _voted_option_id(pk, voter_id)
+        entry = await aget_cached_body(name, pk, version, chosen)
+        if entry is not None:
+            body, content_type = entry
+            if name == 'detail':
+                await arecord_view(pk)
+        else:
+            data = await build(pk, chosen)
+            if data is None:
+                return JsonResponse({'detail': 'Not found.'}, status=404)
+            body, content_type = _renderer.render({'poll': data}), _renderer.media_type
+            await astore_body(name, pk, version, chosen, body, content_type)
+        response = HttpResponse(body, content_type=content_type)
+    if etag is not None:
+        response['ETag'] = etag
+    patch_vary_headers(response, ('Accept', 'Authorization', 'Cookie'))
+    return response
+
+
+async def poll_detail(request, pk):
+    if not _fast_path(request):
+        return await _drf(_detail_view, request, pk=pk)
+    return await _poll_response(request, pk, 'detail', _detail_view, _detail_payload)
+
+
+async def poll_results(request, pk):
+    if not _fast_path(request):
+        return await _drf(_results_view, request, pk=pk)
+    return await _poll_response(request, pk, 'results', _results_view, _results_payload)
+
+
+async def poll_list(request):
+    # POST (create) and page-number mode stay on the DRF view
+    if not _fast_path(request) or 'page' in request.GET:
+        return await _drf(_list_view, request)
+    paginator = PollCursorPagination()
+    try:
+        await _authenticated_user(request)
+        rows = await paginator.apaginate_queryset(list_rows(Poll.objects.all()), request)
+    except APIException:
+        return await _drf(_list_view, request)
+    pending = await apending_views_many([row['id'] for row in rows])
+    response = HttpResponse(
+        _renderer.render(paginator.get_paginated_data(poll_list_data(rows, pending))), content_type=_renderer.media_type
+    )
+    patch_vary_headers(response, ('Accept',))
+    return response
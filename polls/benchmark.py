@@ -0,0 +1,112 @@
+"""Dataset seeding and endpoint timing shared by `manage.py bench` and the budget tests."""
+import random
+import statistics
+import time
+import uuid
+from collections import Counter
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from .models import Poll, Option, Vote
+from .signals import votes_bulk_created
+from .voter_filter import reset_voters
+
+ENDPOINTS = ('list', 'detail', 'results', 'vote')
+
+
+def seed_dataset(polls=50, options=4, votes=5000, hot_polls=3, hot_share=0.8, seed=0):
+    """Create polls, options and votes with bulk_create; `hot_share` of the votes go to
+    the first `hot_polls` polls. Returns the created polls, hottest first."""
+    rng = random.Random(seed)
+    poll_rows = Poll.objects.bulk_create([Poll(title=f'Bench poll {i}') for i in range(polls)])
+    option_rows = Option.objects.bulk_create([
+        Option(poll=poll, text=f'Option {j}', order=j) for poll in poll_rows for j in range(options)
+    ])
+    by_poll = {}
+    for option in option_rows:
+        by_poll.setdefault(option.poll_id, []).append(option)
+    for poll in poll_rows:
+        reset_voters(poll.id)
+
+    hot, cold = poll_rows[:hot_polls], poll_rows[hot_polls:] or poll_rows
+    vote_rows = []
+    for i in range(votes):
+        poll = rng.choice(hot if hot and rng.random() < hot_share else cold)
+        vote_rows.append(Vote(poll=poll, option=rng.choice(by_poll[poll.id]), voter_id=f'bench-{i}'))
+    with transaction.atomic():
+        Vote.objects.bulk_create(vote_rows, batch_size=500)
+        # bulk_create skips post_save; keep counters, rollups and filters in step
+        counts = Counter((v.poll_id, v.option_id) for v in vote_rows)
+        if counts:
+            votes_bulk_created.send(
+                sender=Vote, counts=dict(counts), voters=[(v.poll_id, v.voter_id) for v in vote_rows]
+            )
+    return poll_rows
+
+
+def _percentile(samples, pct):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def _summarize(timings, queries):
+    return {
+        'requests': len(timings),
+        'p50_ms': round(_percentile(timings, 50), 3),
+        'p95_ms': round(_percentile(timings, 95), 3),
+        'p99_ms': round(_percentile(timings, 99), 3),
+        'queries_max': max(queries),
+        'queries_mean': round(statistics.fmean(queries), 2),
+    }
+
+
+def _timed(send):
+    with CaptureQueriesContext(connection) as ctx:
+        start = time.perf_counter()
+        response = send()
+        elapsed = (time.perf_counter() - start) * 1000
+    if response.status_code >= 400:
+        raise AssertionError(f'{response.status_code}: {response.content[:200]!r}')
+    return elapsed, len(ctx.captured_queries)
+
+
+def run_benchmark(client, polls, requests=100, hot_polls=3, seed=0):
+    """Drive each endpoint `requests` times and return latency/query stats per endpoint.
+
+    Requests are skewed toward the hot polls like the votes are; voter ids alternate
+    between seeded voters and unknown ones so both hasVoted paths are exercised.
+    """
+    rng = random.Random(seed)
+    hot = polls[:hot_polls] or polls
+    options = {}
+    for poll_id, option_id in Option.objects.filter(poll__in=polls).values_list('poll_id', 'id'):
+        options.setdefault(poll_id, []).append(option_id)
+
+    def pick():
+        return rng.choice(hot if rng.random() < 0.8 else polls)
+
+    def voter(i):
+        return f'bench-{rng.randrange(1000)}' if i % 2 else f'visitor-{i}'
+
+    def cast(i):
+        poll = pick()
+        body = {'pollId': str(poll.id), 'optionId': str(rng.choice(options[poll.id])), 'userId': f'new-{uuid.uuid4()}'}
+        return client.post(reverse('vote-create'), body, format='json')
+
+    plans = {
+        'list': lambda i: client.get(reverse('poll-list-create')),
+        'detail': lambda i: client.get(reverse('poll-detail', kwargs={'pk': pick().id}), {'voter_id': voter(i)}),
+        'results': lambda i: client.get(reverse('poll-results', kwargs={'pk': pick().id}), {'voter_id': voter(i)}),
+        'vote': cast,
+    }
+
+    report = {}
+    # the benchmark measures the synchronous vote path with anonymous voters, all from
+    # one client address, so rate limits are off
+    with override_settings(ALLOW_ANONYMOUS_VOTE=True, VOTE_WRITE_BEHIND=False, THROTTLE_RATES={}):
+        for name in ENDPOINTS:
+            send = plans[name]
+            samples = [_timed(lambda: send(i)) for i in range(requests)]
+            report[name] = _summarize([s[0] for s in samples], [s[1] for s in samples])
+    return report
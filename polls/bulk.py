@@ -0,0 +1,120 @@
+import uuid
+from collections import Counter
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import Poll, Option, Vote
+from .signals import votes_bulk_created
+
+MAX_BULK_VOTES = 5000
+BULK_BATCH_SIZE = 500
+
+
+def _parse_record(record):
+    if not isinstance(record, dict):
+        raise ValueError('Record must be an object')
+    try:
+        poll_id = uuid.UUID(str(record.get('pollId')))
+        option_id = uuid.UUID(str(record.get('optionId')))
+    except ValueError:
+        raise ValueError('pollId and optionId must be valid UUIDs')
+    voter = record.get('userId')
+    if voter in (None, ''):
+        raise ValueError('userId is required')
+    voter = str(voter)
+    if len(voter) > Vote._meta.get_field('voter_id').max_length:
+        raise ValueError('userId is too long')
+    # optional client-chosen vote id; makes retrying a batch idempotent
+    vote_id = record.get('id')
+    if vote_id is not None:
+        try:
+            vote_id = uuid.UUID(str(vote_id))
+        except ValueError:
+            raise ValueError('id must be a valid UUID')
+    return poll_id, option_id, voter, vote_id
+
+
+def _plan(records):
+    """Validate every record with a fixed number of set-based queries.
+
+    Returns (outcomes, pending) where `outcomes` holds one result per record (rows to
+    insert are left as None) and `pending` lists (index, Vote) to insert.
+    """
+    outcomes = [None] * len(records)
+    parsed = {}
+    for index, record in enumerate(records):
+        try:
+            parsed[index] = _parse_record(record)
+        except ValueError as exc:
+            outcomes[index] = {'index': index, 'status': 'invalid', 'error': str(exc)}
+
+    poll_ids = {p for p, _, _, _ in parsed.values()}
+    option_ids = {o for _, o, _, _ in parsed.values()}
+    voters = {v for _, _, v, _ in parsed.values()}
+    vote_ids = {i for _, _, _, i in parsed.values() if i is not None}
+    polls = dict(Poll.objects.filter(id__in=poll_ids).values_list('id', 'expires_at'))
+    option_polls = dict(Option.objects.filter(id__in=option_ids).values_list('id', 'poll_id'))
+    # superset of the pairs we care about; narrowed in Python below
+    existing = set(Vote.objects.filter(poll_id__in=polls.keys(), voter_id__in=voters).values_list('poll_id', 'voter_id'))
+    stored_ids = set(Vote.objects.filter(id__in=vote_ids).values_list('id', flat=True)) if vote_ids else set()
+
+    now = timezone.now()
+    pending = []
+    batch_ids = set()
+    for index, (poll_id, option_id, voter, vote_id) in parsed.items():
+        if vote_id in stored_ids:
+            # a retried record that already made it in
+            outcomes[index] = {'index': index, 'status': 'created', 'id': str(vote_id)}
+            continue
+        error = None
+        if poll_id not in polls:
+            error = 'Poll does not exist'
+        elif option_id not in option_polls:
+            error = 'Option does not exist'
+        elif polls[poll_id] is not None and now >= polls[poll_id]:
+            error = 'Poll has expired'
+        elif option_polls[option_id] != poll_id:
+            error = 'Option does not belong to the poll'
+        elif (poll_id, voter) in existing:
+            # also catches a second vote by the same voter within this batch
+            outcomes[index] = {'index': index, 'status': 'duplicate', 'error': 'Voter has already voted on this poll'}
+            continue
+        if error:
+            outcomes[index] = {'index': index, 'status': 'invalid', 'error': error}
+            continue
+        if vote_id is not None:
+            if vote_id in batch_ids:
+                outcomes[index] = {'index': index, 'status': 'invalid', 'error': 'id is repeated in this batch'}
+                continue
+            batch_ids.add(vote_id)
+        existing.add((poll_id, voter))
+        vote = Vote(poll_id=poll_id, option_id=option_id, voter_id=voter)
+        if vote_id is not None:
+            vote.id = vote_id
+        pending.append((index, vote))
+    return outcomes, pending
+
+
+def ingest_votes(records):
+    """Validate and insert a batch of {pollId, optionId, userId[, id]} records.
+
+    Returns one outcome per record, in input order: `created` (with the vote id),
+    `duplicate` or `invalid` (with an error message).
+    """
+    for attempt in range(2):
+        outcomes, pending = _plan(records)
+        try:
+            with transaction.atomic():
+                Vote.objects.bulk_create([vote for _, vote in pending], batch_size=BULK_BATCH_SIZE)
+                counts = Counter((vote.poll_id, vote.option_id) for _, vote in pending)
+                if counts:
+                    voters = [(vote.poll_id, vote.voter_id) for _, vote in pending]
+                    votes_bulk_created.send(sender=Vote, counts=dict(counts), voters=voters)
+            break
+        except IntegrityError:
+            # a concurrent request inserted one of our (poll, voter) pairs between the
+            # check and the insert; re-plan once so it is reported as a duplicate
+            if attempt:
+                raise
+    for index, vote in pending:
+        outcomes[index] = {'index': index, 'status': 'created', 'id': str(vote.id)}
+    return outcomes
@@ -0,0 +1,75 @@
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from .models import Poll, Option, Vote
+
+
+def apply_vote_delta(poll_id, option_id, delta):
+    """Shift the stored counters of an option and its poll by `delta`.
+
+    Uses F() expressions so concurrent voters never overwrite each other; callers
+    run this in the same transaction as the Vote insert/delete.
+    """
+    Option.objects.filter(pk=option_id).update(vote_count=F('vote_count') + delta)
+    Poll.objects.filter(pk=poll_id).update(total_votes=F('total_votes') + delta)
+
+
+def apply_vote_deltas(counts):
+    """Bulk form of `apply_vote_delta`; `counts` maps (poll_id, option_id) -> delta.
+
+    Issues one UPDATE per touched option and one per touched poll.
+    """
+    per_poll = defaultdict(int)
+    for (poll_id, option_id), delta in counts.items():
+        Option.objects.filter(pk=option_id).update(vote_count=F('vote_count') + delta)
+        per_poll[poll_id] += delta
+    for poll_id, delta in per_poll.items():
+        Poll.objects.filter(pk=poll_id).update(total_votes=F('total_votes') + delta)
+
+
+def _vote_count(field):
+    # correlated COUNT(*) of the votes pointing at the outer row
+    votes = Vote.objects.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(n=Count('id'))
+    return Coalesce(Subquery(votes.values('n')), 0)
+
+
+def reconcile_vote_counts(poll_ids=None, fix=True):
+    """Compare stored counters against the Vote table.
+
+    Returns a list of (kind, id, stored, actual) tuples for every drifted row. When
+    `fix` is true the drifted rows are recounted by the UPDATE itself, so a vote that
+    lands after the comparison isn't overwritten by a count taken before it.
+    """
+    options = Option.objects.all()
+    polls = Poll.objects.all()
+    votes = Vote.objects.all()
+    if poll_ids:
+        options = options.filter(poll_id__in=poll_ids)
+        polls = polls.filter(id__in=poll_ids)
+        votes = votes.filter(poll_id__in=poll_ids)
+
+    # one grouped query per level; only ids and integers are held in memory
+    option_actual = dict(votes.values_list('option_id').annotate(n=Count('id')).order_by())
+    poll_actual = dict(votes.values_list('poll_id').annotate(n=Count('id')).order_by())
+
+    drifted = []
+    for option_id, stored in options.values_list('id', 'vote_count').iterator():
+        actual = option_actual.get(option_id, 0)
+        if stored != actual:
+            drifted.append(('option', option_id, stored, actual))
+    for poll_id, stored in polls.values_list('id', 'total_votes').iterator():
+        actual = poll_actual.get(poll_id, 0)
+        if stored != actual:
+            drifted.append(('poll', poll_id, stored, actual))
+
+    if fix and drifted:
+        # one correlated UPDATE ... SET = (SELECT COUNT(*) ...) per level
+        with transaction.atomic():
+            Option.objects.filter(pk__in=[pk for kind, pk, _, _ in drifted if kind == 'option']).update(
+                vote_count=_vote_count('option_id')
+            )
+            Poll.objects.filter(pk__in=[pk for kind, pk, _, _ in drifted if kind == 'poll']).update(
+                total_votes=_vote_count('poll_id')
+            )
+    return drifted
@@ -0,0 +1,94 @@
+import hashlib
+import time
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+
+# versions are re-seeded from the clock when they expire or get evicted, which keeps
+# them monotonic without ever reading the database. They are bumped by whichever
+# process took the write, so they only exist with a shared cache (SHARED_CACHE): with
+# locmem another worker would keep answering 304 for a changed poll. Without one,
+# get_poll_version returns None and the views skip ETags and the response cache.
+VERSION_TIMEOUT = 24 * 60 * 60
+
+
+def _version_key(poll_id):
+    return f"poll_version:{poll_id}"
+
+
+def get_poll_version(poll_id):
+    if not settings.SHARED_CACHE:
+        return None
+    key = _version_key(poll_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=VERSION_TIMEOUT)
+        version = cache.get(key)
+    return version
+
+
+async def aget_poll_version(poll_id):
+    if not settings.SHARED_CACHE:
+        return None
+    key = _version_key(poll_id)
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), timeout=VERSION_TIMEOUT)
+        version = await cache.aget(key)
+    return version
+
+
+def bump_poll_version(poll_id):
+    """Called (after commit) whenever a vote, option or the poll itself changes."""
+    if not settings.SHARED_CACHE:
+        return
+    key = _version_key(poll_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=VERSION_TIMEOUT)
+
+
+def poll_etag(poll_id, request, version=None):
+    # responses carry per-voter flags, so the caller's identity is folded into the tag;
+    # it is read from the raw request so no authentication (and no query) is needed
+    identity = '|'.join((
+        request.GET.get('voter_id') or request.GET.get('userId') or '',
+        request.META.get('HTTP_AUTHORIZATION', ''),
+        request.COOKIES.get(settings.SESSION_COOKIE_NAME, ''),
+    ))
+    fingerprint = hashlib.sha1(identity.encode()).hexdigest()[:12]
+    if version is None:
+        version = get_poll_version(poll_id)
+    return f'W/"{version}-{fingerprint}"'
+
+
+class ConditionalPollMixin:
+    """ETag / If-None-Match support for single-poll GET views.
+
+    The 304 check runs before DRF's dispatch (authentication, serializers, queries),
+    so re-checking an unchanged poll costs one cache round trip. The version it read
+    is left on `self.poll_version` for the rendered-response cache.
+    """
+    poll_version = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        # taken before the body is built: a change racing with this request then
+        # yields a newer body under an older tag, never the reverse
+        self.poll_version = get_poll_version(kwargs['pk'])
+        if self.poll_version is None:
+            return super().dispatch(request, *args, **kwargs)
+        etag = poll_etag(kwargs['pk'], request, self.poll_version)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Authorization', 'Cookie'))
+        return response
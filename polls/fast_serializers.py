@@ -0,0 +1,128 @@
+"""Read-only fast path for the poll list, detail and results payloads.
+
+Builds the same camelCase dicts as PollListSerializer / PollDetailSerializer straight
+from `.values()` rows, with the column -> key mapping and the converters worked out
+once at import time instead of per field, per row. The DRF serializers stay the
+source of truth for the shape (and for the OpenAPI schema); tests/test_fast_serializers.py
+keeps the two in step.
+"""
+from django.utils import timezone
+from .models import Option, Poll
+from .serializers import PollDetailSerializer
+
+
+def _datetime(value):
+    # what DRF's DateTimeField emits with the default ISO 8601 format
+    if not value:
+        return None
+    value = value.astimezone(timezone.get_current_timezone()).isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _optional_str(value):
+    return str(value) if value is not None else None
+
+
+def _compile(spec):
+    """spec: (output key, column, converter or None) -> (columns, row -> dict)."""
+    columns = tuple(column for _, column, _ in spec)
+
+    def to_dict(row):
+        return {key: row[column] if convert is None else convert(row[column]) for key, column, convert in spec}
+
+    return columns, to_dict
+
+
+LIST_COLUMNS, _list_item = _compile((
+    ('id', 'id', str),
+    ('question', 'title', None),
+    ('createdAt', 'created_at', _datetime),
+    ('isActive', 'is_active', None),
+    ('totalVotes', 'total_votes', None),
+    ('views', 'views', None),
+    ('createdBy', 'created_by_id', _optional_str),
+))
+
+DETAIL_COLUMNS, _detail_item = _compile((
+    ('id', 'id', str),
+    ('question', 'title', None),
+    ('description', 'description', None),
+    ('createdAt', 'created_at', _datetime),
+    ('updatedAt', 'updated_at', _datetime),
+    ('expiresAt', 'expires_at', _datetime),
+    ('isActive', 'is_active', None),
+    ('totalVotes', 'total_votes', None),
+    ('views', 'views', None),
+    ('createdBy', 'created_by_id', _optional_str),
+))
+
+CREATOR_COLUMNS = (
+    'created_by__name', 'created_by__email', 'created_by__avatar', 'created_by__created_at', 'created_by__updated_at',
+)
+
+
+def list_rows(queryset):
+    """The list queryset as `.values()` rows, for the paginator and `poll_list_data`."""
+    return queryset.values(*LIST_COLUMNS)
+
+
+def poll_list_data(rows, pending_views=None):
+    """List items; `pending_views` ({id: n}) adds views not yet flushed to Poll.views."""
+    items = [_list_item(row) for row in rows]
+    if pending_views:
+        for item in items:
+            item['views'] += pending_views.get(item['id'], 0)
+    return items
+
+
+def _creator(row):
+    if row['created_by_id'] is None:
+        return None
+    # same keys and raw values as PollDetailSerializer.get_createdByUser; the renderer
+    # formats the timestamps
+    return {
+        'id': str(row['created_by_id']),
+        'name': row['created_by__name'],
+        'email': row['created_by__email'],
+        'avatar': row['created_by__avatar'],
+        'createdAt': row['created_by__created_at'],
+        'updatedAt': row['created_by__updated_at'],
+    }
+
+
+def _detail_payload(row, options, chosen_option_id, extra_views):
+    data = _detail_item(row)
+    data['views'] += extra_views
+    data['options'] = [
+        {'id': str(pk), 'text': text, 'votes': votes, 'voted': pk == chosen_option_id}
+        for pk, text, votes in options
+    ]
+    data['hasVoted'] = chosen_option_id is not None
+    data['createdByUser'] = _creator(row)
+    # same key order as the serializer
+    return {key: data[key] for key in PollDetailSerializer.Meta.fields}
+
+
+def _detail_queries(poll_id):
+    return (
+        Poll.objects.filter(pk=poll_id).values(*DETAIL_COLUMNS, *CREATOR_COLUMNS),
+        Option.objects.filter(poll_id=poll_id).values_list('id', 'text', 'vote_count'),
+    )
+
+
+def poll_detail_data(poll_id, chosen_option_id=None, extra_views=0):
+    """Detail payload for `poll_id` in two queries, or None if the poll doesn't exist."""
+    poll, options = _detail_queries(poll_id)
+    row = poll.first()
+    if row is None:
+        return None
+    return _detail_payload(row, list(options), chosen_option_id, extra_views)
+
+
+async def apoll_detail_data(poll_id, chosen_option_id=None, extra_views=0):
+    """`poll_detail_data` on the async ORM."""
+    poll, options = _detail_queries(poll_id)
+    row = await poll.afirst()
+    if row is None:
+        return None
+    return _detail_payload(row, [option async for option in options], chosen_option_id, extra_views)
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from polls.rollups import backfill_rollups
+
+
+class Command(BaseCommand):
+    help = 'Rebuild vote rollups from existing votes, streaming them in chunks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', action='append', dest='polls', help='Only this poll id (repeatable).')
+        parser.add_argument('--chunk-size', type=int, default=10000)
+
+    def handle(self, *args, **options):
+        read = backfill_rollups(poll_ids=options['polls'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled rollups from {read} vote(s).'))
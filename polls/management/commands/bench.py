@@ -0,0 +1,47 @@
+import json
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.test import APIClient
+from polls.benchmark import seed_dataset, run_benchmark
+
+
+class Command(BaseCommand):
+    help = 'Seed a throwaway test database and report per-endpoint latency percentiles and query counts as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--polls', type=int, default=50)
+        parser.add_argument('--options', type=int, default=4, help='Options per poll.')
+        parser.add_argument('--votes', type=int, default=5000)
+        parser.add_argument('--hot-polls', type=int, default=3, help='Polls that receive --hot-share of the votes.')
+        parser.add_argument('--hot-share', type=float, default=0.8)
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help='Also write the report to this file.')
+
+    def handle(self, *args, **options):
+        # never touch the configured database: seed a test database and drop it afterwards
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            polls = seed_dataset(
+                polls=options['polls'], options=options['options'], votes=options['votes'],
+                hot_polls=options['hot_polls'], hot_share=options['hot_share'], seed=options['seed'],
+            )
+            report = run_benchmark(
+                APIClient(), polls, requests=options['requests'], hot_polls=options['hot_polls'], seed=options['seed'],
+            )
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'dataset': {k: options[k] for k in ('polls', 'options', 'votes', 'hot_polls', 'hot_share', 'seed')},
+            'endpoints': report,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        self.stdout.write(output)
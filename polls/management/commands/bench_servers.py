@@ -0,0 +1,67 @@
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from django.core.management.base import BaseCommand
+from polls.benchmark import seed_dataset
+from polls.server_benchmark import free_port, run_load, server_env, start_server, stop_server
+
+
+class Command(BaseCommand):
+    help = (
+        'Start gunicorn (WSGI, sync workers) and uvicorn (ASGI, async read views) against a throwaway '
+        'SQLite database and compare read throughput under many concurrent clients. Prints JSON.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--servers', default='wsgi,asgi', help='Comma-separated: wsgi, asgi.')
+        parser.add_argument('--workers', type=int, default=3, help='Worker processes per server.')
+        parser.add_argument('--clients', type=int, default=500, help='Concurrent client connections.')
+        parser.add_argument('--duration', type=float, default=15, help='Seconds of load per server.')
+        parser.add_argument('--polls', type=int, default=50)
+        parser.add_argument('--votes', type=int, default=5000)
+        parser.add_argument('--hot-polls', type=int, default=3, help='Polls most requests go to.')
+        parser.add_argument('--output', help='Also write the report to this file.')
+        # internal: run in a child process against the throwaway database
+        parser.add_argument('--seed-only', action='store_true', help='Seed the configured database and exit.')
+
+    def handle(self, *args, **options):
+        if options['seed_only']:
+            polls = seed_dataset(polls=options['polls'], votes=options['votes'], hot_polls=options['hot_polls'])
+            self.stdout.write(json.dumps([str(poll.id) for poll in polls]))
+            return
+
+        with tempfile.TemporaryDirectory() as tmp:
+            env = server_env(f"sqlite:///{Path(tmp) / 'bench.sqlite3'}")
+            manage = [sys.executable, sys.argv[0]]
+            subprocess.run(manage + ['migrate', '--noinput', '-v', '0'], env=env, check=True)
+            seeded = subprocess.run(
+                manage + ['bench_servers', '--seed-only', '--polls', str(options['polls']),
+                          '--votes', str(options['votes']), '--hot-polls', str(options['hot_polls'])],
+                env=env, check=True, capture_output=True, text=True,
+            )
+            poll_ids = json.loads(seeded.stdout)
+            hot = poll_ids[:options['hot_polls']] or poll_ids
+            # mostly the hot polls' detail and results, plus the first list page
+            paths = ['/api/polls/'] + [f'/api/polls/{pk}/{suffix}' for pk in hot for suffix in ('', 'results/')]
+
+            report = {}
+            for mode in options['servers'].split(','):
+                port = free_port()
+                process = start_server(mode, port, options['workers'], env)
+                try:
+                    report[mode] = run_load(port, paths, clients=options['clients'], duration=options['duration'])
+                finally:
+                    stop_server(process)
+
+        report = {
+            'workers': options['workers'],
+            'dataset': {k: options[k] for k in ('polls', 'votes', 'hot_polls')},
+            'servers': report,
+        }
+        output = json.dumps(report, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(output + '\n')
+        self.stdout.write(output)
@@ -0,0 +1,22 @@
+import time
+from django.core.management.base import BaseCommand
+from polls.rollups import compact_rollups
+
+
+class Command(BaseCommand):
+    help = 'Sum closed minute rollups into hour rows and closed hours into day rows.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep compacting every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=60 * 5)
+
+    def handle(self, *args, **options):
+        while True:
+            written = compact_rollups()
+            self.stdout.write(f'Wrote {written} rollup row(s).')
+            if not options['loop']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
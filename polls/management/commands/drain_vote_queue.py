@@ -0,0 +1,28 @@
+import time
+from django.core.management.base import BaseCommand
+from polls.vote_queue import drain_batch, get_queue
+
+
+class Command(BaseCommand):
+    help = 'Commit votes queued in write-behind mode (VOTE_WRITE_BEHIND=1) in batches.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--interval', type=float, default=0.05, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--once', action='store_true', help='Drain what is queued now, then exit.')
+
+    def handle(self, *args, **options):
+        queue = get_queue()
+        total = 0
+        try:
+            while True:
+                processed = drain_batch(queue, batch_size=options['batch_size'])
+                total += processed
+                if processed:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['interval'])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f'Processed {total} queued vote(s).'))
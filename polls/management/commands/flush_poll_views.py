@@ -0,0 +1,27 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from polls.view_counts import flush_views, BUCKET_SECONDS
+
+
+class Command(BaseCommand):
+    help = 'Fold buffered poll view counts from the cache into Poll.views.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep flushing every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=BUCKET_SECONDS * 3)
+
+    def handle(self, *args, **options):
+        if not settings.SHARED_CACHE:
+            # the buckets are in each worker's own memory; the workers flush them
+            self.stdout.write(self.style.WARNING('No shared cache (REDIS_URL unset): the web workers flush their own views.'))
+            return
+        while True:
+            flushed = flush_views()
+            self.stdout.write(f'Flushed {flushed} view(s).')
+            if not options['loop']:
+                break
+            try:
+                time.sleep(options['interval'])
+            except KeyboardInterrupt:
+                break
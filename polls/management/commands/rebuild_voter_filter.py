@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from polls.voter_filter import rebuild_filters, stats
+
+
+class Command(BaseCommand):
+    help = 'Repopulate the per-poll "has voted" filters from the Vote table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', action='append', dest='polls', help='Only this poll id (repeatable).')
+        parser.add_argument('--chunk-size', type=int, default=10000)
+        parser.add_argument('--stats', action='store_true', help='Print lookup counters instead of rebuilding.')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            counts = stats.snapshot()
+            for kind, n in counts.items():
+                self.stdout.write(f'{kind}: {n}')
+            looked_up = sum(counts[k] for k in ('avoided', 'maybe', 'unknown'))
+            if looked_up:
+                self.stdout.write(f"avoided {counts['avoided'] / looked_up:.1%} of {looked_up} lookup(s)")
+            return
+        polls, voters = rebuild_filters(poll_ids=options['polls'], chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt voter filters for {polls} poll(s), {voters} voter(s).'))
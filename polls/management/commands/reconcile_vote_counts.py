@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from polls.counters import reconcile_vote_counts
+
+
+class Command(BaseCommand):
+    help = 'Check denormalized Option.vote_count / Poll.total_votes against the Vote table and fix drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll', action='append', dest='polls', help='Restrict to a poll id (repeatable).')
+        parser.add_argument('--dry-run', action='store_true', help='Report drift without fixing it.')
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        drifted = reconcile_vote_counts(poll_ids=options['polls'], fix=not dry_run)
+        for kind, pk, stored, actual in drifted:
+            self.stdout.write(f'{kind} {pk}: stored={stored} actual={actual}')
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('All vote counters are consistent.'))
+        elif dry_run:
+            self.stdout.write(self.style.WARNING(f'{len(drifted)} counter(s) drifted (dry run, nothing changed).'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Fixed {len(drifted)} drifted counter(s).'))
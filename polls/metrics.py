@@ -0,0 +1,399 @@
+"""Low-overhead request instrumentation, exported at /api/metrics in Prometheus format.
+
+`MetricsMiddleware` opens a per-request scope; while it is open, the DB execute wrapper
+(installed on every new connection), the instrumented cache backends and the timed
+JSON renderer add to it. At the end of the request the scope is folded into this
+worker's registry under one lock.
+
+With a shared cache (REDIS_URL) each worker publishes its registry from a timer thread,
+idle or not. /api/metrics sums every worker's snapshot plus the totals of workers that
+have exited, so a scrape of any gunicorn worker reports the whole server and counters
+never go down. On the locmem fallback a scrape only reports the worker that answered
+it; run a single worker there, or scrape each one.
+"""
+import atexit
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import defaultdict
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.cache import cache
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.locmem import LocMemCache
+from django.http import HttpResponse, HttpResponseForbidden
+from rest_framework.renderers import JSONRenderer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# how often (seconds) a worker pushes its registry to the shared cache
+PUBLISH_INTERVAL = 5
+# a worker that stops publishing (exited, killed) is retired after this long: its last
+# snapshot is folded into RETIRED_KEY, so counters keep its share instead of dropping
+WORKER_TIMEOUT = 10 * 60
+WORKERS_KEY = 'metrics_workers'
+RETIRED_KEY = 'metrics_retired'
+FOLD_LOCK_KEY = 'metrics_fold_lock'
+
+_scope = contextvars.ContextVar('polls_metrics_scope', default=None)
+
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.worker_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+        self.counters = defaultdict(float)
+        # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self.histograms = {}
+        self._published_at = 0.0
+        self._publisher_pid = None
+
+    def merge(self, counters, observations):
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] += value
+            for key, value in observations:
+                row = self.histograms.get(key)
+                if row is None:
+                    row = self.histograms[key] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0]
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if value <= bound:
+                        row[i] += 1
+                row[-2] += 1
+                row[-1] += value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'counters': list(self.counters.items()),
+                'histograms': [(key, list(row)) for key, row in self.histograms.items()],
+            }
+
+    def _start_publisher(self):
+        with self._lock:
+            if self._publisher_pid == os.getpid():
+                return
+            if self._publisher_pid is not None:
+                # a forked copy (gunicorn --preload): a worker of its own
+                self.worker_id = f'{os.getpid()}-{uuid.uuid4().hex[:8]}'
+            self._publisher_pid = os.getpid()
+        threading.Thread(target=self._publish_forever, name='metrics-publisher', daemon=True).start()
+        # the last few seconds of a worker that shuts down cleanly
+        atexit.register(self.maybe_publish, force=True)
+
+    def _publish_forever(self):
+        while True:
+            time.sleep(PUBLISH_INTERVAL)
+            self.maybe_publish(force=True)
+
+    def maybe_publish(self, force=False):
+        if not settings.SHARED_CACHE:
+            # nobody else could read it; /api/metrics reads this registry directly
+            return
+        if self._publisher_pid != os.getpid():
+            self._start_publisher()
+        now = time.monotonic()
+        if not force and now - self._published_at < PUBLISH_INTERVAL:
+            return
+        self._published_at = now
+        try:
+            # the snapshot outlives the worker until it is retired; the heartbeat doesn't
+            cache.set(_snapshot_key(self.worker_id), self.snapshot(), timeout=None)
+            cache.set(_alive_key(self.worker_id), 1, timeout=WORKER_TIMEOUT)
+            workers = cache.get(WORKERS_KEY) or []
+            if self.worker_id not in workers:
+                # read-modify-write may drop a concurrent registration; it is retried
+                # on that worker's next publish
+                cache.set(WORKERS_KEY, workers + [self.worker_id], timeout=None)
+        except Exception:
+            # metrics must never fail a request
+            pass
+
+
+def _snapshot_key(worker_id):
+    return f'metrics_worker:{worker_id}'
+
+
+def _alive_key(worker_id):
+    return f'metrics_alive:{worker_id}'
+
+
+registry = _Registry()
+
+
+class _Scope:
+    __slots__ = ('counters', 'observations')
+
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.observations = []
+
+
+def count(name, value=1, **labels):
+    scope = _scope.get()
+    key = (name, tuple(sorted(labels.items())))
+    if scope is None:
+        # outside a request (management commands, queue drainers): record straight away
+        registry.merge({key: value}, ())
+    else:
+        scope.counters[key] += value
+
+
+@contextmanager
+def timer(name, **labels):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        scope = _scope.get()
+        key = (name, tuple(sorted(labels.items())))
+        if scope is None:
+            registry.merge({}, [(key, elapsed)])
+        else:
+            scope.observations.append((key, elapsed))
+
+
+def db_execute_wrapper(execute, sql, params, many, context):
+    scope = _scope.get()
+    if scope is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        scope.counters[('db_queries', ())] += 1
+        scope.counters[('db_seconds', ())] += time.perf_counter() - start
+
+
+def install_db_wrapper(sender, connection, **kwargs):
+    """connection_created receiver: one wrapper per connection, installed once."""
+    if db_execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(db_execute_wrapper)
+
+
+def _family(key):
+    # poll_results:<id> -> poll_results; keys without a separator are their own family
+    return str(key).split(':', 1)[0]
+
+
+class InstrumentedCacheMixin:
+    """Counts hits and misses per key family on get/get_many."""
+
+    _missing = object()
+
+    def get(self, key, default=None, version=None, **kwargs):
+        value = super().get(key, self._missing, version=version, **kwargs)
+        hit = value is not self._missing
+        count('cache_requests', family=_family(key), result='hit' if hit else 'miss')
+        return value if hit else default
+
+    def get_many(self, keys, version=None, **kwargs):
+        keys = list(keys)
+        found = super().get_many(keys, version=version, **kwargs)
+        for key in keys:
+            count('cache_requests', family=_family(key), result='hit' if key in found else 'miss')
+        return found
+
+
+class InstrumentedLocMemCache(InstrumentedCacheMixin, LocMemCache):
+    # in-process memory behind a lock, never blocked on I/O: the async API (used by
+    # polls/async_views.py) runs inline instead of BaseCache's hop to the sync thread
+
+    async def aget(self, key, default=None, version=None):
+        return self.get(key, default, version=version)
+
+    async def aget_many(self, keys, version=None):
+        return self.get_many(keys, version=version)
+
+    async def aset(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.set(key, value, timeout=timeout, version=version)
+
+    async def aadd(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.add(key, value, timeout=timeout, version=version)
+
+    async def aincr(self, key, delta=1, version=None):
+        return self.incr(key, delta, version=version)
+
+    async def adelete(self, key, version=None):
+        return self.delete(key, version=version)
+
+
+try:
+    from django_redis.cache import RedisCache
+except ImportError:  # redis support is optional
+    pass
+else:
+    class InstrumentedRedisCache(InstrumentedCacheMixin, RedisCache):
+        pass
+
+
+class TimedJSONRenderer(JSONRenderer):
+    """JSONRenderer that records how long building and encoding the body took."""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        with timer('render_seconds'):
+            return super().render(data, accepted_media_type, renderer_context)
+
+
+class MetricsMiddleware:
+    # async-capable so the ASGI server's async views don't hop through a thread here
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        scope = _Scope()
+        token = _scope.set(scope)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _scope.reset(token)
+        self.record(request, response, scope, time.perf_counter() - start)
+        return response
+
+    async def __acall__(self, request):
+        scope = _Scope()
+        token = _scope.set(scope)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _scope.reset(token)
+        self.record(request, response, scope, time.perf_counter() - start)
+        return response
+
+    def record(self, request, response, scope, elapsed):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name if match else None) or 'unmatched'
+        status = getattr(response, 'status_code', 500)
+        counters = {
+            (name, labels + (('view', view),)): value for (name, labels), value in scope.counters.items()
+        }
+        counters[('http_requests', (('method', request.method), ('status', str(status)), ('view', view)))] = 1
+        observations = [((name, labels + (('view', view),)), value) for (name, labels), value in scope.observations]
+        observations.append((('http_request_seconds', (('view', view),)), elapsed))
+        registry.merge(counters, observations)
+        registry.maybe_publish()
+
+
+# name -> (prometheus name, type, help)
+METRICS = {
+    'http_requests': ('polls_http_requests_total', 'counter', 'Requests by view, method and status.'),
+    'http_request_seconds': ('polls_http_request_duration_seconds', 'histogram', 'Request latency by view.'),
+    'db_queries': ('polls_db_queries_total', 'counter', 'Database queries by view.'),
+    'db_seconds': ('polls_db_query_seconds_total', 'counter', 'Time spent in database queries by view.'),
+    'cache_requests': ('polls_cache_requests_total', 'counter', 'Cache reads by key family and hit/miss.'),
+    'render_seconds': ('polls_render_duration_seconds', 'histogram', 'Response body serialization time by view.'),
+}
+
+
+def _sum(snapshots):
+    counters = defaultdict(float)
+    histograms = {}
+    for snap in snapshots:
+        for key, value in snap['counters']:
+            counters[key] += value
+        for key, row in snap['histograms']:
+            total = histograms.setdefault(key, [0] * len(row))
+            for i, value in enumerate(row):
+                total[i] += value
+    return counters, histograms
+
+
+def _retire(dead):
+    """Fold the last snapshots of workers that stopped publishing into RETIRED_KEY.
+
+    The folded worker ids are stored with the totals, so a scrape that still reads one of
+    their snapshots skips it: one write moves the counts, and no scrape sees them twice
+    or not at all.
+    """
+    if not cache.add(FOLD_LOCK_KEY, 1, timeout=30):
+        # another scrape is folding
+        return
+    try:
+        snapshots = cache.get_many([_snapshot_key(w) for w in dead])
+        retired = cache.get(RETIRED_KEY)
+        counters, histograms = _sum(([retired] if retired else []) + list(snapshots.values()))
+        cache.set(RETIRED_KEY, {
+            'counters': list(counters.items()),
+            'histograms': list(histograms.items()),
+            'workers': dead,
+        }, timeout=None)
+        cache.delete_many(list(snapshots))
+        workers = cache.get(WORKERS_KEY) or []
+        cache.set(WORKERS_KEY, [w for w in workers if w not in dead], timeout=None)
+    finally:
+        cache.delete(FOLD_LOCK_KEY)
+
+
+def _aggregate():
+    """Sum every worker's published snapshot (this one included) and the retired totals."""
+    if not settings.SHARED_CACHE:
+        return _sum([registry.snapshot()])
+    registry.maybe_publish(force=True)
+    workers = cache.get(WORKERS_KEY) or []
+    alive = cache.get_many([_alive_key(w) for w in workers])
+    dead = [w for w in workers if _alive_key(w) not in alive]
+    if dead:
+        _retire(dead)
+    # RETIRED_KEY last: a snapshot deleted by a concurrent fold is already in it
+    found = cache.get_many([_snapshot_key(w) for w in workers] + [RETIRED_KEY])
+    retired = found.pop(RETIRED_KEY, None)
+    if retired is None:
+        return _sum(list(found.values()))
+    folded = {_snapshot_key(w) for w in retired['workers']}
+    return _sum([retired] + [snap for key, snap in found.items() if key not in folded])
+
+
+def _labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def render_prometheus():
+    counters, histograms = _aggregate()
+    lines = []
+    for name, (prom_name, kind, help_text) in METRICS.items():
+        lines.append(f'# HELP {prom_name} {help_text}')
+        lines.append(f'# TYPE {prom_name} {kind}')
+        if kind == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{prom_name}{_labels(labels)} {value:g}')
+            continue
+        for (metric, labels), row in sorted(histograms.items()):
+            if metric != name:
+                continue
+            for bound, n in zip(LATENCY_BUCKETS, row):
+                lines.append(f'{prom_name}_bucket{_labels(labels, [("le", f"{bound:g}")])} {n}')
+            lines.append(f'{prom_name}_bucket{_labels(labels, [("le", "+Inf")])} {row[-2]}')
+            lines.append(f'{prom_name}_count{_labels(labels)} {row[-2]}')
+            lines.append(f'{prom_name}_sum{_labels(labels)} {row[-1]:g}')
+
+    # the voter filter keeps its own counters, already shared between workers
+    from .voter_filter import stats as voter_filter_stats
+    lines.append('# HELP polls_voter_filter_lookups_total Has-voted lookups by filter answer.')
+    lines.append('# TYPE polls_voter_filter_lookups_total counter')
+    for result, n in voter_filter_stats.snapshot().items():
+        lines.append(f'polls_voter_filter_lookups_total{{result="{result}"}} {n}')
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view(request):
+    token = settings.METRICS_TOKEN
+    if token and request.headers.get('Authorization') != f'Bearer {token}':
+        return HttpResponseForbidden()
+    return HttpResponse(render_prometheus(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:28
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    Poll = apps.get_model('polls', 'Poll')
+    Option = apps.get_model('polls', 'Option')
+    for row in Option.objects.annotate(n=Count('votes')).filter(n__gt=0).values('id', 'n'):
+        Option.objects.filter(id=row['id']).update(vote_count=row['n'])
+    for row in Poll.objects.annotate(n=Count('votes')).filter(n__gt=0).values('id', 'n'):
+        Poll.objects.filter(id=row['id']).update(total_votes=row['n'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='option',
+            name='vote_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='poll',
+            name='total_votes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
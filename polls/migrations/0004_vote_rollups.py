@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-18 19:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('polls', '0003_vote_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VoteRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=6)),
+                ('bucket', models.DateTimeField()),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('option', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='polls.option')),
+                ('poll', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='polls.poll')),
+            ],
+            options={
+                'unique_together': {('poll', 'granularity', 'bucket', 'option')},
+            },
+        ),
+    ]
@@ -16,6 +16,8 @@ class Poll(models.Model):
         settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='polls'
     )
     views = models.PositiveIntegerField(default=0)
+    # denormalized counter maintained on the vote write path (see polls/counters.py)
+    total_votes = models.PositiveIntegerField(default=0)
 
     class Meta:
         ordering = ['-created_at']
@@ -33,6 +35,7 @@ class Option(models.Model):
     poll = models.ForeignKey(Poll, related_name='options', on_delete=models.CASCADE)
     text = models.CharField(max_length=255)
     order = models.PositiveIntegerField(default=0)
+    vote_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -57,3 +60,27 @@ class Vote(models.Model):
 
     def __str__(self):
         return f"Vote by {self.voter_id} on {self.poll.title} -> {self.option.text}"
+
+
+class VoteRollup(models.Model):
+    """Votes per option per time bucket, kept up to date on the vote write path.
+
+    Minute rows are written as votes land; hour and day rows are compacted from them
+    by `python manage.py compact_vote_rollups` once the period has closed.
+    """
+    MINUTE = 'minute'
+    HOUR = 'hour'
+    DAY = 'day'
+    GRANULARITY_CHOICES = ((MINUTE, 'Minute'), (HOUR, 'Hour'), (DAY, 'Day'))
+
+    poll = models.ForeignKey(Poll, related_name='rollups', on_delete=models.CASCADE)
+    option = models.ForeignKey(Option, related_name='rollups', on_delete=models.CASCADE)
+    granularity = models.CharField(max_length=6, choices=GRANULARITY_CHOICES)
+    bucket = models.DateTimeField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = (('poll', 'granularity', 'bucket', 'option'),)
+
+    def __str__(self):
+        return f"{self.poll_id} {self.granularity} {self.bucket:%Y-%m-%d %H:%M} -> {self.count}"
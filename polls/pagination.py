@@ -0,0 +1,134 @@
+import base64
+import json
+import uuid
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PollCursorPagination(BasePagination):
+    """Keyset pagination over (-created_at, id) for the poll list.
+
+    Each page is a single indexed range query: no COUNT(*) and no OFFSET, so page 500
+    costs the same as page one. Cursors are opaque and encode the boundary row plus the
+    direction of travel.
+    """
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        rows = self._page_rows(queryset, request)
+        return self._finish_page(list(rows))
+
+    async def apaginate_queryset(self, queryset, request):
+        """paginate_queryset on the async ORM; `request` may be a plain HttpRequest."""
+        rows = self._page_rows(queryset, request)
+        return self._finish_page([row async for row in rows])
+
+    def _page_rows(self, queryset, request):
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.reverse = False
+            rows = queryset.order_by('-created_at', 'id')
+        else:
+            created_at, pk, self.reverse = self.cursor
+            if self.reverse:
+                # walk backwards from the first row of the current page
+                rows = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, id__lt=pk))
+                rows = rows.order_by('created_at', '-id')
+            else:
+                rows = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__gt=pk))
+                rows = rows.order_by('-created_at', 'id')
+        # one extra row tells us whether there is another page in the travel direction
+        return rows[:self.page_size + 1]
+
+    def _finish_page(self, page):
+        has_more = len(page) > self.page_size
+        page = page[:self.page_size]
+        if self.reverse:
+            page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+        self.page = page
+        return page
+
+    def encode_cursor(self, row, reverse):
+        # rows are model instances or `.values()` dicts (the list's fast path)
+        created_at, pk = (row['created_at'], row['id']) if isinstance(row, dict) else (row.created_at, row.id)
+        raw = json.dumps([created_at.isoformat(), str(pk), reverse]).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip('=')
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.GET.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            created_at, pk, reverse = json.loads(raw)
+            created_at = parse_datetime(created_at)
+            if created_at is None:
+                raise ValueError
+            return created_at, uuid.UUID(pk), bool(reverse)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_data(self, data):
+        return {'polls': data, 'next': self.get_next_link(), 'previous': self.get_previous_link()}
+
+    def get_paginated_response(self, data):
+        return Response(self.get_paginated_data(data))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['polls'],
+            'properties': {
+                'polls': schema,
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'Opaque cursor from a previous response (`next`/`previous`).',
+            'schema': {'type': 'string'},
+        }]
+
+
+class PollPageNumberPagination(PageNumberPagination):
+    """Opt-in (`?page=N`) page-number mode; costs a COUNT(*) plus an OFFSET scan."""
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return super().paginate_queryset(queryset.order_by('-created_at', 'id'), request, view)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'polls': data,
+            'count': self.page.paginator.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+        })
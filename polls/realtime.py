@@ -0,0 +1,179 @@
+"""Real-time results fan-out for the SSE stream endpoint.
+
+Votes are published to a pub/sub backend after commit. Every worker process runs one
+`PollHub` that listens to that backend, coalesces the deltas per poll and pushes at
+most one event per poll every `POLLS_STREAM_COALESCE_SECONDS` to its local subscribers.
+"""
+import asyncio
+import json
+import logging
+import threading
+from collections import defaultdict
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CHANNEL = 'poll_votes'
+
+logger = logging.getLogger(__name__)
+
+
+class LocalPubSub:
+    """In-process backend: fine for a single worker and for tests."""
+
+    def __init__(self):
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def publish(self, message):
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            listener(message)
+
+    def subscribe(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+
+    def unsubscribe(self, listener):
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+
+
+class RedisPubSub:
+    """Redis PUBLISH/SUBSCRIBE backend that keeps every worker's hub in sync."""
+
+    def __init__(self, url=None):
+        self.url = url or settings.POLLS_PUBSUB_URL
+        self._client = None
+        self._tasks = {}
+
+    def publish(self, message):
+        import redis
+
+        if self._client is None:
+            self._client = redis.Redis.from_url(self.url)
+        self._client.publish(CHANNEL, json.dumps(message))
+
+    def subscribe(self, listener):
+        self._tasks[listener] = asyncio.get_running_loop().create_task(self._listen(listener))
+
+    def unsubscribe(self, listener):
+        task = self._tasks.pop(listener, None)
+        if task is not None:
+            task.cancel()
+
+    async def _listen(self, listener):
+        import redis.asyncio as aioredis
+
+        client = aioredis.Redis.from_url(self.url)
+        pubsub = client.pubsub()
+        await pubsub.subscribe(CHANNEL)
+        try:
+            async for raw in pubsub.listen():
+                if raw.get('type') == 'message':
+                    listener(json.loads(raw['data']))
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+class PollHub:
+    """Per-process fan-out of coalesced vote deltas to SSE subscribers."""
+
+    def __init__(self, backend, interval):
+        self.backend = backend
+        self.interval = interval
+        self._loop = None
+        self._subscribers = defaultdict(set)
+        self._pending = {}
+
+    def subscribe(self, poll_id, maxsize=100):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # first subscriber on this event loop starts listening to the backend
+            if self._loop is not None:
+                self.backend.unsubscribe(self.dispatch)
+            self._loop = loop
+            self.backend.subscribe(self.dispatch)
+        queue = asyncio.Queue(maxsize=maxsize)
+        self._subscribers[str(poll_id)].add(queue)
+        return queue
+
+    def unsubscribe(self, poll_id, queue):
+        queues = self._subscribers.get(str(poll_id))
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[str(poll_id)]
+
+    def dispatch(self, message):
+        # may be called from a request thread (local backend) or the loop (redis backend)
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._accumulate(message)
+        else:
+            loop.call_soon_threadsafe(self._accumulate, message)
+
+    def _accumulate(self, message):
+        poll_id = message['pollId']
+        if poll_id not in self._subscribers:
+            return
+        pending = self._pending.get(poll_id)
+        if pending is None:
+            pending = self._pending[poll_id] = {'pollId': poll_id, 'options': defaultdict(int), 'totalVotes': 0}
+            self._loop.call_later(self.interval, self._flush, poll_id)
+        pending['options'][message['optionId']] += message['delta']
+        pending['totalVotes'] += message['delta']
+
+    def _flush(self, poll_id):
+        pending = self._pending.pop(poll_id, None)
+        if pending is None:
+            return
+        event = dict(pending, options=dict(pending['options']))
+        for queue in list(self._subscribers.get(poll_id, ())):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # a client this far behind will resync from the next snapshot on reconnect
+                pass
+
+
+_backend = None
+_hub = None
+_init_lock = threading.Lock()
+
+
+def get_backend():
+    global _backend
+    with _init_lock:
+        if _backend is None:
+            _backend = import_string(settings.POLLS_PUBSUB_BACKEND)()
+        return _backend
+
+
+def get_hub():
+    global _hub
+    backend = get_backend()
+    with _init_lock:
+        if _hub is None:
+            _hub = PollHub(backend, settings.POLLS_STREAM_COALESCE_SECONDS)
+        return _hub
+
+
+def publish_vote_delta(poll_id, option_id, delta):
+    # runs after the vote committed; a pub/sub outage must not turn it into an error
+    try:
+        get_backend().publish({'pollId': str(poll_id), 'optionId': str(option_id), 'delta': delta})
+    except Exception:
+        logger.warning('could not publish vote delta for poll %s', poll_id, exc_info=True)
+
+
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,54 @@
+"""Rendered-response cache for the poll detail and results endpoints.
+
+Entries hold the final JSON body and content type, keyed by the poll version (bumped
+after commit by every event in polls/signals.py) and the caller's voted option, so a
+hit is one cache read returned as a plain HttpResponse: no serializer, no renderer.
+The short timeout bounds how stale the fields no version covers (pending view counts,
+the creator's profile) can get.
+"""
+from django.core.cache import cache
+from django.http import HttpResponse
+
+RESPONSE_TIMEOUT = 5
+
+
+def _response_key(name, poll_id, version, chosen_option_id):
+    return f"poll_response:{name}:{poll_id}:{version}:{chosen_option_id or '-'}"
+
+
+def cached_response(request, name, poll_id, version, chosen_option_id):
+    # only JSON is cached; the browsable API still goes through its renderer
+    if version is None or request.accepted_renderer.format != 'json':
+        return None
+    entry = cache.get(_response_key(name, poll_id, version, chosen_option_id))
+    if entry is None:
+        return None
+    body, content_type = entry
+    return HttpResponse(body, content_type=content_type)
+
+
+async def aget_cached_body(name, poll_id, version, chosen_option_id):
+    """Async read for the ASGI views, which serve JSON only: (body, content type) or None."""
+    if version is None:
+        return None
+    return await cache.aget(_response_key(name, poll_id, version, chosen_option_id))
+
+
+async def astore_body(name, poll_id, version, chosen_option_id, body, content_type):
+    if version is not None:
+        key = _response_key(name, poll_id, version, chosen_option_id)
+        await cache.aset(key, (body, content_type), timeout=RESPONSE_TIMEOUT)
+
+
+def cache_on_render(response, name, poll_id, version, chosen_option_id):
+    """Store `response`'s bytes once DRF has rendered them."""
+    if version is None:
+        return response
+    key = _response_key(name, poll_id, version, chosen_option_id)
+
+    def store(rendered):
+        if rendered.status_code == 200 and rendered.accepted_renderer.format == 'json':
+            cache.set(key, (rendered.content, rendered['Content-Type']), timeout=RESPONSE_TIMEOUT)
+
+    response.add_post_render_callback(store)
+    return response
@@ -0,0 +1,275 @@
+import asyncio
+import time
+from django.core.cache import cache
+from polls_backend.db_router import use_primary
+from .models import Poll, Option
+
+# an entry is fresh for RESULTS_TIMEOUT seconds or until the next structural
+# invalidation; after that it is kept around as a stale fallback while a single worker
+# rebuilds it. Vote counts live in separate counters that are updated in place.
+RESULTS_TIMEOUT = 30
+STALE_TIMEOUT = 300
+# single-flight rebuild lock; cache.add is atomic on both locmem and django-redis
+LOCK_TIMEOUT = 5
+# how long a reader with nothing (not even stale data) to serve waits for the rebuild
+LOCK_WAIT = 1.0
+LOCK_POLL_INTERVAL = 0.02
+
+
+def results_cache_key(poll_id):
+    return f"poll_results:{poll_id}"
+
+
+def _generation_key(poll_id):
+    return f"poll_results_gen:{poll_id}"
+
+
+def _lock_key(poll_id):
+    return f"poll_results_lock:{poll_id}"
+
+
+def _delta_seq_key(poll_id):
+    # bumped around every vote delta, so a rebuild can tell whether one raced its read
+    return f"poll_results_seq:{poll_id}"
+
+
+def _count_key(poll_id, option_id):
+    # one integer counter per option plus one for the poll total ('total'); kept out of
+    # the pickled payload so votes can be applied with an atomic cache.incr
+    return f"poll_results_votes:{poll_id}:{option_id}"
+
+
+def _results_queries(poll_id):
+    poll = Poll.objects.filter(pk=poll_id).values(
+        'id', 'title', 'description', 'total_votes', 'created_at', 'updated_at', 'is_active', 'views', 'created_by_id',
+    )
+    options = Option.objects.filter(poll_id=poll_id).order_by('order', 'created_at').values_list('id', 'text', 'vote_count')
+    return poll, options
+
+
+def _results_data(poll, options):
+    return {
+        'id': str(poll['id']),
+        'question': poll['title'],
+        'description': poll['description'],
+        'options': [{'id': str(pk), 'text': text, 'votes': votes} for pk, text, votes in options],
+        'totalVotes': poll['total_votes'],
+        'createdAt': poll['created_at'].isoformat() if poll['created_at'] else None,
+        'updatedAt': poll['updated_at'].isoformat() if poll['updated_at'] else None,
+        'isActive': poll['is_active'],
+        'views': poll['views'],
+        'createdBy': str(poll['created_by_id']) if poll['created_by_id'] else None,
+    }
+
+
+def build_results(poll_id):
+    """Compute the voter-agnostic results payload for a poll, or None if it doesn't exist.
+
+    Only data every caller shares goes in here; per-voter flags are overlaid at
+    response time by `with_voter_flags`.
+    """
+    poll, options = _results_queries(poll_id)
+    row = poll.first()
+    if row is None:
+        return None
+    return _results_data(row, options)
+
+
+async def abuild_results(poll_id):
+    """`build_results` on the async ORM."""
+    poll, options = _results_queries(poll_id)
+    row = await poll.afirst()
+    if row is None:
+        return None
+    return _results_data(row, [option async for option in options])
+
+
+def _is_fresh(entry, generation):
+    return entry['generation'] == generation and entry['built_at'] + RESULTS_TIMEOUT > time.time()
+
+
+def _cached_counts(poll_id, data):
+    counts = {_count_key(poll_id, option['id']): option['votes'] for option in data['options']}
+    counts[_count_key(poll_id, 'total')] = data['totalVotes']
+    return counts
+
+
+def _rebuild(poll_id, generation):
+    seq_key = _delta_seq_key(poll_id)
+    seq = cache.get(seq_key)
+    # the counters seeded below outlive the request, so never seed them from a lagging replica
+    with use_primary():
+        data = build_results(poll_id)
+    if data is not None:
+        entry = {'data': data, 'generation': generation, 'built_at': time.time()}
+        counts = _cached_counts(poll_id, data)
+        cache.set(results_cache_key(poll_id), entry, timeout=STALE_TIMEOUT)
+        cache.set_many(counts, timeout=STALE_TIMEOUT)
+        if cache.get(seq_key) != seq:
+            # a vote delta landed between the read and the seeding: its incr either hit a
+            # missing counter or was overwritten (or counted twice). Drop the counters so
+            # the next reader rebuilds them.
+            cache.delete_many(list(counts))
+    return data
+
+
+async def _arebuild(poll_id, generation):
+    seq_key = _delta_seq_key(poll_id)
+    seq = await cache.aget(seq_key)
+    with use_primary():
+        data = await abuild_results(poll_id)
+    if data is not None:
+        entry = {'data': data, 'generation': generation, 'built_at': time.time()}
+        counts = _cached_counts(poll_id, data)
+        await cache.aset(results_cache_key(poll_id), entry, timeout=STALE_TIMEOUT)
+        await cache.aset_many(counts, timeout=STALE_TIMEOUT)
+        if await cache.aget(seq_key) != seq:
+            await cache.adelete_many(list(counts))
+    return data
+
+
+def _count_keys(poll_id, data):
+    return [_count_key(poll_id, option['id']) for option in data['options']], _count_key(poll_id, 'total')
+
+
+def _merge_counts(data, option_keys, total_key, counts):
+    if len(counts) != len(option_keys) + 1:
+        return None
+    merged = dict(data)
+    merged['options'] = [dict(option, votes=counts[key]) for option, key in zip(data['options'], option_keys)]
+    merged['totalVotes'] = counts[total_key]
+    return merged
+
+
+def _with_live_counts(poll_id, data):
+    """Overlay the incrementally maintained counters on a cached payload.
+
+    Returns None when any counter is missing (evicted, or never seeded), in which case
+    the payload has to be rebuilt from the database.
+    """
+    option_keys, total_key = _count_keys(poll_id, data)
+    return _merge_counts(data, option_keys, total_key, cache.get_many(option_keys + [total_key]))
+
+
+async def _awith_live_counts(poll_id, data):
+    option_keys, total_key = _count_keys(poll_id, data)
+    return _merge_counts(data, option_keys, total_key, await cache.aget_many(option_keys + [total_key]))
+
+
+def get_results(poll_id):
+    """Return the shared results payload, rebuilding it at most once per invalidation.
+
+    Votes are applied to the cached counters as they land (see `apply_cached_vote_delta`), so
+    a rebuild is only needed when the poll's structure changes, the safety-net TTL
+    expires or a counter goes missing. Only the caller that wins the per-poll lock
+    recomputes; concurrent callers get the previous (stale) payload, or wait briefly
+    for the winner when there is none yet.
+    """
+    key = results_cache_key(poll_id)
+    generation_key = _generation_key(poll_id)
+    found = cache.get_many([key, generation_key])
+    entry = found.get(key)
+    generation = found.get(generation_key)
+    if entry is not None and _is_fresh(entry, generation):
+        data = _with_live_counts(poll_id, entry['data'])
+        if data is not None:
+            return data
+
+    lock_key = _lock_key(poll_id)
+    if cache.add(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            return _rebuild(poll_id, generation)
+        finally:
+            cache.delete(lock_key)
+
+    if entry is not None:
+        # someone else is rebuilding; serve what we have
+        return _with_live_counts(poll_id, entry['data']) or entry['data']
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(LOCK_POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return _with_live_counts(poll_id, entry['data']) or entry['data']
+    # the rebuilding worker is slow or died; don't leave the caller without a response
+    return build_results(poll_id)
+
+
+async def aget_results(poll_id):
+    """`get_results` on the async cache API and ORM, for the ASGI views."""
+    key = results_cache_key(poll_id)
+    generation_key = _generation_key(poll_id)
+    found = await cache.aget_many([key, generation_key])
+    entry = found.get(key)
+    generation = found.get(generation_key)
+    if entry is not None and _is_fresh(entry, generation):
+        data = await _awith_live_counts(poll_id, entry['data'])
+        if data is not None:
+            return data
+
+    lock_key = _lock_key(poll_id)
+    if await cache.aadd(lock_key, 1, timeout=LOCK_TIMEOUT):
+        try:
+            return await _arebuild(poll_id, generation)
+        finally:
+            await cache.adelete(lock_key)
+
+    if entry is not None:
+        return await _awith_live_counts(poll_id, entry['data']) or entry['data']
+
+    deadline = time.monotonic() + LOCK_WAIT
+    while time.monotonic() < deadline:
+        await asyncio.sleep(LOCK_POLL_INTERVAL)
+        entry = await cache.aget(key)
+        if entry is not None:
+            return await _awith_live_counts(poll_id, entry['data']) or entry['data']
+    return await abuild_results(poll_id)
+
+
+def note_vote_delta(poll_id):
+    """Flag a vote on `poll_id` to any rebuild in progress (see `_rebuild`)."""
+    key = _delta_seq_key(poll_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=STALE_TIMEOUT)
+
+
+def apply_cached_vote_delta(poll_id, option_id, delta):
+    """Shift the cached option and total counters by `delta` without a rebuild.
+
+    cache.incr is atomic on both backends (INCRBY behind an existence check on
+    django-redis, a locked read-modify-write on locmem) and fails on a missing key,
+    so a counter that isn't cached stays missing and the next reader rebuilds it.
+    """
+    note_vote_delta(poll_id)
+    for key in (_count_key(poll_id, option_id), _count_key(poll_id, 'total')):
+        try:
+            cache.incr(key, delta)
+        except ValueError:
+            pass
+
+
+def invalidate_results(poll_id):
+    """Mark the cached results stale without dropping them.
+
+    Bumping the generation (rather than deleting the entry) lets readers keep serving
+    the previous payload while one of them rebuilds, and makes a rebuild that started
+    before this invalidation store an entry that is already stale.
+    """
+    generation_key = _generation_key(poll_id)
+    try:
+        cache.incr(generation_key)
+    except ValueError:
+        # missing or evicted; seed with the clock so it can't collide with an older value
+        cache.set(generation_key, time.time_ns(), timeout=STALE_TIMEOUT)
+
+
+def with_voter_flags(data, chosen_option_id):
+    """Copy the shared payload and merge in one voter's `hasVoted`/`voted` flags."""
+    chosen = str(chosen_option_id) if chosen_option_id else None
+    merged = dict(data)
+    merged['options'] = [dict(option, voted=option['id'] == chosen) for option in data['options']]
+    merged['hasVoted'] = chosen is not None
+    return merged
@@ -0,0 +1,170 @@
+"""Time-bucketed vote rollups behind the timeline endpoint.
+
+The vote write path adds to a (poll, option, minute) row in the same transaction as the
+vote; `compact_vote_rollups` later sums closed minutes into hour rows and closed hours
+into day rows, so a timeline never has to scan Vote.
+"""
+from collections import defaultdict
+from datetime import timedelta, timezone as dt_timezone
+from django.db import IntegrityError, transaction
+from django.db.models import F, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+from .models import Vote, VoteRollup
+
+MINUTE, HOUR, DAY = VoteRollup.MINUTE, VoteRollup.HOUR, VoteRollup.DAY
+# finest first; each coarser level is compacted from the one before it
+LEVELS = (MINUTE, HOUR, DAY)
+SPANS = {MINUTE: timedelta(minutes=1), HOUR: timedelta(hours=1), DAY: timedelta(days=1)}
+_TRUNC = {HOUR: TruncHour, DAY: TruncDay}
+# longest `from`..`to` range one timeline request may ask for: about a thousand buckets
+# per option at most, however long the poll has been running
+MAX_RANGES = {MINUTE: timedelta(days=1), HOUR: timedelta(days=31), DAY: timedelta(days=3 * 366)}
+
+
+def truncate(moment, granularity):
+    # buckets are UTC periods regardless of TIME_ZONE
+    moment = moment.astimezone(dt_timezone.utc)
+    moment = moment.replace(second=0, microsecond=0)
+    if granularity in (HOUR, DAY):
+        moment = moment.replace(minute=0)
+    if granularity == DAY:
+        moment = moment.replace(hour=0)
+    return moment
+
+
+def _add(poll_id, option_id, granularity, bucket, delta):
+    rows = VoteRollup.objects.filter(poll_id=poll_id, option_id=option_id, granularity=granularity, bucket=bucket)
+    if delta < 0:
+        # votes older than the rollups (not backfilled yet) have nothing to take back
+        rows = rows.filter(count__gte=-delta)
+    if rows.update(count=F('count') + delta) or delta < 0:
+        return
+    try:
+        with transaction.atomic():
+            VoteRollup.objects.create(poll_id=poll_id, option_id=option_id, granularity=granularity, bucket=bucket, count=delta)
+    except IntegrityError:
+        # a concurrent vote created the row first
+        rows.update(count=F('count') + delta)
+
+
+def record_votes(poll_id, option_id, created_at, delta):
+    """Apply a vote delta to the rollups; called on the write path, in its transaction."""
+    _add(poll_id, option_id, MINUTE, truncate(created_at, MINUTE), delta)
+    if delta < 0:
+        # a removed vote may sit in periods that were already compacted
+        for level in (HOUR, DAY):
+            _add(poll_id, option_id, level, truncate(created_at, level), delta)
+
+
+def compact_rollups(until=None, since=None):
+    """(Re)build hour rows from minute rows and day rows from hour rows.
+
+    Only closed periods before `until` (default: now) are compacted; they never change
+    afterwards because votes are always stamped with the current time. Without
+    `since`, each level resumes after its newest compacted bucket.
+    """
+    until = until or timezone.now()
+    written = 0
+    for finer, level in ((MINUTE, HOUR), (HOUR, DAY)):
+        end = truncate(until, level)
+        start = since
+        if start is None:
+            newest = VoteRollup.objects.filter(granularity=level).aggregate(b=Max('bucket'))['b']
+            if newest is not None:
+                start = newest + SPANS[level]
+            else:
+                start = VoteRollup.objects.filter(granularity=finer).aggregate(b=Min('bucket'))['b']
+        if start is None or start >= end:
+            continue
+        start = truncate(start, level)
+        sums = (
+            VoteRollup.objects.filter(granularity=finer, bucket__gte=start, bucket__lt=end)
+            .annotate(period=_TRUNC[level]('bucket', tzinfo=dt_timezone.utc))
+            .values('poll_id', 'option_id', 'period')
+            .annotate(n=Sum('count'))
+            .order_by()
+        )
+        rows = [
+            VoteRollup(poll_id=s['poll_id'], option_id=s['option_id'], granularity=level, bucket=s['period'], count=s['n'])
+            for s in sums
+        ]
+        with transaction.atomic():
+            VoteRollup.objects.filter(granularity=level, bucket__gte=start, bucket__lt=end).delete()
+            VoteRollup.objects.bulk_create(rows, batch_size=500)
+        written += len(rows)
+    return written
+
+
+def _merge_chunk(pending):
+    keys = list(pending)
+    existing = VoteRollup.objects.filter(
+        granularity=MINUTE,
+        poll_id__in={k[0] for k in keys},
+        bucket__gte=min(k[2] for k in keys),
+        bucket__lte=max(k[2] for k in keys),
+    )
+    by_key = {(r.poll_id, r.option_id, r.bucket): r for r in existing}
+    updates, creates = [], []
+    for key, n in pending.items():
+        row = by_key.get(key)
+        if row is None:
+            creates.append(VoteRollup(poll_id=key[0], option_id=key[1], granularity=MINUTE, bucket=key[2], count=n))
+        else:
+            row.count += n
+            updates.append(row)
+    VoteRollup.objects.bulk_create(creates, batch_size=500)
+    VoteRollup.objects.bulk_update(updates, ['count'], batch_size=500)
+
+
+def backfill_rollups(poll_ids=None, chunk_size=10000):
+    """Rebuild rollups for existing votes without loading them all into memory.
+
+    Everything before the current minute is rebuilt from Vote; the write path owns the
+    current minute onwards, so the two never count the same vote. Returns the number
+    of votes read.
+    """
+    cutoff = truncate(timezone.now(), MINUTE)
+    votes = Vote.objects.filter(created_at__lt=cutoff)
+    stale = VoteRollup.objects.filter(bucket__lt=cutoff)
+    if poll_ids:
+        votes = votes.filter(poll_id__in=poll_ids)
+        stale = stale.filter(poll_id__in=poll_ids)
+    stale.delete()
+
+    read = 0
+    pending = defaultdict(int)
+    for poll_id, option_id, created_at in votes.values_list('poll_id', 'option_id', 'created_at').iterator(chunk_size=chunk_size):
+        pending[(poll_id, option_id, truncate(created_at, MINUTE))] += 1
+        read += 1
+        if read % chunk_size == 0:
+            with transaction.atomic():
+                _merge_chunk(pending)
+            pending.clear()
+    if pending:
+        with transaction.atomic():
+            _merge_chunk(pending)
+    compact_rollups(until=cutoff, since=VoteRollup.objects.filter(granularity=MINUTE).aggregate(b=Min('bucket'))['b'])
+    return read
+
+
+def timeline(poll_id, granularity, start, end):
+    """Votes per option per `granularity` bucket in [start, end), read from the rollups only.
+
+    Coarse rows cover the compacted past; the not-yet-compacted tail is filled in from
+    the next finer level, so the series is always complete. At most three queries.
+    """
+    series = defaultdict(lambda: defaultdict(int))
+    covered = truncate(start, granularity)
+    for level in reversed(LEVELS[:LEVELS.index(granularity) + 1]):
+        rows = VoteRollup.objects.filter(poll_id=poll_id, granularity=level, bucket__gte=covered, bucket__lt=end)
+        newest = None
+        for option_id, bucket, count in rows.values_list('option_id', 'bucket', 'count'):
+            series[truncate(bucket, granularity)][str(option_id)] += count
+            newest = bucket if newest is None else max(newest, bucket)
+        if newest is not None:
+            covered = newest + SPANS[level]
+    return [
+        {'start': bucket.isoformat(), 'votes': dict(votes), 'total': sum(votes.values())}
+        for bucket, votes in sorted(series.items())
+    ]
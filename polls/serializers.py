@@ -1,13 +1,57 @@
+import uuid
+from functools import partial
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema_field
 from rest_framework import serializers
+from rest_framework.settings import api_settings
+from polls_backend.db_router import use_primary, voter_pinned
 from .models import Poll, Option, Vote
+from .voter_filter import might_have_voted, record_false_positive, reset_voters
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
 
+def _context_voter_id(context):
+    # context may contain request or explicit voter_id
+    voter_id = context.get('voter_id')
+    request = context.get('request')
+    if not voter_id and request and getattr(request, 'user', None) and request.user.is_authenticated:
+        voter_id = str(request.user.id)
+    return voter_id
+
+
+def voted_option_id(context, poll_id):
+    """Return the option the context's voter chose on `poll_id`, or None.
+
+    The lookup is memoized per poll in the serializer context, so `voted` on every
+    option and `hasVoted` on the poll share a single query, and skipped entirely when
+    the voter filter knows the voter has not voted.
+    """
+    voter_id = _context_voter_id(context)
+    if not voter_id:
+        return None
+    choices = context.setdefault('voted_options', {})
+    if poll_id not in choices:
+        choice = None
+        if might_have_voted(poll_id, voter_id):
+            votes = Vote.objects.filter(poll_id=poll_id, voter_id=voter_id).values_list('option_id', flat=True)
+            if voter_pinned(voter_id):
+                # voted moments ago, maybe with another token: the replica may not have it yet
+                with use_primary():
+                    choice = votes.first()
+            else:
+                choice = votes.first()
+            if choice is None:
+                record_false_positive()
+        choices[poll_id] = choice
+    return choices[poll_id]
+
+
 class OptionSerializer(serializers.ModelSerializer):
-    votes = serializers.IntegerField(read_only=True)
+    votes = serializers.IntegerField(source='vote_count', read_only=True)
     voted = serializers.SerializerMethodField()
 
     class Meta:
@@ -15,15 +59,44 @@ class OptionSerializer(serializers.ModelSerializer):
         # frontend expects id, text, votes, voted
         fields = ('id', 'text', 'votes', 'voted')
 
+    @extend_schema_field(OpenApiTypes.BOOL)
     def get_voted(self, obj):
-        # expects voter_id in serializer context to mark which option the voter chose
-        # context may contain request or explicit voter_id
-        voter_id = self.context.get('voter_id')
-        if not voter_id and self.context.get('request') and getattr(self.context['request'], 'user', None) and self.context['request'].user.is_authenticated:
-            voter_id = str(self.context['request'].user.id)
-        if not voter_id:
-            return False
-        return Vote.objects.filter(poll=obj.poll, voter_id=voter_id, option=obj).exists()
+        # marks the option the voter chose; poll_id avoids loading obj.poll
+        chosen = voted_option_id(self.context, obj.poll_id)
+        return chosen is not None and chosen == obj.id
+
+
+def _parse_user_id(value):
+    # createdBy is a user id; anything that isn't one is ignored, as before
+    try:
+        return uuid.UUID(str(value)) if value else None
+    except ValueError:
+        return None
+
+
+class PollBulkCreateSerializer(serializers.ListSerializer):
+    """`many=True` PollCreateSerializer: every poll and every option in one INSERT each."""
+
+    def create(self, validated_data):
+        request = self.context.get('request')
+        default_creator = request.user if request and request.user.is_authenticated else None
+        creator_ids = {_parse_user_id(item.get('createdBy')) for item in validated_data} - {None}
+        creators = User.objects.in_bulk(creator_ids) if creator_ids else {}
+
+        polls, options = [], []
+        for item in validated_data:
+            texts = item.pop('options', [])
+            item['created_by'] = creators.get(_parse_user_id(item.pop('createdBy', None))) or default_creator
+            poll = Poll(**item)
+            polls.append(poll)
+            options.extend(Option(poll=poll, text=text.strip(), order=idx) for idx, text in enumerate(texts))
+        with transaction.atomic():
+            Poll.objects.bulk_create(polls)
+            Option.objects.bulk_create(options)
+            # bulk_create skips post_save, which starts each new poll's voter filter
+            for poll in polls:
+                transaction.on_commit(partial(reset_voters, poll.id))
+        return polls
 
 
 class PollCreateSerializer(serializers.ModelSerializer):
@@ -35,6 +108,17 @@ class PollCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Poll
         fields = ('id', 'question', 'description', 'expires_at', 'options', 'createdBy')
+        list_serializer_class = PollBulkCreateSerializer
+
+    def validate_options(self, value):
+        # Option is unique per (poll, text); catch repeats here instead of as an IntegrityError
+        seen = set()
+        for text in value:
+            key = text.strip()
+            if key in seen:
+                raise serializers.ValidationError(f'Duplicate option: "{text.strip()}".')
+            seen.add(key)
+        return value
 
     def validate_expires_at(self, value):
         if value is not None and value <= timezone.now():
@@ -58,9 +142,9 @@ class PollCreateSerializer(serializers.ModelSerializer):
         if not validated_data.get('created_by') and request and getattr(request, 'user', None) and request.user.is_authenticated:
             validated_data['created_by'] = request.user
 
-        poll = Poll.objects.create(**validated_data)
-        for idx, text in enumerate(options):
-            Option.objects.create(poll=poll, text=text.strip(), order=idx)
+        with transaction.atomic():
+            poll = Poll.objects.create(**validated_data)
+            Option.objects.bulk_create([Option(poll=poll, text=text.strip(), order=idx) for idx, text in enumerate(options)])
         return poll
 
 
@@ -68,11 +152,11 @@ class PollDetailSerializer(serializers.ModelSerializer):
     # map `title` -> `question` for frontend compatibility
     question = serializers.CharField(source='title')
     options = OptionSerializer(many=True, read_only=True)
-    totalVotes = serializers.SerializerMethodField()
+    totalVotes = serializers.IntegerField(source='total_votes', read_only=True)
     hasVoted = serializers.SerializerMethodField()
     createdBy = serializers.SerializerMethodField()
     createdByUser = serializers.SerializerMethodField()
-    views = serializers.IntegerField(source='views')
+    views = serializers.IntegerField(read_only=True)
     createdAt = serializers.DateTimeField(source='created_at')
     updatedAt = serializers.DateTimeField(source='updated_at')
     expiresAt = serializers.DateTimeField(source='expires_at', allow_null=True)
@@ -85,39 +169,15 @@ class PollDetailSerializer(serializers.ModelSerializer):
             'options', 'totalVotes', 'hasVoted', 'views', 'createdBy', 'createdByUser'
         )
 
-
-class PollListSerializer(serializers.ModelSerializer):
-    question = serializers.CharField(source='title')
-    createdAt = serializers.DateTimeField(source='created_at')
-    totalVotes = serializers.SerializerMethodField()
-    createdBy = serializers.SerializerMethodField()
-    isActive = serializers.BooleanField(source='is_active')
-
-    class Meta:
-        model = Poll
-        fields = ('id', 'question', 'createdAt', 'isActive', 'totalVotes', 'views', 'createdBy')
-
-    def get_totalVotes(self, obj):
-        return Vote.objects.filter(poll=obj).count()
-
+    @extend_schema_field(OpenApiTypes.UUID)
     def get_createdBy(self, obj):
         return str(obj.created_by.id) if obj.created_by else None
 
-    def get_totalVotes(self, obj):
-        # efficient count across options
-        return Vote.objects.filter(poll=obj).count()
-
+    @extend_schema_field(OpenApiTypes.BOOL)
     def get_hasVoted(self, obj):
-        voter_id = self.context.get('voter_id')
-        if not voter_id and self.context.get('request') and getattr(self.context['request'], 'user', None) and self.context['request'].user.is_authenticated:
-            voter_id = str(self.context['request'].user.id)
-        if not voter_id:
-            return False
-        return Vote.objects.filter(poll=obj, voter_id=voter_id).exists()
-
-    def get_createdBy(self, obj):
-        return str(obj.created_by.id) if obj.created_by else None
+        return voted_option_id(self.context, obj.id) is not None
 
+    @extend_schema_field(OpenApiTypes.OBJECT)
     def get_createdByUser(self, obj):
         if not obj.created_by:
             return None
@@ -131,6 +191,23 @@ class PollListSerializer(serializers.ModelSerializer):
         }
 
 
+class PollListSerializer(serializers.ModelSerializer):
+    question = serializers.CharField(source='title')
+    createdAt = serializers.DateTimeField(source='created_at')
+    totalVotes = serializers.IntegerField(source='total_votes', read_only=True)
+    createdBy = serializers.SerializerMethodField()
+    isActive = serializers.BooleanField(source='is_active')
+
+    class Meta:
+        model = Poll
+        fields = ('id', 'question', 'createdAt', 'isActive', 'totalVotes', 'views', 'createdBy')
+
+    @extend_schema_field(OpenApiTypes.UUID)
+    def get_createdBy(self, obj):
+        # read the FK column directly; touching obj.created_by would fetch the user per row
+        return str(obj.created_by_id) if obj.created_by_id else None
+
+
 class VoteSerializer(serializers.ModelSerializer):
     # frontend names: pollId, optionId, userId
     pollId = serializers.UUIDField(write_only=True)
@@ -153,16 +230,21 @@ class VoteSerializer(serializers.ModelSerializer):
             request = self.context.get('request')
             if request and getattr(request, 'user', None) and request.user.is_authenticated:
                 voter = str(request.user.id)
-
-        try:
-            poll = Poll.objects.get(id=poll_id)
-        except Poll.DoesNotExist:
-            raise serializers.ValidationError('Poll does not exist')
-
-        try:
-            option = Option.objects.get(id=option_id)
-        except Option.DoesNotExist:
-            raise serializers.ValidationError('Option does not exist')
+        if not voter:
+            raise serializers.ValidationError('userId is required')
+
+        # one round trip for the happy path: the option joined with its poll
+        option = Option.objects.select_related('poll').filter(id=option_id).first()
+        if option is None or option.poll_id != poll_id:
+            # error path only: work out which message the caller gets, in the same
+            # order as the checks below
+            poll = Poll.objects.filter(id=poll_id).first()
+            if poll is None:
+                raise serializers.ValidationError('Poll does not exist')
+            if option is None:
+                raise serializers.ValidationError('Option does not exist')
+        else:
+            poll = option.poll
 
         if poll.has_expired():
             raise serializers.ValidationError('Poll has expired')
@@ -170,8 +252,7 @@ class VoteSerializer(serializers.ModelSerializer):
         if option.poll_id != poll.id:
             raise serializers.ValidationError('Option does not belong to the poll')
 
-        if Vote.objects.filter(poll=poll, voter_id=voter).exists():
-            raise serializers.ValidationError('Voter has already voted on this poll')
+        # duplicates are rejected by the (poll, voter_id) unique constraint in create()
 
         # attach resolved objects for create()
         attrs['poll'] = poll
@@ -183,5 +264,14 @@ class VoteSerializer(serializers.ModelSerializer):
         poll = validated_data['poll']
         option = validated_data['option']
         voter = validated_data['voter_id']
-        vote = Vote.objects.create(poll=poll, option=option, voter_id=voter)
+        # the post_save handler bumps Option.vote_count / Poll.total_votes; keep both
+        # in the same transaction as the insert so the counters never drift
+        try:
+            with transaction.atomic():
+                vote = Vote.objects.create(poll=poll, option=option, voter_id=voter)
+        except IntegrityError:
+            if not Vote.objects.filter(poll=poll, voter_id=voter).exists():
+                raise
+            # same 400 body the old check-then-insert validation produced
+            raise serializers.ValidationError({api_settings.NON_FIELD_ERRORS_KEY: ['Voter has already voted on this poll']})
         return vote
@@ -0,0 +1,152 @@
+"""Throughput of the real servers for `manage.py bench_servers`: gunicorn (sync workers,
+WSGI) against uvicorn (ASGI with the async read views), under many concurrent clients.
+
+The load generator is a plain asyncio HTTP/1.1 client, one coroutine per client, each
+reusing its connection while the server keeps it open (gunicorn's sync workers close
+it after every response, which is part of what is being measured).
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from .benchmark import _percentile
+
+SERVERS = {
+    'wsgi': lambda port, workers: [
+        sys.executable, '-m', 'gunicorn', 'polls_backend.wsgi:application',
+        '--bind', f'127.0.0.1:{port}', '--workers', str(workers), '--log-level', 'warning',
+    ],
+    'asgi': lambda port, workers: [
+        sys.executable, '-m', 'uvicorn', 'polls_backend.asgi:application',
+        '--host', '127.0.0.1', '--port', str(port), '--workers', str(workers),
+        '--no-access-log', '--log-level', 'warning',
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_server(mode, port, workers, env, ready_path='/api/polls/', timeout=30):
+    """Start a server process and wait until `ready_path` answers."""
+    process = subprocess.Popen(SERVERS[mode](port, workers), env=env)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'{mode} server exited with {process.returncode}')
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}{ready_path}', timeout=1):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f'{mode} server did not come up within {timeout}s')
+
+
+def stop_server(process):
+    process.terminate()
+    try:
+        process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+async def _read_body(reader, headers):
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+        return True
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                return True
+    await reader.read()
+    return False
+
+
+async def _request(reader, writer, path):
+    writer.write(f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: application/json\r\n\r\n'.encode())
+    await writer.drain()
+    head = (await reader.readuntil(b'\r\n\r\n')).decode('latin-1').split('\r\n')
+    status = int(head[0].split()[1])
+    headers = {}
+    for line in head[1:]:
+        name, _, value = line.partition(':')
+        if name:
+            headers[name.strip().lower()] = value.strip()
+    framed = await _read_body(reader, headers)
+    return status, framed and headers.get('connection', '').lower() != 'close'
+
+
+async def _client(offset, port, paths, deadline, timeout, latencies, failures):
+    connection = None
+    n = offset
+    while time.monotonic() < deadline:
+        path = paths[n % len(paths)]
+        n += 1
+        start = time.perf_counter()
+        try:
+            if connection is None:
+                connection = await asyncio.wait_for(asyncio.open_connection('127.0.0.1', port), timeout)
+            status, keep_alive = await asyncio.wait_for(_request(*connection, path), timeout)
+        except (OSError, ValueError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError):
+            failures['connection'] += 1
+            if connection is not None:
+                connection[1].close()
+                connection = None
+            # don't spin on a server that is refusing connections
+            await asyncio.sleep(0.05)
+            continue
+        if status == 200:
+            latencies.append((time.perf_counter() - start) * 1000)
+        else:
+            failures[str(status)] = failures.get(str(status), 0) + 1
+        if not keep_alive:
+            connection[1].close()
+            connection = None
+    if connection is not None:
+        connection[1].close()
+
+
+async def _load(port, paths, clients, duration, timeout):
+    latencies, failures = [], {'connection': 0}
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(i, port, paths, deadline, timeout, latencies, failures) for i in range(clients)
+    ))
+    return latencies, failures, time.perf_counter() - started
+
+
+def run_load(port, paths, clients=500, duration=10, timeout=30):
+    """Drive `clients` concurrent connections over `paths` for `duration` seconds."""
+    latencies, failures, elapsed = asyncio.run(_load(port, paths, clients, duration, timeout))
+    report = {
+        'clients': clients,
+        'duration_s': round(elapsed, 2),
+        'responses': len(latencies),
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'failures': {k: v for k, v in failures.items() if v},
+    }
+    if latencies:
+        report.update({
+            'p50_ms': round(_percentile(latencies, 50), 1),
+            'p95_ms': round(_percentile(latencies, 95), 1),
+            'p99_ms': round(_percentile(latencies, 99), 1),
+        })
+    return report
+
+
+def server_env(database_url, **extra):
+    env = dict(os.environ, DATABASE_URL=database_url, DEBUG='False', **extra)
+    # each entry point picks its own views (polls_backend/asgi.py)
+    env.pop('ASYNC_VIEWS', None)
+    return env
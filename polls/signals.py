@@ -1,28 +1,131 @@
-from django.db.models.signals import post_save, post_delete
-from django.dispatch import receiver
-from django.core.cache import cache
-from .models import Vote, Option
+from functools import partial
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+from polls_backend.db_router import pin_voters, use_primary
+from .models import Poll, Vote, Option
+from .counters import apply_vote_delta, apply_vote_deltas
+from .results_cache import invalidate_results, apply_cached_vote_delta, note_vote_delta
+from .realtime import publish_vote_delta
+from .etags import bump_poll_version
+from .rollups import record_votes
+from .voter_filter import add_voters, reset_voters, get_filter
+
+
+# bulk_create skips post_save, so bulk ingestion paths send this from inside their
+# transaction instead; `counts` maps (poll_id, option_id) -> number of votes inserted
+# and `voters` lists the inserted (poll_id, voter_id) pairs
+votes_bulk_created = Signal()
 
 
 def _invalidate_poll_cache(poll_id):
     if not poll_id:
         return
-    key = f"poll_results:{poll_id}"
-    cache.delete(key)
+    # only after commit, so a rebuild can't cache state that is about to roll back
+    transaction.on_commit(partial(invalidate_results, poll_id))
+    transaction.on_commit(partial(bump_poll_version, poll_id))
+
+
+def _shift_cached_counts(poll_id, option_id, delta):
+    # also before commit: a rebuild reading the database from here on may or may not
+    # see this vote, so it must not trust the counters it seeds
+    note_vote_delta(poll_id)
+    transaction.on_commit(partial(apply_cached_vote_delta, poll_id, option_id, delta))
+    # push the same delta to live result streams
+    transaction.on_commit(partial(publish_vote_delta, poll_id, option_id, delta))
+    transaction.on_commit(partial(bump_poll_version, poll_id))
+
+
+def _deleted_with_poll(origin):
+    # votes removed by a poll cascade don't need their counters maintained
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is Poll
+
+
+def _move_vote(poll_id, option_id, created_at, delta):
+    apply_vote_delta(poll_id, option_id, delta)
+    record_votes(poll_id, option_id, created_at, delta)
+    _shift_cached_counts(poll_id, option_id, delta)
+
+
+@receiver(pre_save, sender=Vote)
+def vote_saving(sender, instance, **kwargs):
+    # an edit (VoteAdmin) may move the vote to another option; remember where it was
+    if instance._state.adding:
+        return
+    with use_primary():
+        instance._previous_choice = Vote.objects.filter(pk=instance.pk).values_list('poll_id', 'option_id').first()
 
 
 @receiver(post_save, sender=Vote)
 def vote_saved(sender, instance, created, **kwargs):
-    # invalidate cache when a vote is created or updated
-    _invalidate_poll_cache(instance.poll_id)
+    # before commit: the filter may briefly claim a vote that rolls back, never miss one
+    add_voters(instance.poll_id, [instance.voter_id])
+    # the voter's next detail/results read goes to the primary, so hasVoted isn't stale
+    pin_voters([instance.voter_id])
+    if created:
+        # keep denormalized counters, rollups and cached counts in step with the insert
+        # (same transaction), instead of dropping the results
+        _move_vote(instance.poll_id, instance.option_id, instance.created_at, 1)
+        return
+    previous = getattr(instance, '_previous_choice', None)
+    if previous and previous != (instance.poll_id, instance.option_id):
+        # moved: take it off the old option and count it on the new one
+        _move_vote(*previous, instance.created_at, -1)
+        _move_vote(instance.poll_id, instance.option_id, instance.created_at, 1)
+    else:
+        # same option; the voter may have changed, which shows in hasVoted
+        _invalidate_poll_cache(instance.poll_id)
+
+
+@receiver(votes_bulk_created)
+def votes_bulk_saved(sender, counts, voters=(), **kwargs):
+    by_poll = {}
+    for poll_id, voter_id in voters:
+        by_poll.setdefault(poll_id, []).append(voter_id)
+    for poll_id, voter_ids in by_poll.items():
+        add_voters(poll_id, voter_ids)
+    pin_voters({voter_id for _, voter_id in voters})
+    apply_vote_deltas(counts)
+    # bulk_create stamps created_at with the current time as well
+    now = timezone.now()
+    for (poll_id, option_id), delta in counts.items():
+        record_votes(poll_id, option_id, now, delta)
+        _shift_cached_counts(poll_id, option_id, delta)
 
 
 @receiver(post_delete, sender=Vote)
-def vote_deleted(sender, instance, **kwargs):
-    _invalidate_poll_cache(instance.poll_id)
+def vote_deleted(sender, instance, origin=None, **kwargs):
+    if _deleted_with_poll(origin):
+        return
+    _move_vote(instance.poll_id, instance.option_id, instance.created_at, -1)
+
+
+@receiver(post_save, sender=Poll)
+def poll_saved(sender, instance, created, **kwargs):
+    # an edited poll changes the results/detail payloads (and their ETags)
+    if created:
+        # a new poll has no voters, so its filter is complete from the start
+        reset_voters(instance.pk)
+    else:
+        _invalidate_poll_cache(instance.pk)
+
+
+@receiver(post_delete, sender=Poll)
+def poll_deleted(sender, instance, **kwargs):
+    transaction.on_commit(partial(get_filter().forget, instance.pk))
+    # retires cached responses (and ETags) of the deleted poll
+    transaction.on_commit(partial(bump_poll_version, instance.pk))
 
 
 @receiver(post_save, sender=Option)
 def option_saved(sender, instance, created, **kwargs):
-    # if options change, invalidate poll results
+    # structural change: options were added or edited, rebuild poll results
+    _invalidate_poll_cache(instance.poll_id)
+
+
+@receiver(post_delete, sender=Option)
+def option_deleted(sender, instance, **kwargs):
     _invalidate_poll_cache(instance.poll_id)
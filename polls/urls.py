@@ -1,9 +1,20 @@
 from django.urls import path
-from .views import PollListCreateView, PollDetailView, VoteCreateView, PollResultsView
+from .metrics import metrics_view
+from .views import (
+    PollListCreateView, BulkPollCreateView, PollDetailView, VoteCreateView, BulkVoteCreateView, VoteTicketView,
+    PollResultsView, PollTimelineView, PollVoteExportView, poll_results_stream,
+)
 
 urlpatterns = [
     path('polls/', PollListCreateView.as_view(), name='poll-list-create'),
+    path('polls/bulk/', BulkPollCreateView.as_view(), name='poll-bulk-create'),
     path('polls/<uuid:pk>/results/', PollResultsView.as_view(), name='poll-results'),
+    path('polls/<uuid:pk>/results/stream/', poll_results_stream, name='poll-results-stream'),
+    path('polls/<uuid:pk>/timeline/', PollTimelineView.as_view(), name='poll-timeline'),
+    path('polls/<uuid:pk>/votes/export', PollVoteExportView.as_view(), name='poll-votes-export'),
     path('polls/<uuid:pk>/', PollDetailView.as_view(), name='poll-detail'),
     path('votes/', VoteCreateView.as_view(), name='vote-create'),
+    path('votes/bulk/', BulkVoteCreateView.as_view(), name='vote-bulk-create'),
+    path('votes/tickets/<uuid:ticket>/', VoteTicketView.as_view(), name='vote-ticket'),
+    path('metrics', metrics_view, name='metrics'),
 ]
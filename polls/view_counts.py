@@ -0,0 +1,206 @@
+"""Buffered Poll.views counting.
+
+Each view increments a per-poll counter in the cache for the current time bucket;
+`flush_poll_views` later folds closed buckets into Poll.views with one UPDATE per poll.
+Writers never touch a bucket the flusher is reading, so nothing is lost or counted
+twice, and reads report Poll.views plus whatever is still pending.
+
+Without a shared cache (SHARED_CACHE off: locmem) the buckets live in each worker's
+own memory, out of the command's reach, so every worker flushes its own from the
+request path instead, at most once per bucket, and once more when it exits.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import Counter
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from .models import Poll
+
+BUCKET_SECONDS = 10
+# pending buckets survive this long if the flusher is down
+PENDING_TIMEOUT = 24 * 60 * 60
+# newest buckets readers look at; older unflushed views show up once flushed
+READ_BUCKETS = 30
+WATERMARK_KEY = 'poll_views_flushed'
+FLUSH_LOCK_KEY = 'poll_views_flush_lock'
+FLUSH_LOCK_TIMEOUT = 60
+
+logger = logging.getLogger(__name__)
+
+_local_lock = threading.Lock()
+_next_local_flush = 0.0
+_exit_flush_registered = False
+
+
+def _bucket(now=None):
+    return int((now if now is not None else time.time()) // BUCKET_SECONDS)
+
+
+def _count_key(poll_id, bucket):
+    return f"poll_views:{bucket}:{poll_id}"
+
+
+def _dirty_seq_key(bucket):
+    return f"poll_views_seq:{bucket}"
+
+
+def _dirty_key(bucket, seq):
+    return f"poll_views_dirty:{bucket}:{seq}"
+
+
+def _local_flush_due():
+    global _next_local_flush, _exit_flush_registered
+    if settings.SHARED_CACHE:
+        return False
+    now = time.monotonic()
+    with _local_lock:
+        if not _exit_flush_registered:
+            atexit.register(_flush_on_exit)
+            _exit_flush_registered = True
+        if now < _next_local_flush:
+            return False
+        _next_local_flush = now + BUCKET_SECONDS
+    return True
+
+
+def _flush_on_exit():
+    # nothing writes any more, so the still-open buckets can go too
+    try:
+        flush_views(now=time.time() + BUCKET_SECONDS * 2)
+    except Exception:
+        logger.warning('could not flush buffered poll views on exit', exc_info=True)
+
+
+def record_view(poll_id):
+    """Count a view of an existing poll."""
+    _count_view(poll_id)
+    if _local_flush_due():
+        flush_views()
+
+
+async def arecord_view(poll_id):
+    await _acount_view(poll_id)
+    if _local_flush_due():
+        await sync_to_async(flush_views)()
+
+
+def _count_view(poll_id):
+    bucket = _bucket()
+    key = _count_key(poll_id, bucket)
+    if cache.add(key, 1, timeout=PENDING_TIMEOUT):
+        # first view of this poll in the bucket: register it for the flusher
+        seq_key = _dirty_seq_key(bucket)
+        cache.add(seq_key, 0, timeout=PENDING_TIMEOUT)
+        seq = cache.incr(seq_key)
+        cache.set(_dirty_key(bucket, seq), str(poll_id), timeout=PENDING_TIMEOUT)
+        return
+    try:
+        cache.incr(key)
+    except ValueError:
+        # evicted between add and incr; losing one view beats failing the request
+        pass
+
+
+async def _acount_view(poll_id):
+    bucket = _bucket()
+    key = _count_key(poll_id, bucket)
+    if await cache.aadd(key, 1, timeout=PENDING_TIMEOUT):
+        seq_key = _dirty_seq_key(bucket)
+        await cache.aadd(seq_key, 0, timeout=PENDING_TIMEOUT)
+        seq = await cache.aincr(seq_key)
+        await cache.aset(_dirty_key(bucket, seq), str(poll_id), timeout=PENDING_TIMEOUT)
+        return
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        pass
+
+
+def _pending_keys(poll_id):
+    current = _bucket()
+    buckets = range(current - READ_BUCKETS + 1, current + 1)
+    return {_count_key(poll_id, b): b for b in buckets}
+
+
+def _sum_pending(keys, found):
+    flushed = found.pop(WATERMARK_KEY, None)
+    return sum(n for key, n in found.items() if flushed is None or keys[key] > flushed)
+
+
+def pending_views(poll_id):
+    keys = _pending_keys(poll_id)
+    return _sum_pending(keys, cache.get_many([WATERMARK_KEY] + list(keys)))
+
+
+async def apending_views(poll_id):
+    keys = _pending_keys(poll_id)
+    return _sum_pending(keys, await cache.aget_many([WATERMARK_KEY] + list(keys)))
+
+
+def _many_keys(poll_ids):
+    return {str(poll_id): _pending_keys(poll_id) for poll_id in poll_ids}
+
+
+def _sum_many(keys, found):
+    flushed = found.pop(WATERMARK_KEY, None)
+    return {
+        poll_id: sum(found.get(key, 0) for key, b in poll_keys.items() if flushed is None or b > flushed)
+        for poll_id, poll_keys in keys.items()
+    }
+
+
+def pending_views_many(poll_ids):
+    """`pending_views` for a page of polls in one cache read: {str(poll_id): views}."""
+    keys = _many_keys(poll_ids)
+    return _sum_many(keys, cache.get_many([WATERMARK_KEY] + [k for poll_keys in keys.values() for k in poll_keys]))
+
+
+async def apending_views_many(poll_ids):
+    keys = _many_keys(poll_ids)
+    return _sum_many(keys, await cache.aget_many([WATERMARK_KEY] + [k for poll_keys in keys.values() for k in poll_keys]))
+
+
+def flush_views(now=None):
+    """Fold every closed bucket into Poll.views. Returns the number of views flushed."""
+    # a second flusher running over the same buckets would count them twice
+    if not cache.add(FLUSH_LOCK_KEY, 1, timeout=FLUSH_LOCK_TIMEOUT):
+        return 0
+    try:
+        return _flush_closed_buckets(now)
+    finally:
+        cache.delete(FLUSH_LOCK_KEY)
+
+
+def _flush_closed_buckets(now):
+    # the current bucket and the one before it may still receive (late) writes
+    last_closed = _bucket(now) - 2
+    flushed = cache.get(WATERMARK_KEY)
+    first = flushed + 1 if flushed is not None else last_closed - PENDING_TIMEOUT // BUCKET_SECONDS
+    if first > last_closed:
+        return 0
+
+    buckets = range(first, last_closed + 1)
+    seqs = cache.get_many([_dirty_seq_key(b) for b in buckets])
+    dirty_keys = [
+        _dirty_key(b, seq)
+        for b in buckets
+        for seq in range(1, seqs.get(_dirty_seq_key(b), 0) + 1)
+    ]
+    dirty = cache.get_many(dirty_keys)
+    count_keys = [_count_key(dirty[k], k.split(':')[1]) for k in dirty_keys if k in dirty]
+    counts = cache.get_many(count_keys)
+
+    totals = Counter()
+    for key, n in counts.items():
+        totals[key.split(':', 2)[2]] += n
+    for poll_id, n in totals.items():
+        Poll.objects.filter(pk=poll_id).update(views=F('views') + n)
+
+    # delete after the UPDATEs: a crash in between re-flushes rather than loses views
+    cache.set(WATERMARK_KEY, last_closed, timeout=None)
+    cache.delete_many(count_keys + dirty_keys + list(seqs))
+    return sum(totals.values())
@@ -1,14 +1,32 @@
+import asyncio
+from datetime import timezone as dt_timezone
 from rest_framework import generics, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from django.shortcuts import get_object_or_404
-from django.db.models import Count
-from .models import Poll, Option, Vote
-from .serializers import PollCreateSerializer, PollDetailSerializer, VoteSerializer, OptionSerializer
-from drf_spectacular.utils import extend_schema, OpenApiExample
-from django.core.cache import cache
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from .models import Poll, Vote
+from .serializers import PollCreateSerializer, PollDetailSerializer, VoteSerializer, voted_option_id
+from .results_cache import aget_results, get_results, with_voter_flags
+from .realtime import get_hub, format_sse
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiExample, OpenApiParameter
+from rest_framework import serializers
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
+from .bulk import ingest_votes, MAX_BULK_VOTES
+from .vote_queue import enqueue_vote, ticket_status
+from .pagination import PollCursorPagination, PollPageNumberPagination
+from .etags import ConditionalPollMixin
+from .response_cache import cached_response, cache_on_render
+from .fast_serializers import list_rows, poll_list_data, poll_detail_data
+from .view_counts import record_view, pending_views, pending_views_many
+from .rollups import LEVELS, MAX_RANGES, MINUTE, SPANS, timeline, truncate
+from .export import FORMATS, STREAMS, aiterate
+from polls_backend.throttling import CacheRateThrottle
 
 
 @extend_schema(
@@ -30,8 +48,21 @@ from rest_framework.permissions import IsAuthenticated
 class PollListCreateView(generics.ListCreateAPIView):
     """GET: return {"polls": [...]}. POST: create a poll."""
     serializer_class = PollCreateSerializer
-    queryset = Poll.objects.all().prefetch_related('options')
+    # list rows carry the stored total_votes and expose the creator by id only,
+    # so nothing needs to be joined or prefetched per page
+    queryset = Poll.objects.all()
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = PollCursorPagination
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            # keyset cursors by default; page-number mode stays available via ?page=N
+            if 'page' in self.request.query_params:
+                self._paginator = PollPageNumberPagination()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
 
     def get_serializer_class(self):
         if self.request.method == 'GET':
@@ -41,25 +72,64 @@ class PollListCreateView(generics.ListCreateAPIView):
         return PollCreateSerializer
 
     def list(self, request, *args, **kwargs):
-        queryset = self.filter_queryset(self.get_queryset())
+        # `.values()` rows mapped straight to PollListSerializer's shape: no model
+        # instances and no per-field serializer dispatch
+        queryset = list_rows(self.filter_queryset(self.get_queryset()))
 
         page = self.paginate_queryset(queryset)
         if page is not None:
-            serializer = self.get_serializer(page, many=True, context={'request': request})
-            return self.get_paginated_response({'polls': serializer.data})
+            # the paginators wrap rows as {"polls": [...], "next": ..., "previous": ...}
+            pending = pending_views_many([row['id'] for row in page])
+            return self.get_paginated_response(poll_list_data(page, pending))
 
-        serializer = self.get_serializer(queryset, many=True, context={'request': request})
-        return Response({'polls': serializer.data})
+        rows = list(queryset)
+        return Response({'polls': poll_list_data(rows, pending_views_many([row['id'] for row in rows]))})
 
     def perform_create(self, serializer):
         # Pass request in serializer context so it can set created_by
         serializer.save()
 
 
+MAX_BULK_POLLS = 1000
+
+
+@extend_schema(
+    request=PollCreateSerializer(many=True),
+    responses={201: None, 400: None},
+    examples=[
+        OpenApiExample(
+            'Bulk poll example',
+            summary='Create two polls in one request',
+            value=[
+                {'question': 'Favorite language', 'options': ['Python', 'Go']},
+                {'question': 'Tabs or spaces', 'options': ['Tabs', 'Spaces']},
+            ],
+            request_only=True,
+        )
+    ],
+)
+class BulkPollCreateView(APIView):
+    """Create many polls at once: a list of poll payloads (or {"polls": [...]})."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        items = request.data.get('polls') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({'detail': 'Expected a non-empty list of polls.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > MAX_BULK_POLLS:
+            return Response({'detail': f'At most {MAX_BULK_POLLS} polls per request.'}, status=status.HTTP_400_BAD_REQUEST)
+        serializer = PollCreateSerializer(data=items, many=True, context={'request': request})
+        serializer.is_valid(raise_exception=True)
+        polls = serializer.save()
+        return Response({'created': len(polls), 'ids': [str(poll.id) for poll in polls]}, status=status.HTTP_201_CREATED)
+
+
 @extend_schema(responses=PollDetailSerializer)
-class PollDetailView(generics.RetrieveAPIView):
+class PollDetailView(ConditionalPollMixin, generics.RetrieveAPIView):
     serializer_class = PollDetailSerializer
-    queryset = Poll.objects.prefetch_related('options')
+    # retrieve() builds the payload from poll_detail_data's `.values()` rows; this
+    # queryset is only used for the schema and the browsable API's form
+    queryset = Poll.objects.all()
 
     def get_serializer_context(self):
         ctx = super().get_serializer_context()
@@ -72,9 +142,23 @@ class PollDetailView(generics.RetrieveAPIView):
     
     def retrieve(self, request, *args, **kwargs):
         """Return poll wrapped in {'poll': ...} to match frontend PollResponse shape."""
-        instance = self.get_object()
-        serializer = self.get_serializer(instance, context=self.get_serializer_context())
-        return Response({'poll': serializer.data})
+        pk = kwargs['pk']
+        context = self.get_serializer_context()
+        # resolved up front (and memoized in the context) to pick the cached variant
+        chosen = voted_option_id(context, pk)
+        cached = cached_response(request, 'detail', pk, self.poll_version, chosen)
+        if cached is not None:
+            record_view(pk)
+            return cached
+
+        # PollDetailSerializer's shape, built from `.values()` rows; the count includes
+        # this view, recorded once the poll is known to exist
+        data = poll_detail_data(pk, chosen, extra_views=pending_views(pk) + 1)
+        if data is None:
+            raise Http404
+        # buffered in the cache and flushed in batches; never a row write per read
+        record_view(pk)
+        return cache_on_render(Response({'poll': data}), 'detail', pk, self.poll_version, chosen)
 
 
 @extend_schema(
@@ -92,11 +176,12 @@ class PollDetailView(generics.RetrieveAPIView):
 class VoteCreateView(generics.CreateAPIView):
     serializer_class = VoteSerializer
     queryset = Vote.objects.all()
+    throttle_classes = [CacheRateThrottle]
+    throttle_scope = 'vote'
     # permission: require auth by default, but allow anonymous voting via env flag
     def get_permissions(self):
-        from django.conf import settings
         if getattr(settings, 'ALLOW_ANONYMOUS_VOTE', False):
-            return [IsAuthenticatedOrReadOnly()]
+            return [AllowAny()]
         return [IsAuthenticated()]
 
     def create(self, request, *args, **kwargs):
@@ -106,39 +191,253 @@ class VoteCreateView(generics.CreateAPIView):
             data['userId'] = str(request.user.id)
         serializer = self.get_serializer(data=data, context={'request': request})
         serializer.is_valid(raise_exception=True)
+        if settings.VOTE_WRITE_BEHIND:
+            return self.enqueue(serializer.validated_data)
         self.perform_create(serializer)
         headers = self.get_success_headers(serializer.data)
         return Response(serializer.data, status=status.HTTP_201_CREATED, headers=headers)
 
+    def enqueue(self, validated_data):
+        poll, option = validated_data['poll'], validated_data['option']
+        ticket = enqueue_vote(poll.id, option.id, validated_data['voter_id'])
+        if ticket is None:
+            return Response(
+                {'non_field_errors': ['Voter has already voted on this poll']}, status=status.HTTP_400_BAD_REQUEST
+            )
+        body = {'ticket': ticket, 'status': 'queued', 'pollId': str(poll.id), 'optionId': str(option.id)}
+        return Response(body, status=status.HTTP_202_ACCEPTED)
+
+
+@extend_schema(
+    responses={
+        200: inline_serializer('VoteTicket', fields={
+            'ticket': serializers.UUIDField(),
+            'status': serializers.ChoiceField(choices=['queued', 'created', 'duplicate', 'invalid']),
+            'id': serializers.UUIDField(required=False, help_text='The vote id, once created.'),
+            'error': serializers.CharField(required=False),
+        }),
+        404: None,
+    },
+)
+class VoteTicketView(APIView):
+    """Outcome of a vote accepted in write-behind mode: queued, created, duplicate or invalid."""
+
+    def get(self, request, ticket):
+        outcome = ticket_status(ticket)
+        if outcome is None:
+            # ticket state expired from the cache; the vote id is the ticket
+            if not Vote.objects.filter(id=ticket).exists():
+                raise Http404
+            outcome = {'status': 'created', 'id': str(ticket)}
+        return Response(dict(outcome, ticket=str(ticket)))
+
+
+@extend_schema(
+    request={'application/json': {'type': 'array', 'items': {'type': 'object'}}},
+    responses={200: None, 400: None},
+    examples=[
+        OpenApiExample(
+            'Bulk vote example',
+            summary='Import votes collected offline',
+            value=[{'pollId': '00000000-0000-0000-0000-000000000000', 'optionId': '00000000-0000-0000-0000-000000000001', 'userId': 'kiosk-7:ticket-42'}],
+            request_only=True,
+        )
+    ],
+)
+class BulkVoteCreateView(APIView):
+    """Import a batch of votes: a list of {pollId, optionId, userId} (or {"votes": [...]})."""
+    # records carry arbitrary voter ids, so only staff import clients may submit them
+    permission_classes = [IsAdminUser]
+
+    def post(self, request):
+        records = request.data.get('votes') if isinstance(request.data, dict) else request.data
+        if not isinstance(records, list) or not records:
+            return Response({'detail': 'Expected a non-empty list of votes.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(records) > MAX_BULK_VOTES:
+            return Response({'detail': f'At most {MAX_BULK_VOTES} votes per request.'}, status=status.HTTP_400_BAD_REQUEST)
+        results = ingest_votes(records)
+        created = sum(1 for r in results if r['status'] == 'created')
+        return Response({'created': created, 'results': results}, status=status.HTTP_200_OK)
+
 
-@extend_schema(responses={200: OpenApiExample('Results', value={'total_votes': 10, 'results': [{'id': 'uuid','text':'A','votes':7}]})})
-class PollResultsView(APIView):
+@extend_schema(responses={200: inline_serializer('PollResults', fields={'poll': PollDetailSerializer()}), 404: None})
+class PollResultsView(ConditionalPollMixin, APIView):
     def get(self, request, pk):
-        cache_key = f"poll_results:{pk}"
-        # try cached value first
-        cached = cache.get(cache_key)
+        # allow marking voted option by passing voter_id or userId; a single indexed
+        # lookup on (voter_id, poll) supplies both `voted` and `hasVoted`
+        voter_id = request.query_params.get('voter_id') or request.query_params.get('userId')
+        chosen = voted_option_id({'voter_id': voter_id, 'request': request}, pk)
+        cached = cached_response(request, 'results', pk, self.poll_version, chosen)
         if cached is not None:
-            return Response({'poll': cached})
+            return cached
 
-        poll = get_object_or_404(Poll.objects.prefetch_related('options'), pk=pk)
-        # annotate options with vote counts efficiently
-        options = Option.objects.filter(poll=poll).annotate(votes=Count('votes')).order_by('order')
-        # allow marking voted option by passing voter_id or userId
-        voter_id = request.query_params.get('voter_id') or request.query_params.get('userId')
-        serializer = OptionSerializer(options, many=True, context={'voter_id': voter_id, 'request': request})
-        data = {
-            'id': str(poll.id),
-            'question': poll.title,
-            'description': poll.description,
-            'options': serializer.data,
-            'totalVotes': sum(item['votes'] for item in serializer.data),
-            'createdAt': poll.created_at.isoformat() if poll.created_at else None,
-            'updatedAt': poll.updated_at.isoformat() if poll.updated_at else None,
-            'isActive': poll.is_active,
-            'views': poll.views,
-            'hasVoted': bool((voter_id and Vote.objects.filter(poll=poll, voter_id=voter_id).exists()) or (not voter_id and request.user.is_authenticated and Vote.objects.filter(poll=poll, voter_id=str(request.user.id)).exists())),
-            'createdBy': str(poll.created_by.id) if poll.created_by else None,
-        }
-        # cache results for short period; invalidated by signals when votes/options change
-        cache.set(cache_key, data, timeout=30)  # 30 seconds default; tune as needed
-        return Response({'poll': data})
+        # one cache entry per poll shared by every caller; it holds no voter-specific data
+        data = get_results(pk)
+        if data is None:
+            raise Http404
+        data = with_voter_flags(data, chosen)
+        data['views'] += pending_views(pk)
+        return cache_on_render(Response({'poll': data}), 'results', pk, self.poll_version, chosen)
+
+
+def _parse_moment(value):
+    moment = parse_datetime(value)
+    if moment is not None and timezone.is_naive(moment):
+        # buckets are UTC, so an offset-less time is read as UTC too
+        moment = timezone.make_aware(moment, dt_timezone.utc)
+    return moment
+
+
+@extend_schema(
+    parameters=[
+        OpenApiParameter('granularity', str, enum=list(LEVELS), description='Bucket size (default minute).'),
+        OpenApiParameter('from', OpenApiTypes.DATETIME, description='Start of the range (default: `to` minus the longest range).'),
+        OpenApiParameter('to', OpenApiTypes.DATETIME, description='End of the range (default: now).'),
+    ],
+    responses={
+        200: inline_serializer('PollTimeline', fields={
+            'pollId': serializers.UUIDField(),
+            'granularity': serializers.CharField(),
+            'buckets': serializers.ListField(child=serializers.DictField()),
+        }),
+        400: None,
+        404: None,
+    },
+    examples=[
+        OpenApiExample(
+            'Timeline',
+            value={'pollId': 'uuid', 'granularity': 'hour', 'buckets': [{'start': '2025-01-01T10:00:00+00:00', 'votes': {'uuid': 4}, 'total': 4}]},
+            response_only=True,
+        ),
+    ],
+)
+class PollTimelineView(APIView):
+    """Votes per option over time (`?granularity=minute|hour|day&from=&to=`), served from the rollups.
+
+    The range is capped per granularity (MAX_RANGES): a day of minutes, a month of
+    hours, three years of days.
+    """
+
+    def get(self, request, pk):
+        granularity = request.query_params.get('granularity', MINUTE)
+        if granularity not in LEVELS:
+            return Response(
+                {'granularity': [f"Expected one of: {', '.join(LEVELS)}."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        max_range = MAX_RANGES[granularity]
+        bounds = {}
+        for param in ('from', 'to'):
+            value = request.query_params.get(param)
+            if value:
+                bounds[param] = _parse_moment(value)
+                if bounds[param] is None:
+                    return Response({param: ['Expected an ISO 8601 datetime.']}, status=status.HTTP_400_BAD_REQUEST)
+        end = bounds.get('to') or timezone.now()
+        start = bounds.get('from') or end - max_range
+        if start > end:
+            return Response({'from': ['Must not be after `to`.']}, status=status.HTTP_400_BAD_REQUEST)
+        if end - start > max_range:
+            return Response(
+                {'from': [f'At most {max_range.days} day(s) of {granularity} buckets per request.']},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        if not Poll.objects.filter(pk=pk).exists():
+            raise Http404
+        # the bucket holding `to` is included
+        buckets = timeline(pk, granularity, start, truncate(end, granularity) + SPANS[granularity])
+        return Response({'pollId': str(pk), 'granularity': granularity, 'buckets': buckets})
+
+
+@extend_schema(
+    parameters=[OpenApiParameter('format', str, enum=list(FORMATS), description='Export encoding (default csv).')],
+    responses={
+        (200, 'text/csv'): OpenApiTypes.BINARY,
+        (200, 'application/x-ndjson'): OpenApiTypes.BINARY,
+        400: None,
+        403: None,
+        404: None,
+    },
+)
+class PollVoteExportView(APIView):
+    """Stream every vote of a poll as CSV or NDJSON (`?format=csv|ndjson`, default csv).
+
+    Only the poll's creator or staff may export. Memory use is flat in the number of
+    votes: rows are read with a server-side iterator and written chunk by chunk.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def perform_content_negotiation(self, request, force=False):
+        # `format` picks the export encoding here, not a DRF renderer; errors stay JSON
+        return self.renderer_classes[0](), self.renderer_classes[0].media_type
+
+    def get(self, request, pk):
+        export_format = request.query_params.get('format', 'csv')
+        if export_format not in FORMATS:
+            return Response(
+                {'format': [f"Expected one of: {', '.join(FORMATS)}."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        poll = Poll.objects.filter(pk=pk).values('created_by_id').first()
+        if poll is None:
+            raise Http404
+        if poll['created_by_id'] != request.user.id and not request.user.is_staff:
+            return Response({'detail': 'Only the poll creator can export its votes.'}, status=status.HTTP_403_FORBIDDEN)
+
+        blocks = STREAMS[export_format](pk)
+        if isinstance(request._request, ASGIRequest):
+            # uvicorn: Django would buffer a sync iterator in full before sending it
+            blocks = aiterate(blocks)
+        response = StreamingHttpResponse(blocks, content_type=FORMATS[export_format])
+        response['Content-Disposition'] = f'attachment; filename="poll-{pk}-votes.{export_format}"'
+        response['Cache-Control'] = 'no-store'
+        return response
+
+
+# seconds between SSE comment lines that keep idle proxies from closing the stream
+STREAM_HEARTBEAT = 15
+
+
+async def poll_results_stream(request, pk):
+    """Server-sent events: a `snapshot` of the results, then coalesced `delta` events.
+
+    Needs the ASGI entry point (uvicorn); a sync worker would be pinned for the whole
+    life of the connection.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({'detail': 'Streaming requires the ASGI server.'}, status=501)
+    if await aget_results(pk) is None:
+        raise Http404
+
+    hub = get_hub()
+
+    async def events():
+        # subscribe before reading the snapshot, so no vote can fall between the two
+        queue = hub.subscribe(pk)
+        loop = asyncio.get_running_loop()
+        try:
+            data = await aget_results(pk)
+            # deltas flushed within a coalescing interval of the read (doubled, for a late
+            # timer) may hold votes the snapshot already counts; those are answered with a
+            # fresh snapshot instead, so the client never counts a vote twice
+            settled_at = loop.time() + 2 * hub.interval
+            yield format_sse('snapshot', data)
+            while True:
+                try:
+                    delta = await asyncio.wait_for(queue.get(), timeout=STREAM_HEARTBEAT)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                if loop.time() >= settled_at:
+                    yield format_sse('delta', delta)
+                    continue
+                data = await aget_results(pk)
+                if data is None:
+                    return
+                settled_at = loop.time() + 2 * hub.interval
+                yield format_sse('snapshot', data)
+        finally:
+            hub.unsubscribe(pk, queue)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,187 @@
+"""Write-behind vote queue (opt-in with VOTE_WRITE_BEHIND=1).
+
+`VoteCreateView` validates a vote, enqueues it and answers 202 with a ticket (the id the
+vote will be stored under). The `drain_vote_queue` command claims queued votes in
+batches and group-commits them through `polls.bulk.ingest_votes`.
+"""
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.utils.module_loading import import_string
+from .bulk import ingest_votes
+
+# a claimed batch that isn't acked within this many seconds is handed out again
+VISIBILITY_TIMEOUT = 60
+PENDING_TIMEOUT = 60 * 60
+TICKET_TIMEOUT = 24 * 60 * 60
+
+
+class SQLiteVoteQueue:
+    """Durable local stand-in: an append-only table in its own SQLite file (WAL mode)."""
+
+    def __init__(self, path=None):
+        self.path = str(path or settings.VOTE_QUEUE_PATH)
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS vote_queue ('
+                'id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, claimed_at REAL)'
+            )
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, record):
+        self._conn().execute('INSERT INTO vote_queue (payload) VALUES (?)', (json.dumps(record),))
+
+    def claim(self, limit):
+        conn = self._conn()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                'SELECT id, payload FROM vote_queue WHERE claimed_at IS NULL OR claimed_at < ? ORDER BY id LIMIT ?',
+                (now - VISIBILITY_TIMEOUT, limit),
+            ).fetchall()
+            conn.executemany('UPDATE vote_queue SET claimed_at = ? WHERE id = ?', [(now, row[0]) for row in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def ack(self, message_ids):
+        self._conn().executemany('DELETE FROM vote_queue WHERE id = ?', [(pk,) for pk in message_ids])
+
+    def __len__(self):
+        return self._conn().execute('SELECT COUNT(*) FROM vote_queue').fetchone()[0]
+
+
+class RedisStreamVoteQueue:
+    """Redis stream with a consumer group, so several drainers can share the load."""
+
+    stream = 'vote_queue'
+    group = 'vote-writers'
+
+    def __init__(self, url=None, consumer=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.VOTE_QUEUE_URL)
+        self.consumer = consumer or f'drainer-{uuid.uuid4().hex[:8]}'
+        self._group_ready = False
+
+    def _ensure_group(self):
+        if self._group_ready:
+            return
+        import redis
+
+        try:
+            self.client.xgroup_create(self.stream, self.group, id='0', mkstream=True)
+        except redis.ResponseError as exc:
+            if 'BUSYGROUP' not in str(exc):
+                raise
+        self._group_ready = True
+
+    def enqueue(self, record):
+        self.client.xadd(self.stream, {'payload': json.dumps(record)})
+
+    def claim(self, limit):
+        self._ensure_group()
+        # first take over entries a crashed drainer claimed but never acked
+        _, entries, *_ = self.client.xautoclaim(
+            self.stream, self.group, self.consumer, min_idle_time=VISIBILITY_TIMEOUT * 1000, count=limit
+        )
+        if not entries:
+            response = self.client.xreadgroup(self.group, self.consumer, {self.stream: '>'}, count=limit)
+            entries = response[0][1] if response else []
+        return [(message_id, json.loads(fields[b'payload'])) for message_id, fields in entries]
+
+    def ack(self, message_ids):
+        if message_ids:
+            self.client.xack(self.stream, self.group, *message_ids)
+            self.client.xdel(self.stream, *message_ids)
+
+    def __len__(self):
+        return self.client.xlen(self.stream)
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_queue():
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = import_string(settings.VOTE_QUEUE_BACKEND)()
+        return _queue
+
+
+def check_configuration():
+    """Refuse to start write-behind voting on a per-process cache.
+
+    Pending votes and ticket outcomes live in the default cache: with locmem, the
+    drainer's outcomes and the other workers' pending markers would be invisible.
+    """
+    if settings.VOTE_WRITE_BEHIND and not settings.SHARED_CACHE:
+        raise ImproperlyConfigured('VOTE_WRITE_BEHIND needs a cache shared by all processes; set REDIS_URL.')
+
+
+def _pending_key(poll_id, voter_id):
+    return f"vote_pending:{poll_id}:{voter_id}"
+
+
+def _ticket_key(ticket):
+    return f"vote_ticket:{ticket}"
+
+
+def enqueue_vote(poll_id, option_id, voter_id):
+    """Queue a validated vote and return its ticket, or None if this voter already has
+    a vote for the poll in flight (the cheap, cache-only duplicate check)."""
+    ticket = str(uuid.uuid4())
+    if not cache.add(_pending_key(poll_id, voter_id), ticket, timeout=PENDING_TIMEOUT):
+        return None
+    get_queue().enqueue({'id': ticket, 'pollId': str(poll_id), 'optionId': str(option_id), 'userId': voter_id})
+    cache.set(_ticket_key(ticket), {'status': 'queued'}, timeout=TICKET_TIMEOUT)
+    return ticket
+
+
+def ticket_status(ticket):
+    return cache.get(_ticket_key(ticket))
+
+
+def drain_batch(queue=None, batch_size=500):
+    """Claim up to `batch_size` queued votes, commit them as one group and ack them.
+
+    Returns the number of votes processed. Cache and stream updates fire once per
+    batch through the votes_bulk_created signal.
+    """
+    queue = queue or get_queue()
+    claimed = queue.claim(batch_size)
+    if not claimed:
+        return 0
+    records = [record for _, record in claimed]
+    outcomes = ingest_votes(records)
+
+    tickets = {}
+    released = []
+    for record, outcome in zip(records, outcomes):
+        tickets[_ticket_key(record['id'])] = {k: v for k, v in outcome.items() if k != 'index'}
+        if outcome['status'] != 'created':
+            # let the voter try again; a real duplicate is caught again on the next pass
+            released.append(_pending_key(record['pollId'], record['userId']))
+    cache.set_many(tickets, timeout=TICKET_TIMEOUT)
+    if released:
+        cache.delete_many(released)
+    queue.ack([message_id for message_id, _ in claimed])
+    return len(claimed)
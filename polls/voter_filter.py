@@ -0,0 +1,266 @@
+"""Per-poll "has this voter voted?" membership filter kept in the cache.
+
+`voted_option_id` asks the filter first and only queries Vote when the answer is
+"maybe". Voters are added on the vote write path before the transaction commits, so
+the filter can over-report (a rolled-back or deleted vote) but never miss a vote. A
+poll whose filter is missing, evicted or being rebuilt is "unknown" and every lookup
+falls through to the database. `python manage.py rebuild_voter_filter` (re)populates
+filters from Vote.
+
+The filter has to see every vote, so it only runs on Redis, which all workers share.
+Without Redis the backend is NullVoterFilter: always "unknown".
+"""
+import hashlib
+import math
+import threading
+from collections import Counter
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from .models import Poll, Vote
+
+STATS_KEY_PREFIX = 'voter_filter_stats'
+STATS = ('avoided', 'maybe', 'false_positive', 'unknown')
+# local stat increments are pushed to the shared counters every this many lookups
+STATS_FLUSH_EVERY = 100
+
+
+class RedisSetVoterFilter:
+    """One Redis set of voter ids per poll; exact, so it never sends a miss to the DB."""
+
+    # voter ids are never empty, so the empty member marks a complete set; it goes
+    # away with the set if Redis evicts it
+    READY = ''
+
+    def __init__(self, url=None):
+        import redis
+
+        self.client = redis.Redis.from_url(url or settings.POLLS_VOTER_FILTER_URL)
+
+    def _key(self, poll_id):
+        return f'poll_voters:{poll_id}'
+
+    def add(self, poll_id, voter_ids):
+        if voter_ids:
+            self.client.sadd(self._key(poll_id), *voter_ids)
+
+    def check(self, poll_id, voter_id):
+        ready, member = self.client.smismember(self._key(poll_id), [self.READY, voter_id])
+        if not ready:
+            return None
+        return bool(member)
+
+    def start_rebuild(self, poll_id, expected=0):
+        # lookups fall through to the DB until finish_rebuild; votes cast meanwhile
+        # are still added by the write path
+        self.client.delete(self._key(poll_id))
+
+    def finish_rebuild(self, poll_id):
+        self.client.sadd(self._key(poll_id), self.READY)
+
+    def forget(self, poll_id):
+        self.client.delete(self._key(poll_id))
+
+
+class NullVoterFilter:
+    """No filter: every lookup is "unknown" and goes to the database.
+
+    The default without Redis. A filter in a per-process cache (locmem) would only see
+    the votes its own worker took, and answer a definite "no" for everyone else's.
+    """
+
+    def add(self, poll_id, voter_ids):
+        pass
+
+    def check(self, poll_id, voter_id):
+        return None
+
+    def start_rebuild(self, poll_id, expected=0):
+        pass
+
+    def finish_rebuild(self, poll_id):
+        pass
+
+    def forget(self, poll_id):
+        pass
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        for pos in self._positions(item):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+class BloomVoterFilter:
+    """Bloom filter per poll stored as one cache value, for a single process only.
+
+    Updates are read-modify-write under a process lock, and every vote has to pass
+    through this process, so it is never picked by default: with several workers on
+    locmem each would miss the others' votes, and on a shared cache concurrent updates
+    would overwrite each other. Use it for one-process setups (runserver, tests).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+
+    def _key(self, poll_id):
+        return f'poll_voters_bloom:{poll_id}'
+
+    def add(self, poll_id, voter_ids):
+        if not voter_ids:
+            return
+        key = self._key(poll_id)
+        with self._lock:
+            entry = cache.get(key)
+            if entry is None:
+                # never built (or evicted): check() already answers "unknown" until the
+                # next rebuild, and a fresh filter holding only these voters would not be
+                # complete, so there is nothing to add to
+                return
+            for voter_id in voter_ids:
+                entry['bloom'].add(voter_id)
+            cache.set(key, entry, timeout=None)
+
+    def check(self, poll_id, voter_id):
+        entry = cache.get(self._key(poll_id))
+        if entry is None or not entry['ready']:
+            return None
+        return voter_id in entry['bloom']
+
+    def start_rebuild(self, poll_id, expected=0):
+        capacity = max(settings.POLLS_VOTER_FILTER_CAPACITY, expected * 2)
+        entry = {'ready': False, 'bloom': BloomFilter(capacity, settings.POLLS_VOTER_FILTER_ERROR_RATE)}
+        with self._lock:
+            cache.set(self._key(poll_id), entry, timeout=None)
+
+    def finish_rebuild(self, poll_id):
+        key = self._key(poll_id)
+        with self._lock:
+            entry = cache.get(key)
+            if entry is not None:
+                entry['ready'] = True
+                cache.set(key, entry, timeout=None)
+
+    def forget(self, poll_id):
+        cache.delete(self._key(poll_id))
+
+
+_filter = None
+_filter_lock = threading.Lock()
+
+
+def get_filter():
+    global _filter
+    path = settings.POLLS_VOTER_FILTER_BACKEND
+    with _filter_lock:
+        # keyed by the setting, so overriding it (tests) swaps the backend
+        if _filter is None or _filter[0] != path:
+            _filter = (path, import_string(path)())
+        return _filter[1]
+
+
+class _Stats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = Counter()
+        self._pending = 0
+
+    def record(self, kind):
+        with self._lock:
+            self._local[kind] += 1
+            self._pending += 1
+            if self._pending < STATS_FLUSH_EVERY:
+                return
+            local, self._local, self._pending = self._local, Counter(), 0
+        self._flush(local)
+
+    def _flush(self, local):
+        for kind, n in local.items():
+            key = f'{STATS_KEY_PREFIX}:{kind}'
+            cache.add(key, 0, timeout=None)
+            try:
+                cache.incr(key, n)
+            except ValueError:
+                pass
+
+    def snapshot(self):
+        with self._lock:
+            local = Counter(self._local)
+        shared = cache.get_many([f'{STATS_KEY_PREFIX}:{kind}' for kind in STATS])
+        return {kind: shared.get(f'{STATS_KEY_PREFIX}:{kind}', 0) + local[kind] for kind in STATS}
+
+    def reset(self):
+        with self._lock:
+            self._local, self._pending = Counter(), 0
+        cache.delete_many([f'{STATS_KEY_PREFIX}:{kind}' for kind in STATS])
+
+
+stats = _Stats()
+
+
+def might_have_voted(poll_id, voter_id):
+    """False only when the filter is sure `voter_id` has no vote on `poll_id`."""
+    try:
+        found = get_filter().check(poll_id, str(voter_id))
+    except Exception:
+        # the filter is an optimization; an unavailable backend means "ask the DB"
+        found = None
+    if found is None:
+        stats.record('unknown')
+        return True
+    stats.record('maybe' if found else 'avoided')
+    return found
+
+
+def record_false_positive():
+    stats.record('false_positive')
+
+
+def add_voters(poll_id, voter_ids):
+    get_filter().add(poll_id, [str(v) for v in voter_ids])
+
+
+def reset_voters(poll_id):
+    """Start `poll_id` with a complete, empty filter (a brand new poll has no votes)."""
+    voter_filter = get_filter()
+    voter_filter.start_rebuild(poll_id)
+    voter_filter.finish_rebuild(poll_id)
+
+
+def rebuild_filters(poll_ids=None, chunk_size=10000):
+    """Repopulate filters from Vote, streaming voter ids. Returns (polls, voters)."""
+    voter_filter = get_filter()
+    polls = Poll.objects.order_by().values_list('id', 'total_votes')
+    if poll_ids:
+        polls = polls.filter(id__in=poll_ids)
+    n_polls = n_voters = 0
+    for poll_id, total_votes in polls.iterator():
+        voter_filter.start_rebuild(poll_id, expected=total_votes)
+        voters = Vote.objects.filter(poll_id=poll_id).values_list('voter_id', flat=True)
+        chunk = []
+        for voter_id in voters.iterator(chunk_size=chunk_size):
+            chunk.append(voter_id)
+            if len(chunk) == chunk_size:
+                voter_filter.add(poll_id, chunk)
+                n_voters += len(chunk)
+                chunk = []
+        voter_filter.add(poll_id, chunk)
+        n_voters += len(chunk)
+        voter_filter.finish_rebuild(poll_id)
+        n_polls += 1
+    return n_polls, n_voters
@@ -2,5 +2,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'polls_backend.settings')
+# serve the read endpoints with the native async views (polls_backend/asgi_urls.py);
+# set ASYNC_VIEWS=0 to run the plain DRF views under uvicorn instead
+os.environ.setdefault('ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
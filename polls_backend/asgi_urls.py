@@ -0,0 +1,13 @@
+"""URLconf for the ASGI server (ASYNC_VIEWS): urls.py with the poll list, detail and
+results routed to the native async views in polls/async_views.py."""
+from django.urls import path
+from polls import async_views
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    # same paths and names as polls/urls.py, matched first
+    path('api/polls/', async_views.poll_list, name='poll-list-create'),
+    path('api/polls/<uuid:pk>/results/', async_views.poll_results, name='poll-results'),
+    path('api/polls/<uuid:pk>/', async_views.poll_detail, name='poll-detail'),
+    *sync_urlpatterns,
+]
@@ -7,6 +7,7 @@ DJANGO_SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY') or 'will-be-changed-in-p
 DEBUG = os.environ.get('DEBUG', 'True') == 'True'
 DJANGO_ALLOWED_HOSTS = [host.strip() for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '*').split(',') if host.strip()]
 DATABASE_URL = os.environ.get('DATABASE_URL')
+DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
 PG_DB = os.environ.get('PG_DB')
 PG_USER = os.environ.get('PG_USER')
 PG_PASSWORD = os.environ.get('PG_PASSWORD')
@@ -14,3 +15,7 @@ PG_HOST = os.environ.get('PG_HOST')
 PG_PORT = os.environ.get('PG_PORT')
 REDIS_URL = os.environ.get('REDIS_URL') or os.environ.get('REDIS_HOST')
 ALLOW_ANONYMOUS_VOTE = os.environ.get('ALLOW_ANONYMOUS_VOTE', '0') == '1'
+VOTE_WRITE_BEHIND = os.environ.get('VOTE_WRITE_BEHIND', '0') == '1'
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+ASYNC_VIEWS = os.environ.get('ASYNC_VIEWS', '0') == '1'
+NUM_PROXIES = int(os.environ.get('NUM_PROXIES', '0'))
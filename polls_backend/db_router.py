@@ -0,0 +1,176 @@
+"""Read-replica routing with read-your-writes stickiness.
+
+Replicas are the extra aliases built from DATABASE_REPLICA_URLS (settings.DATABASE_REPLICAS).
+Reads go to one replica, picked per request, only while a safe (GET/HEAD/OPTIONS)
+request that isn't pinned is being served (ReplicaRoutingMiddleware). Everything else
+(writes, reads during an unsafe request or inside a transaction, management commands
+and background jobs) uses the primary, 'default'.
+
+After a successful write, the caller is pinned to the primary for REPLICA_PIN_SECONDS.
+Pins are keyed by the Authorization header and session cookie (set by the middleware),
+and by voter id (set when a vote is saved). So the next results or detail read from the
+same voter sees their vote, even on a lagging replica. A new token or another device
+carries none of the request pins, so the hasVoted lookup also checks the voter pin of
+the authenticated user (`voter_pinned`). Pins live in the default cache, so replicas
+need one shared by every worker (`check_configuration`).
+"""
+import contextvars
+import hashlib
+import random
+from contextlib import contextmanager
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+
+# user and session rows are read right after they are written (register/login, admin)
+# and sit behind the auth snapshot cache anyway, so they always come from the primary
+PRIMARY_APPS = ('users', 'sessions')
+
+_read_alias = contextvars.ContextVar('polls_read_alias', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DATABASE_REPLICAS', ())
+
+
+def check_configuration():
+    """Refuse read replicas on a per-process cache.
+
+    A pin set by the worker that took the write would be invisible to the others, whose
+    next read of the voter's results would then come from a lagging replica.
+    """
+    if replicas() and not settings.SHARED_CACHE:
+        raise ImproperlyConfigured('DATABASE_REPLICA_URLS needs a cache shared by all processes; set REDIS_URL.')
+
+
+@contextmanager
+def use_primary():
+    """Read from the primary inside this block, e.g. when the result seeds a cache."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def _pin_key(kind, value):
+    return f"db_pin:{kind}:{hashlib.sha1(str(value).encode()).hexdigest()[:16]}"
+
+
+def request_pin_keys(request):
+    # read from the raw request, like the ETag fingerprint: no authentication needed
+    keys = []
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if authorization:
+        keys.append(_pin_key('auth', authorization))
+    session = request.COOKIES.get(settings.SESSION_COOKIE_NAME)
+    if session:
+        keys.append(_pin_key('session', session))
+    for param in ('voter_id', 'userId'):
+        if request.GET.get(param):
+            keys.append(_pin_key('voter', request.GET[param]))
+    return keys
+
+
+def pin_voters(voter_ids):
+    """Send these voters' reads to the primary for the next REPLICA_PIN_SECONDS."""
+    if replicas() and voter_ids:
+        cache.set_many({_pin_key('voter', v): 1 for v in voter_ids}, timeout=settings.REPLICA_PIN_SECONDS)
+
+
+def voter_pinned(voter_id):
+    """Whether a read for this voter that would go to a replica should use the primary."""
+    return _read_alias.get() is not None and bool(cache.get(_pin_key('voter', voter_id)))
+
+
+async def avoter_pinned(voter_id):
+    return _read_alias.get() is not None and bool(await cache.aget(_pin_key('voter', voter_id)))
+
+
+def _safe(request):
+    return request.method in ('GET', 'HEAD', 'OPTIONS')
+
+
+def _write_pins(request, response):
+    # the caller's next reads see what this request wrote
+    if _safe(request) or response.status_code >= 400:
+        return {}
+    return dict.fromkeys(request_pin_keys(request), 1)
+
+
+class ReplicaRoutingMiddleware:
+    """Lets safe, unpinned requests read from a replica; pins the caller after a write."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+        alias = None
+        if _safe(request):
+            keys = request_pin_keys(request)
+            if not (keys and cache.get_many(keys)):
+                alias = random.choice(replicas())
+        token = _read_alias.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        pins = _write_pins(request, response)
+        if pins:
+            cache.set_many(pins, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+        alias = None
+        if _safe(request):
+            keys = request_pin_keys(request)
+            if not (keys and await cache.aget_many(keys)):
+                alias = random.choice(replicas())
+        token = _read_alias.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        pins = _write_pins(request, response)
+        if pins:
+            await cache.aset_many(pins, timeout=settings.REPLICA_PIN_SECONDS)
+        return response
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if not replicas():
+            return None
+        alias = _read_alias.get()
+        if alias is None or model._meta.app_label in PRIMARY_APPS:
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            # a transaction reads its own writes
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS if replicas() else None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        databases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema through replication
+        return False if db in replicas() else None
@@ -7,6 +7,7 @@ from .config import (
     DEBUG,
     DJANGO_ALLOWED_HOSTS,
     DATABASE_URL,
+    DATABASE_REPLICA_URLS,
     PG_DB,
     PG_USER,
     PG_PASSWORD,
@@ -14,6 +15,10 @@ from .config import (
     PG_PORT,
     REDIS_URL,
     ALLOW_ANONYMOUS_VOTE,
+    VOTE_WRITE_BEHIND,
+    METRICS_TOKEN,
+    ASYNC_VIEWS,
+    NUM_PROXIES,
 )
 
 
@@ -44,18 +49,26 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
+    # outermost, so latency covers the whole stack
+    'polls.metrics.MetricsMiddleware',
+    # picks the database for reads (polls_backend/db_router.py); a no-op without replicas
+    'polls_backend.db_router.ReplicaRoutingMiddleware',
+    # polls_backend.middleware: the stock Django / WhiteNoise classes, with their in-memory
+    # hooks run inline instead of in a thread under the ASGI server
+    'polls_backend.middleware.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
-    "whitenoise.middleware.WhiteNoiseMiddleware",
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'django.middleware.common.CommonMiddleware',
+    'polls_backend.middleware.WhiteNoiseMiddleware',
+    'polls_backend.middleware.SessionMiddleware',
+    'polls_backend.middleware.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'polls_backend.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'polls_backend.middleware.XFrameOptionsMiddleware',
 ]
 
-ROOT_URLCONF = 'polls_backend.urls'
+# the ASGI entry point (polls_backend/asgi.py) turns ASYNC_VIEWS on: the poll read
+# endpoints are then served by native async views
+ROOT_URLCONF = 'polls_backend.asgi_urls' if ASYNC_VIEWS else 'polls_backend.urls'
 
 TEMPLATES = [
     {
@@ -99,6 +112,20 @@ else:
         }
     }
 
+# Read replicas: each DATABASE_REPLICA_URLS entry becomes an alias replica_0, replica_1, ...
+# ReplicaRouter sends safe requests' reads there and everything else to 'default'.
+# Needs SHARED_CACHE: the read-your-writes pins live in the cache.
+DATABASE_REPLICAS = []
+for index, url in enumerate(DATABASE_REPLICA_URLS):
+    alias = f'replica_{index}'
+    DATABASES[alias] = dj_database_url.parse(url, conn_max_age=600)
+    # the test run reads and writes the primary's test database
+    DATABASES[alias]['TEST'] = {'MIRROR': 'default'}
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['polls_backend.db_router.ReplicaRouter']
+# how long a caller reads from the primary after a write; keep it above the replica lag
+REPLICA_PIN_SECONDS = 5
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -134,7 +161,8 @@ AUTH_USER_MODEL = 'users.User'
 REST_FRAMEWORK = {}
 REST_FRAMEWORK['DEFAULT_SCHEMA_CLASS'] = 'drf_spectacular.openapi.AutoSchema'
 REST_FRAMEWORK['DEFAULT_AUTHENTICATION_CLASSES'] = [
-    'rest_framework_simplejwt.authentication.JWTAuthentication',
+    # simplejwt's JWTAuthentication with the user resolved from a cached snapshot
+    'users.authentication.CachedJWTAuthentication',
     'rest_framework.authentication.SessionAuthentication',
 ]
 REST_FRAMEWORK['DEFAULT_PERMISSION_CLASSES'] = [
@@ -142,6 +170,14 @@ REST_FRAMEWORK['DEFAULT_PERMISSION_CLASSES'] = [
 ]
 REST_FRAMEWORK['DEFAULT_PAGINATION_CLASS'] = 'rest_framework.pagination.PageNumberPagination'
 REST_FRAMEWORK['PAGE_SIZE'] = 10
+REST_FRAMEWORK['DEFAULT_RENDERER_CLASSES'] = [
+    'polls.metrics.TimedJSONRenderer',
+    'rest_framework.renderers.BrowsableAPIRenderer',
+]
+# reverse proxies in front of the app; the client address used by the throttles is
+# X-Forwarded-For's entry that many hops back, or REMOTE_ADDR with 0 (the default).
+# Left unset, DRF would trust whatever X-Forwarded-For the client sends.
+REST_FRAMEWORK['NUM_PROXIES'] = NUM_PROXIES
 
 # Allow anonymous voting via env var (set to '1' to allow unauthenticated votes)
 ALLOW_ANONYMOUS_VOTE = ALLOW_ANONYMOUS_VOTE
@@ -167,7 +203,8 @@ SPECTACULAR_SETTINGS = {
 if REDIS_URL:
     CACHES = {
         'default': {
-            'BACKEND': 'django_redis.cache.RedisCache',
+            # django_redis.cache.RedisCache plus hit/miss counters for /api/metrics
+            'BACKEND': 'polls.metrics.InstrumentedRedisCache',
             'LOCATION': REDIS_URL if '://' in REDIS_URL else f'redis://{REDIS_URL}:6379/1',
             'OPTIONS': {
                 'CLIENT_CLASS': 'django_redis.client.DefaultClient',
@@ -178,7 +215,51 @@ else:
     # fallback simple in-memory cache for development/testing
     CACHES = {
         'default': {
-            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'BACKEND': 'polls.metrics.InstrumentedLocMemCache',
             'LOCATION': 'unique-snowflake',
         }
     }
+
+# True when every process (web workers and the management-command workers) sees the
+# same cache. locmem is per process, so state the workers have to agree on (vote
+# tickets, ETag versions, the voter filter, buffered view counts) is only kept in the
+# cache with Redis; a single-process test run turns it on where it exercises them.
+SHARED_CACHE = bool(REDIS_URL)
+
+# Real-time results stream (GET /api/polls/<id>/results/stream/, ASGI only). With Redis
+# configured, votes are fanned out to every worker over pub/sub; otherwise in-process.
+POLLS_PUBSUB_URL = CACHES['default']['LOCATION'] if REDIS_URL else None
+POLLS_PUBSUB_BACKEND = 'polls.realtime.RedisPubSub' if REDIS_URL else 'polls.realtime.LocalPubSub'
+# a burst of votes on one poll becomes at most one push per interval
+POLLS_STREAM_COALESCE_SECONDS = 0.25
+
+# Write-behind voting: POST /api/votes/ validates, enqueues and answers 202 with a
+# ticket; `python manage.py drain_vote_queue` commits queued votes in batches. Needs
+# SHARED_CACHE (pending votes and ticket outcomes live in the cache).
+VOTE_WRITE_BEHIND = VOTE_WRITE_BEHIND
+VOTE_QUEUE_URL = CACHES['default']['LOCATION'] if REDIS_URL else None
+VOTE_QUEUE_BACKEND = 'polls.vote_queue.RedisStreamVoteQueue' if REDIS_URL else 'polls.vote_queue.SQLiteVoteQueue'
+VOTE_QUEUE_PATH = BASE_DIR / 'vote_queue.sqlite3'
+
+# "Has this voter voted?" filter in front of Vote lookups: an exact Redis set per poll.
+# It must see every worker's votes, so without Redis it is off (every lookup queries
+# Vote). Rebuild with `python manage.py rebuild_voter_filter`.
+POLLS_VOTER_FILTER_URL = CACHES['default']['LOCATION'] if REDIS_URL else None
+POLLS_VOTER_FILTER_BACKEND = (
+    'polls.voter_filter.RedisSetVoterFilter' if REDIS_URL else 'polls.voter_filter.NullVoterFilter'
+)
+POLLS_VOTER_FILTER_CAPACITY = 100_000
+POLLS_VOTER_FILTER_ERROR_RATE = 0.01
+
+# GET /api/metrics (Prometheus text format); when set, scrapers must send
+# `Authorization: Bearer <METRICS_TOKEN>`
+METRICS_TOKEN = METRICS_TOKEN
+
+# Per-endpoint rate limits (polls_backend/throttling.py), counted in the default cache
+# and checked before any database work. Keys: 'ip' (client address), 'user' (the
+# authenticated user, or the email being logged into) and 'voter' (the voter id).
+# Rates use DRF's format ('30/min', '100/10s'); None or a missing key disables one.
+THROTTLE_RATES = {
+    'vote': {'ip': '300/min', 'voter': '30/min'},
+    'login': {'ip': '20/min', 'user': '5/min'},
+}
@@ -0,0 +1,116 @@
+"""Cache-backed rate limits for the vote and login endpoints.
+
+A view opts in with `throttle_classes = [CacheRateThrottle]` and a `throttle_scope`;
+settings.THROTTLE_RATES[scope] maps each key kind ('ip', 'user', 'voter') to a DRF
+style rate such as '30/min'. Each limit is a sliding window approximated from two
+fixed-window counters: the current window's count plus the previous one's, weighted by
+how much of it still overlaps the window. Counters move with cache.add + cache.incr,
+which are atomic, so concurrent requests sharing a cache can't both slip under a limit
+the way read-modify-write history lists (DRF's SimpleRateThrottle) can. With Redis
+that covers the whole server; on the locmem fallback each worker process keeps its own
+counters, so the effective limit is the rate times the number of workers.
+
+The 'ip' key is DRF's get_ident: REMOTE_ADDR, or X-Forwarded-For only as far back as
+REST_FRAMEWORK['NUM_PROXIES'] trusted proxies (settings.NUM_PROXIES), so a client can't
+pick a fresh address per request.
+
+Throttles run before the view body, so a rejected request costs a few cache round trips
+and no database work; DRF answers 429 with `Retry-After`.
+"""
+import math
+import time
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+DURATIONS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600, 'd': 86400, 'day': 86400}
+
+
+def parse_rate(rate):
+    """'30/min' -> (30, 60); also accepts a multiplier such as '100/10s'."""
+    count, _, period = rate.partition('/')
+    digits = period.rstrip('abcdefghijklmnopqrstuvwxyz')
+    unit = period[len(digits):]
+    if unit not in DURATIONS:
+        raise ValueError(f'invalid throttle rate: {rate!r}')
+    return int(count), int(digits or 1) * DURATIONS[unit]
+
+
+def _counter_key(scope, kind, ident, window, index):
+    return f"throttle:{scope}:{kind}:{ident}:{window}:{index}"
+
+
+def hit(scope, kind, ident, limit, window, now=None):
+    """Count one request; return 0 if it is within the limit, else seconds to wait."""
+    now = time.time() if now is None else now
+    index, elapsed = divmod(now, window)
+    current_key = _counter_key(scope, kind, ident, window, int(index))
+    # two windows' worth, so the previous counter is still there to weigh in
+    cache.add(current_key, 0, timeout=window * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        # evicted between add and incr; start over rather than fail the request
+        cache.set(current_key, 1, timeout=window * 2)
+        current = 1
+    previous = cache.get(_counter_key(scope, kind, ident, window, int(index) - 1), 0)
+    overlap = 1 - elapsed / window
+    if previous * overlap + current <= limit:
+        return 0
+    if current > limit:
+        # over on this window alone; it clears when the next one starts
+        return math.ceil(window - elapsed)
+    # the previous window's weight has to fade until the estimate fits
+    return max(1, math.ceil(window * (1 - (limit - current) / previous) - elapsed))
+
+
+def _body_field(request, name):
+    # a JSON list (or any non-object) body has no fields; the view rejects it with a 400
+    return request.data.get(name) if isinstance(request.data, dict) else None
+
+
+def _voter_ident(request):
+    if request.user and request.user.is_authenticated:
+        return str(request.user.pk)
+    return _body_field(request, 'userId') or request.query_params.get('voter_id')
+
+
+def _user_ident(request):
+    if request.user and request.user.is_authenticated:
+        return str(request.user.pk)
+    # login: the account being tried, so spreading guesses over IPs doesn't help
+    username = _body_field(request, get_user_model().USERNAME_FIELD)
+    return username.strip().lower() if isinstance(username, str) and username.strip() else None
+
+
+class CacheRateThrottle(BaseThrottle):
+    def __init__(self):
+        self.wait_seconds = None
+
+    def get_idents(self, request):
+        return {
+            'ip': lambda: self.get_ident(request),
+            'user': lambda: _user_ident(request),
+            'voter': lambda: _voter_ident(request),
+        }
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rates = getattr(settings, 'THROTTLE_RATES', {}).get(scope) or {}
+        idents = self.get_idents(request)
+        for kind, rate in rates.items():
+            if not rate:
+                continue
+            ident = idents[kind]()
+            if not ident:
+                continue
+            limit, window = parse_rate(rate)
+            wait = hit(scope, kind, ident, limit, window)
+            if wait:
+                self.wait_seconds = wait
+                return False
+        return True
+
+    def wait(self):
+        return self.wait_seconds
@@ -2,4 +2,8 @@
 set -euo pipefail
 
 python python manage.py makemigrations && python manage.py migrate --noinput
-exec gunicorn polls_backend.wsgi:application --bind 0.0.0.0:${PORT:-8000} --workers 3 --log-level=info
\ No newline at end of file
+# SERVER=asgi: uvicorn with the async read views (see README, "Serving with uvicorn")
+if [ "${SERVER:-wsgi}" = "asgi" ]; then
+    exec uvicorn polls_backend.asgi:application --host 0.0.0.0 --port ${PORT:-8000} --workers ${WEB_WORKERS:-3} --no-access-log
+fi
+exec gunicorn polls_backend.wsgi:application --bind 0.0.0.0:${PORT:-8000} --workers ${WEB_WORKERS:-3} --log-level=info
@@ -0,0 +1,62 @@
+"""Serializer overhead per 1,000 rows: DRF ModelSerializers vs the `.values()` fast path.
+
+Not collected by the default test run; invoke explicitly:
+
+    python manage.py test tests.bench_serializers
+
+Set BENCH_ROWS to change the number of polls (default 1000).
+"""
+import json
+import os
+import time
+from django.test import TestCase
+from polls.fast_serializers import list_rows, poll_list_data, poll_detail_data
+from polls.models import Poll, Option
+from polls.serializers import PollDetailSerializer, PollListSerializer
+
+ROWS = int(os.environ.get('BENCH_ROWS', '1000'))
+REPEAT = 5
+
+
+def _best(fn):
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class SerializerBenchmark(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        polls = Poll.objects.bulk_create([Poll(title=f'Poll {i}', description='bench') for i in range(ROWS)])
+        Option.objects.bulk_create([Option(poll=p, text=t, order=j) for p in polls for j, t in enumerate('ABCD')])
+        cls.ids = [p.id for p in polls[:100]]
+
+    def test_compare(self):
+        queryset = Poll.objects.order_by('-created_at', 'id')
+        # query + serialization, as the endpoint does it
+        list_drf = _best(lambda: PollListSerializer(list(queryset.all()), many=True).data)
+        list_fast = _best(lambda: poll_list_data(list(list_rows(queryset))))
+        # serialization alone, on rows that are already loaded
+        instances, rows = list(queryset), list(list_rows(queryset))
+        map_drf = _best(lambda: PollListSerializer(instances, many=True).data)
+        map_fast = _best(lambda: poll_list_data(rows))
+
+        detail_qs = Poll.objects.select_related('created_by').prefetch_related('options')
+        detail_drf = _best(lambda: [PollDetailSerializer(detail_qs.get(pk=pk)).data for pk in self.ids])
+        detail_fast = _best(lambda: [poll_detail_data(pk) for pk in self.ids])
+
+        per_1000 = 1000 / ROWS
+        report = {
+            'rows': ROWS,
+            'list_ms_per_1000_rows': {'drf': round(list_drf * 1000 * per_1000, 2), 'fast': round(list_fast * 1000 * per_1000, 2)},
+            'list_speedup': round(list_drf / list_fast, 2),
+            'serialize_ms_per_1000_rows': {'drf': round(map_drf * 1000 * per_1000, 2), 'fast': round(map_fast * 1000 * per_1000, 2)},
+            'serialize_speedup': round(map_drf / map_fast, 2),
+            'detail_ms_per_1000_polls': {'drf': round(detail_drf * 10000, 2), 'fast': round(detail_fast * 10000, 2)},
+            'detail_speedup': round(detail_drf / detail_fast, 2),
+        }
+        print(json.dumps(report, indent=2))
+        self.assertLess(list_fast, list_drf)
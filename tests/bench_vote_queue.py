@@ -0,0 +1,63 @@
+"""Sustained vote throughput: synchronous path vs write-behind queue.
+
+Not collected by the default test run; invoke explicitly:
+
+    python manage.py test tests.bench_vote_queue
+
+Set BENCH_VOTES to change the number of votes per path (default 1000).
+"""
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from polls import vote_queue
+from polls.models import Poll, Option, Vote
+
+VOTES = int(os.environ.get('BENCH_VOTES', '1000'))
+
+
+# every vote comes from the same client address; measure the endpoint, not the rate limit
+@override_settings(ALLOW_ANONYMOUS_VOTE=True, THROTTLE_RATES={})
+class VoteThroughputBenchmark(TransactionTestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse('vote-create')
+        self.poll = Poll.objects.create(title='Bench Poll')
+        self.options = [Option.objects.create(poll=self.poll, text=t) for t in 'ABCD']
+
+    def _post_votes(self, prefix):
+        start = time.perf_counter()
+        for i in range(VOTES):
+            option = self.options[i % len(self.options)]
+            r = self.client.post(
+                self.url, {'pollId': str(self.poll.id), 'optionId': str(option.id), 'userId': f'{prefix}{i}'}, format='json'
+            )
+            assert r.status_code in (201, 202), r.status_code
+        return time.perf_counter() - start
+
+    def test_compare_sync_and_write_behind(self):
+        sync_seconds = self._post_votes('sync-')
+
+        with tempfile.TemporaryDirectory() as tmp:
+            queue = vote_queue.SQLiteVoteQueue(Path(tmp) / 'queue.sqlite3')
+            with mock.patch.object(vote_queue, '_queue', queue), override_settings(VOTE_WRITE_BEHIND=True):
+                enqueue_seconds = self._post_votes('queued-')
+                start = time.perf_counter()
+                while vote_queue.drain_batch(queue, batch_size=500):
+                    pass
+                drain_seconds = time.perf_counter() - start
+
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 2 * VOTES)
+        report = {
+            'votes': VOTES,
+            'sync_votes_per_sec': round(VOTES / sync_seconds, 1),
+            'write_behind_request_votes_per_sec': round(VOTES / enqueue_seconds, 1),
+            'write_behind_drain_votes_per_sec': round(VOTES / drain_seconds, 1),
+            'write_behind_end_to_end_votes_per_sec': round(VOTES / (enqueue_seconds + drain_seconds), 1),
+        }
+        print('\n' + json.dumps(report, indent=2))
@@ -0,0 +1,111 @@
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import resolve, reverse
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from polls import async_views
+from polls.models import Poll, Option, Vote
+from users.models import User
+
+ASGI_URLS = 'polls_backend.asgi_urls'
+
+
+@override_settings(SHARED_CACHE=True)
+class AsyncReadViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='a@example.com', name='Alice', password='strongpass')
+        self.auth = {'AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+        self.polls = []
+        for i in range(12):
+            poll = Poll.objects.create(title=f'Poll {i}', created_by=self.user if i % 2 else None)
+            options = [Option.objects.create(poll=poll, text=f'opt {j}', order=j) for j in range(3)]
+            self.polls.append((poll, options))
+        self.poll, self.options = self.polls[0]
+        Vote.objects.create(poll=self.poll, option=self.options[1], voter_id='voter-1')
+        Vote.objects.create(poll=self.poll, option=self.options[2], voter_id=str(self.user.id))
+
+    def test_asgi_urlconf_routes_reads_to_async_views(self):
+        self.assertIs(resolve('/api/polls/', urlconf=ASGI_URLS).func, async_views.poll_list)
+        self.assertIs(resolve(f'/api/polls/{self.poll.id}/', urlconf=ASGI_URLS).func, async_views.poll_detail)
+        self.assertIs(resolve(f'/api/polls/{self.poll.id}/results/', urlconf=ASGI_URLS).func, async_views.poll_results)
+        # same URLs either way
+        self.assertEqual(reverse('poll-detail', kwargs={'pk': self.poll.id}, urlconf=ASGI_URLS), f'/api/polls/{self.poll.id}/')
+
+    async def _get(self, url, data=None, headers=None):
+        with override_settings(ROOT_URLCONF=ASGI_URLS):
+            return await self.async_client.get(url, data or {}, headers=headers)
+
+    def _sync_get(self, url, data=None, headers=None):
+        cache.clear()
+        resp = self.client.get(url, data or {}, headers=headers)
+        cache.clear()
+        return resp
+
+    async def test_payloads_match_the_drf_views(self):
+        detail = reverse('poll-detail', kwargs={'pk': self.poll.id})
+        results = reverse('poll-results', kwargs={'pk': self.poll.id})
+        cases = [
+            (reverse('poll-list-create'), {}, {}),
+            (detail, {'voter_id': 'voter-1'}, {}),
+            (detail, {}, self.auth),
+            (results, {'voter_id': 'voter-1'}, {}),
+            (results, {}, self.auth),
+            (results, {}, {}),
+        ]
+        for url, params, headers in cases:
+            expected = await sync_to_async(self._sync_get)(url, params, headers)
+            resp = await self._get(url, params, headers)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertEqual(resp['Content-Type'], 'application/json')
+            self.assertEqual(resp.json(), expected.json(), url)
+
+    async def test_has_voted_from_token(self):
+        resp = await self._get(reverse('poll-results', kwargs={'pk': self.poll.id}), headers=self.auth)
+        poll = resp.json()['poll']
+        self.assertTrue(poll['hasVoted'])
+        self.assertEqual([o['id'] for o in poll['options'] if o['voted']], [str(self.options[2].id)])
+
+    async def test_has_voted_from_session(self):
+        await self.async_client.aforce_login(self.user)
+        resp = await self._get(reverse('poll-detail', kwargs={'pk': self.poll.id}))
+        self.assertTrue(resp.json()['poll']['hasVoted'])
+
+    async def test_cursor_pages_cover_every_poll(self):
+        seen, url, params = [], reverse('poll-list-create'), {}
+        while url:
+            body = (await self._get(url, params)).json()
+            seen.extend(p['id'] for p in body['polls'])
+            url, params = body['next'], {}
+        self.assertEqual(sorted(seen), sorted(str(poll.id) for poll, _ in self.polls))
+
+    async def test_conditional_get(self):
+        url = reverse('poll-results', kwargs={'pk': self.poll.id})
+        first = await self._get(url)
+        resp = await self._get(url, headers={'If-None-Match': first['ETag']})
+        self.assertEqual(resp.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    async def test_missing_poll(self):
+        resp = await self._get(reverse('poll-detail', kwargs={'pk': '00000000-0000-0000-0000-000000000000'}))
+        self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(resp.json(), {'detail': 'Not found.'})
+
+    async def test_everything_else_goes_through_drf(self):
+        with override_settings(ROOT_URLCONF=ASGI_URLS):
+            # invalid token: DRF's 401
+            resp = await self.async_client.get(reverse('poll-list-create'), headers={'AUTHORIZATION': 'Bearer nope'})
+            self.assertEqual(resp.status_code, status.HTTP_401_UNAUTHORIZED)
+            # writes
+            resp = await self.async_client.post(
+                reverse('poll-list-create'), {'question': 'New?', 'options': ['a', 'b']},
+                content_type='application/json', headers=self.auth,
+            )
+            self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+            # page-number mode and the browsable API
+            resp = await self.async_client.get(reverse('poll-list-create'), {'page': 1})
+            self.assertEqual(resp.json()['count'], 13)
+            resp = await self.async_client.get(reverse('poll-detail', kwargs={'pk': self.poll.id}), headers={'ACCEPT': 'text/html'})
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            self.assertIn('text/html', resp['Content-Type'])
+
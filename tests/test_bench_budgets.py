@@ -0,0 +1,30 @@
+"""Fail when an endpoint goes over its stored query-count or latency budget.
+
+Budgets live in tests/bench_budgets.json. Query budgets are exact upper bounds; p95
+latency budgets are deliberately loose (slow CI machines) and can be scaled with
+BENCH_LATENCY_SLACK. `python manage.py bench` produces the full report.
+"""
+import json
+import os
+from pathlib import Path
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+from polls.benchmark import ENDPOINTS, seed_dataset, run_benchmark
+
+BUDGETS = json.loads((Path(__file__).parent / 'bench_budgets.json').read_text())
+LATENCY_SLACK = float(os.environ.get('BENCH_LATENCY_SLACK', '1'))
+
+
+class EndpointBudgetTests(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cache.clear()
+        cls.polls = seed_dataset(polls=20, options=4, votes=1000, hot_polls=3, seed=1)
+
+    def test_endpoints_stay_within_budget(self):
+        report = run_benchmark(self.client, self.polls, requests=40, hot_polls=3, seed=1)
+        for name in ENDPOINTS:
+            with self.subTest(endpoint=name):
+                stats, budget = report[name], BUDGETS[name]
+                self.assertLessEqual(stats['queries_max'], budget['queries'], f'{name}: {stats}')
+                self.assertLessEqual(stats['p95_ms'], budget['p95_ms'] * LATENCY_SLACK, f'{name}: {stats}')
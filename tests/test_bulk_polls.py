@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from polls.models import Poll, Option
+
+User = get_user_model()
+
+
+class BulkPollCreateTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='pipeline@example.com', name='Pipeline', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('poll-bulk-create')
+
+    def _payload(self, prefix, n, n_options=3):
+        return [{'question': f'{prefix} {i}', 'options': [f'opt {j}' for j in range(n_options)]} for i in range(n)]
+
+    def _post(self, payload):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(self.url, payload, format='json')
+        return response, len(ctx.captured_queries)
+
+    def test_creates_polls_and_options(self):
+        response, _ = self._post(self._payload('Q', 2))
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['created'], 2)
+        polls = Poll.objects.filter(id__in=response.data['ids'])
+        self.assertEqual(polls.count(), 2)
+        self.assertTrue(all(p.created_by_id == self.user.id for p in polls))
+        first = Poll.objects.get(id=response.data['ids'][0])
+        self.assertEqual(list(first.options.values_list('text', flat=True)), ['opt 0', 'opt 1', 'opt 2'])
+
+    def test_statement_count_is_constant(self):
+        _, small = self._post(self._payload('small', 2, n_options=2))
+        # sized to fit one INSERT batch on every backend (sqlite caps bound parameters)
+        _, large = self._post(self._payload('large', 20, n_options=5))
+        self.assertEqual(small, large)
+
+    def test_invalid_item_rejects_the_whole_batch(self):
+        payload = self._payload('Q', 2) + [{'options': ['a']}]
+        response, _ = self._post(payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Poll.objects.exists())
+
+    def test_duplicate_options_are_a_validation_error(self):
+        payload = self._payload('Q', 2)
+        payload[1]['options'] = ['Yes', ' Yes ', 'No']
+        response, _ = self._post(payload)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        # errors line up with the items, so the bad poll is the second one
+        self.assertEqual(response.data[0], {})
+        self.assertIn('Yes', str(response.data[1]['options'][0]))
+        self.assertFalse(Poll.objects.exists())
+
+    def test_options_differing_in_case_are_distinct(self):
+        payload = self._payload('Q', 1)
+        payload[0]['options'] = ['Yes', 'yes']
+        response, _ = self._post(payload)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        response, _ = self._post(self._payload('Q', 1))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_single_create_inserts_options_at_once(self):
+        def create(n_options):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(
+                    reverse('poll-list-create'), {'question': 'Q', 'options': [f'o{i}' for i in range(n_options)]}, format='json'
+                )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(ctx.captured_queries)
+
+        self.assertEqual(create(2), create(12))
+        self.assertEqual(Option.objects.count(), 14)
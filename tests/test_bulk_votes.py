@@ -0,0 +1,69 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from users.models import User
+from polls.models import Poll, Option, Vote
+
+
+class BulkVoteTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('vote-bulk-create')
+        self.staff = User.objects.create_user(email='kiosk@example.com', name='Kiosk', password='pw', is_staff=True)
+        self.client.force_authenticate(user=self.staff)
+        self.poll = Poll.objects.create(title='Bulk Poll')
+        self.a = Option.objects.create(poll=self.poll, text='A')
+        self.b = Option.objects.create(poll=self.poll, text='B')
+        self.other = Poll.objects.create(title='Other')
+        self.other_opt = Option.objects.create(poll=self.other, text='X')
+        self.expired = Poll.objects.create(title='Old', expires_at=timezone.now() - timezone.timedelta(days=1))
+        self.expired_opt = Option.objects.create(poll=self.expired, text='Y')
+        Vote.objects.create(poll=self.poll, option=self.a, voter_id='already')
+
+    def _record(self, option, voter, poll=None):
+        return {'pollId': str((poll or option.poll).id), 'optionId': str(option.id), 'userId': voter}
+
+    def test_reports_outcome_per_record(self):
+        records = [
+            self._record(self.a, 'u1'),
+            self._record(self.b, 'u2'),
+            self._record(self.a, 'already'),
+            self._record(self.b, 'u1'),  # same voter twice in one batch
+            self._record(self.other_opt, 'u3', poll=self.poll),
+            self._record(self.expired_opt, 'u4'),
+            {'pollId': 'nope', 'optionId': str(self.a.id), 'userId': 'u5'},
+            {'pollId': str(self.poll.id), 'optionId': str(self.a.id)},
+        ]
+        r = self.client.post(self.url, records, format='json')
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.data['created'], 2)
+        statuses = [row['status'] for row in r.data['results']]
+        self.assertEqual(statuses, ['created', 'created', 'duplicate', 'duplicate', 'invalid', 'invalid', 'invalid', 'invalid'])
+        self.assertEqual(r.data['results'][4]['error'], 'Option does not belong to the poll')
+        self.assertEqual(r.data['results'][5]['error'], 'Poll has expired')
+
+        self.poll.refresh_from_db()
+        self.a.refresh_from_db()
+        self.assertEqual(self.poll.total_votes, 3)
+        self.assertEqual(self.a.vote_count, 2)
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 3)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        def run(prefix, n):
+            records = [self._record(self.a if i % 2 else self.b, f'{prefix}{i}') for i in range(n)]
+            with CaptureQueriesContext(connection) as ctx:
+                r = self.client.post(self.url, {'votes': records}, format='json')
+            self.assertEqual(r.data['created'], n)
+            return len(ctx.captured_queries)
+
+        # the first batch of the minute also creates the rollup rows
+        run('warm-', 2)
+        # both fit in one INSERT batch on every backend (sqlite caps bound parameters)
+        self.assertEqual(run('small-', 4), run('large-', 150))
+
+    def test_requires_staff(self):
+        self.client.force_authenticate(user=User.objects.create_user(email='v@example.com', name='V', password='pw'))
+        r = self.client.post(self.url, [self._record(self.a, 'u1')], format='json')
+        self.assertEqual(r.status_code, status.HTTP_403_FORBIDDEN)
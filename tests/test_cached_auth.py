@@ -0,0 +1,100 @@
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from users import authentication
+from users.models import User
+from polls.models import Poll, Option, Vote
+
+
+@override_settings(SHARED_CACHE=True)
+class CachedJWTAuthTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email='a@example.com', name='Alice', password='strongpass')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def _me(self):
+        return self.client.get(reverse('me'), **self.auth)
+
+    def test_snapshot_serves_user_without_query(self):
+        self.assertEqual(self._me().status_code, status.HTTP_200_OK)
+        with self.assertNumQueries(0):
+            resp = self._me()
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual(resp.data['email'], 'a@example.com')
+        self.assertEqual(resp.data['name'], 'Alice')
+
+    def test_profile_change_is_visible_immediately(self):
+        self._me()
+        self.user.name = 'Alicia'
+        self.user.save()
+        self.assertEqual(self._me().data['name'], 'Alicia')
+
+    def test_deactivated_user_is_rejected(self):
+        self._me()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self._me().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_deleted_user_is_rejected(self):
+        self._me()
+        self.user.delete()
+        self.assertEqual(self._me().status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_password_change_drops_snapshot_and_keeps_hash(self):
+        self._me()
+        self.user.set_password('newpass123')
+        self.user.save()
+        with self.assertNumQueries(1):
+            self._me()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('newpass123'))
+
+    def test_revoked_token_after_password_change(self):
+        # simplejwt modules hold on to the settings object they imported
+        with mock.patch.object(authentication.api_settings, 'CHECK_REVOKE_TOKEN', True):
+            auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+            self.assertEqual(self.client.get(reverse('me'), **auth).status_code, status.HTTP_200_OK)
+            self.assertEqual(self.client.get(reverse('me'), **auth).status_code, status.HTTP_200_OK)
+            self.user.set_password('newpass123')
+            self.user.save()
+            self.assertEqual(self.client.get(reverse('me'), **auth).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_vote_and_has_voted_make_no_auth_query(self):
+        poll = Poll.objects.create(title='Q?')
+        options = [Option.objects.create(poll=poll, text=t, order=i) for i, t in enumerate('xy')]
+        self._me()
+        user_queries = []
+
+        def capture(execute, sql, params, many, context):
+            if 'users_user' in sql:
+                user_queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(capture):
+            resp = self.client.post(
+                reverse('vote-create'), {'pollId': str(poll.id), 'optionId': str(options[0].id)}, format='json', **self.auth
+            )
+            self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+            resp = self.client.get(reverse('poll-results', kwargs={'pk': poll.id}), **self.auth)
+            self.assertTrue(resp.json()['poll']['hasVoted'])
+        self.assertEqual(user_queries, [])
+        self.assertTrue(Vote.objects.filter(poll=poll, voter_id=str(self.user.id)).exists())
+
+
+class PerProcessCacheAuthTests(APITestCase):
+    def test_user_is_loaded_per_request_without_shared_cache(self):
+        cache.clear()
+        user = User.objects.create_user(email='a@example.com', name='Alice', password='strongpass')
+        auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+        self.assertEqual(self.client.get(reverse('me'), **auth).status_code, status.HTTP_200_OK)
+        # nothing another worker couldn't invalidate
+        self.assertIsNone(cache.get(authentication.snapshot_key(user.pk)))
+        # deactivated by another worker: rejected on the very next request
+        User.objects.filter(pk=user.pk).update(is_active=False)
+        self.assertEqual(self.client.get(reverse('me'), **auth).status_code, status.HTTP_401_UNAUTHORIZED)
@@ -0,0 +1,132 @@
+import tempfile
+from pathlib import Path
+from django.core.cache import cache
+from django.db import connections, router
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from polls.models import Poll, Option, Vote
+from polls_backend import db_router
+from polls_backend.db_router import ReplicaRouter, use_primary
+from users.models import User
+
+REPLICA = 'replica_test'
+
+
+# a second SQLite file standing in for the replica, registered at import so the test
+# runner creates and migrates it like any other test database; nothing replicates into
+# it, so whatever is read from it is as stale as a replica that never caught up
+_tmp = tempfile.mkdtemp()
+connections.settings[REPLICA] = dict(
+    connections.settings['default'],
+    TEST=dict(connections.settings['default']['TEST'], NAME=str(Path(_tmp) / 'replica.sqlite3')),
+)
+
+
+class ReplicaConfigurationTests(SimpleTestCase):
+    @override_settings(DATABASE_REPLICAS=[REPLICA], SHARED_CACHE=False)
+    def test_refuses_per_process_cache(self):
+        # one worker's pins would be invisible to the others
+        with self.assertRaises(ImproperlyConfigured):
+            db_router.check_configuration()
+
+    @override_settings(DATABASE_REPLICAS=[REPLICA], SHARED_CACHE=True)
+    def test_accepts_shared_cache(self):
+        db_router.check_configuration()
+
+    @override_settings(DATABASE_REPLICAS=[], SHARED_CACHE=False)
+    def test_no_replicas_no_requirement(self):
+        db_router.check_configuration()
+
+
+class ReplicaRoutingTests(APITransactionTestCase):
+    databases = {'default', REPLICA}
+
+    def setUp(self):
+        cache.clear()
+        self.enterContext(override_settings(DATABASE_REPLICAS=[REPLICA], SHARED_CACHE=True))
+        self.user = User.objects.create_user(email='a@example.com', name='Alice', password='strongpass')
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        # the same poll on both databases, as after replication
+        self.poll = Poll.objects.create(title='Replicated')
+        self.options = [Option.objects.create(poll=self.poll, text=text) for text in ('a', 'b')]
+        for obj in [self.poll, *self.options]:
+            obj.save(using=REPLICA)
+
+    def test_reads_from_replica_writes_to_primary(self):
+        replica_only = Poll.objects.using(REPLICA).create(title='Replica only')
+        resp = self.client.get(reverse('poll-list-create'))
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        self.assertEqual({p['id'] for p in resp.json()['polls']}, {str(self.poll.id), str(replica_only.id)})
+
+        resp = self.client.post(reverse('poll-list-create'), {'question': 'New?', 'options': ['x', 'y']}, format='json')
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Poll.objects.using('default').filter(title='New?').exists())
+        self.assertFalse(Poll.objects.using(REPLICA).filter(title='New?').exists())
+
+    def test_voter_reads_primary_after_voting(self):
+        resp = self.client.post(
+            reverse('vote-create'), {'pollId': str(self.poll.id), 'optionId': str(self.options[1].id)}, format='json'
+        )
+        self.assertEqual(resp.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Vote.objects.using(REPLICA).exists())
+
+        resp = self.client.get(reverse('poll-results', kwargs={'pk': self.poll.id}))
+        self.assertTrue(resp.json()['poll']['hasVoted'])
+        # another token for the same user (a refresh, a second device) carries no request
+        # pin, but the user's voter pin still sends the hasVoted lookup to the primary
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}')
+        resp = self.client.get(reverse('poll-results', kwargs={'pk': self.poll.id}))
+        self.assertTrue(resp.json()['poll']['hasVoted'])
+        # as does asking as the voter
+        resp = self.client.get(reverse('poll-results', kwargs={'pk': self.poll.id}), {'voter_id': str(self.user.id)})
+        self.assertTrue(resp.json()['poll']['hasVoted'])
+        # results counts come from the primary-seeded cache either way
+        self.assertEqual(resp.json()['poll']['totalVotes'], 1)
+
+    @override_settings(ALLOW_ANONYMOUS_VOTE=True)
+    def test_anonymous_voter_pinned_by_voter_id(self):
+        self.client.credentials()
+        payload = {'pollId': str(self.poll.id), 'optionId': str(self.options[0].id), 'userId': 'anon-1'}
+        self.assertEqual(self.client.post(reverse('vote-create'), payload, format='json').status_code, 201)
+        url = reverse('poll-detail', kwargs={'pk': self.poll.id})
+        self.assertTrue(self.client.get(url, {'voter_id': 'anon-1'}).json()['poll']['hasVoted'])
+
+    @override_settings(ALLOW_ANONYMOUS_VOTE=True, REPLICA_PIN_SECONDS=0)
+    def test_without_pin_window_replica_is_stale(self):
+        self.client.credentials()
+        payload = {'pollId': str(self.poll.id), 'optionId': str(self.options[0].id), 'userId': 'anon-1'}
+        self.assertEqual(self.client.post(reverse('vote-create'), payload, format='json').status_code, 201)
+        url = reverse('poll-detail', kwargs={'pk': self.poll.id})
+        self.assertFalse(self.client.get(url, {'voter_id': 'anon-1'}).json()['poll']['hasVoted'])
+
+    def test_background_reads_and_migrations_use_primary(self):
+        # outside a request (commands, workers, signal handlers)
+        self.assertEqual(router.db_for_read(Poll), 'default')
+        with use_primary():
+            self.assertEqual(router.db_for_read(Poll), 'default')
+        self.assertEqual(router.db_for_write(Poll), 'default')
+        self.assertFalse(router.allow_migrate(REPLICA, 'polls'))
+        # without replicas the router stays out of the way
+        with override_settings(DATABASE_REPLICAS=[]):
+            self.assertIsNone(ReplicaRouter().db_for_read(Poll))
+            self.assertIsNone(ReplicaRouter().db_for_write(Poll))
+
+    async def test_async_views_read_from_replica(self):
+        primary_only = await Poll.objects.acreate(title='Not replicated yet')
+        with override_settings(ROOT_URLCONF='polls_backend.asgi_urls'):
+            resp = await self.async_client.get(reverse('poll-detail', kwargs={'pk': self.poll.id}))
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            resp = await self.async_client.get(reverse('poll-detail', kwargs={'pk': primary_only.id}))
+            self.assertEqual(resp.status_code, status.HTTP_404_NOT_FOUND)
+
+    async def test_async_views_see_the_voters_own_vote(self):
+        await Vote.objects.acreate(poll=self.poll, option=self.options[0], voter_id=str(self.user.id))
+        with override_settings(ROOT_URLCONF='polls_backend.asgi_urls'):
+            # a token that never wrote anything
+            auth = {'AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+            resp = await self.async_client.get(reverse('poll-detail', kwargs={'pk': self.poll.id}), headers=auth)
+            self.assertTrue(resp.json()['poll']['hasVoted'])
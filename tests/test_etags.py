@@ -0,0 +1,76 @@
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from polls.models import Poll, Option, Vote
+
+
+# versions need a cache every worker shares; the single test process has one
+@override_settings(SHARED_CACHE=True)
+class PollETagTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.poll = Poll.objects.create(title='ETag Poll')
+        self.opt = Option.objects.create(poll=self.poll, text='A')
+        self.urls = [
+            reverse('poll-detail', kwargs={'pk': self.poll.id}),
+            reverse('poll-results', kwargs={'pk': self.poll.id}),
+        ]
+
+    def test_unchanged_poll_answers_304_without_queries(self):
+        for url in self.urls:
+            r = self.client.get(url)
+            self.assertEqual(r.status_code, status.HTTP_200_OK)
+            etag = r['ETag']
+            with self.assertNumQueries(0):
+                r = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(r.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(r['ETag'], etag)
+
+    def _etags(self):
+        return [self.client.get(url)['ETag'] for url in self.urls]
+
+    def test_vote_option_and_poll_edits_change_the_etag(self):
+        before = self._etags()
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(poll=self.poll, option=self.opt, voter_id='u1')
+        after_vote = self._etags()
+        self.assertTrue(all(a != b for a, b in zip(before, after_vote)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Option.objects.create(poll=self.poll, text='B')
+        after_option = self._etags()
+        self.assertTrue(all(a != b for a, b in zip(after_vote, after_option)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.poll.title = 'Renamed'
+            self.poll.save()
+        r = self.client.get(self.urls[0], HTTP_IF_NONE_MATCH=after_option[0])
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertEqual(r.data['poll']['question'], 'Renamed')
+
+    def test_etag_differs_per_voter(self):
+        url = self.urls[1]
+        alice = self.client.get(url, {'voter_id': 'alice'})['ETag']
+        bob = self.client.get(url, {'voter_id': 'bob'})
+        self.assertNotEqual(alice, bob['ETag'])
+        r = self.client.get(url, {'voter_id': 'bob'}, HTTP_IF_NONE_MATCH=alice)
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+
+    def test_missing_poll_has_no_etag(self):
+        r = self.client.get(reverse('poll-detail', kwargs={'pk': '00000000-0000-0000-0000-000000000000'}))
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(r.has_header('ETag'))
+
+
+class PerProcessCacheTests(APITestCase):
+    @override_settings(SHARED_CACHE=False)
+    def test_no_etags_without_shared_cache(self):
+        # a locmem version bumped in one worker would leave the others answering 304
+        poll = Poll.objects.create(title='Local')
+        Option.objects.create(poll=poll, text='A')
+        for url in (reverse('poll-detail', kwargs={'pk': poll.id}), reverse('poll-results', kwargs={'pk': poll.id})):
+            r = self.client.get(url, HTTP_IF_NONE_MATCH='*')
+            self.assertEqual(r.status_code, status.HTTP_200_OK)
+            self.assertNotIn('ETag', r)
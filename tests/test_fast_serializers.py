@@ -0,0 +1,52 @@
+import json
+from datetime import timedelta
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from polls.fast_serializers import list_rows, poll_list_data, poll_detail_data
+from polls.models import Poll, Option, Vote
+from polls.serializers import PollDetailSerializer, PollListSerializer
+
+User = get_user_model()
+
+
+def _json(data):
+    # compare what clients receive, after the renderer has formatted everything
+    return json.loads(JSONRenderer().render(data))
+
+
+class FastSerializerParityTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email='c@example.com', name='Creator', password='pw')
+        self.owned = Poll.objects.create(
+            title='Owned', description='d', created_by=self.user, expires_at=timezone.now() + timedelta(days=1), views=4,
+        )
+        self.orphan = Poll.objects.create(title='Orphan')
+        for poll in (self.owned, self.orphan):
+            for i, text in enumerate(['A', 'B', 'C']):
+                Option.objects.create(poll=poll, text=text, order=i)
+        Vote.objects.create(poll=self.owned, option=self.owned.options.get(text='B'), voter_id='voter-1')
+
+    def test_list_matches_serializer(self):
+        polls = Poll.objects.order_by('-created_at', 'id')
+        expected = _json(PollListSerializer(polls, many=True).data)
+        self.assertEqual(_json(poll_list_data(list_rows(polls))), expected)
+        self.assertEqual(self.client.get(reverse('poll-list-create')).json()['polls'], expected)
+
+    def test_detail_matches_serializer(self):
+        for poll in (self.owned, self.orphan):
+            for voter_id in (None, 'voter-1', 'someone'):
+                with self.subTest(poll=poll.title, voter=voter_id):
+                    context = {'voter_id': voter_id} if voter_id else {}
+                    expected = _json(PollDetailSerializer(Poll.objects.get(pk=poll.pk), context=context).data)
+                    chosen = Vote.objects.filter(poll=poll, voter_id=voter_id).values_list('option_id', flat=True).first()
+                    self.assertEqual(_json(poll_detail_data(poll.pk, chosen)), expected)
+
+    def test_detail_endpoint_shape(self):
+        url = reverse('poll-detail', kwargs={'pk': self.owned.id})
+        data = self.client.get(url, {'voter_id': 'voter-1'}).json()['poll']
+        self.assertEqual(list(data), list(PollDetailSerializer.Meta.fields))
+        self.assertEqual(data['views'], 5)
+        self.assertEqual([o['voted'] for o in data['options']], [False, True, False])
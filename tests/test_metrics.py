@@ -0,0 +1,114 @@
+import re
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from polls import metrics
+from polls.models import Poll, Option
+
+
+def _value(body, name, **labels):
+    """Sum every sample of `name` whose labels include `labels`."""
+    total = 0.0
+    for line in body.splitlines():
+        match = re.match(rf'^{name}(?:{{(.*)}})? (\S+)$', line)
+        if not match:
+            continue
+        found = dict(re.findall(r'(\w+)="([^"]*)"', match.group(1) or ''))
+        if all(found.get(k) == v for k, v in labels.items()):
+            total += float(match.group(2))
+    return total
+
+
+class MetricsEndpointTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.poll = Poll.objects.create(title='Measured Poll')
+        Option.objects.create(poll=self.poll, text='A')
+
+    def _scrape(self, **headers):
+        response = self.client.get('/api/metrics', **headers)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    # the second request is a rendered-response cache hit, which needs a shared cache
+    @override_settings(SHARED_CACHE=True)
+    def test_records_queries_cache_and_latency_per_view(self):
+        before = self._scrape()
+        url = reverse('poll-results', kwargs={'pk': self.poll.id})
+        self.client.get(url)
+        self.client.get(url)
+        body = self._scrape()
+
+        def delta(name, **labels):
+            return _value(body, name, **labels) - _value(before, name, **labels)
+
+        self.assertEqual(delta('polls_http_requests_total', view='poll-results', status='200'), 2)
+        self.assertEqual(delta('polls_http_request_duration_seconds_count', view='poll-results'), 2)
+        # the first request builds and renders the body, the second is served as cached bytes
+        self.assertEqual(delta('polls_render_duration_seconds_count', view='poll-results'), 1)
+        self.assertGreaterEqual(delta('polls_db_queries_total', view='poll-results'), 1)
+        self.assertGreaterEqual(delta('polls_cache_requests_total', view='poll-results', family='poll_results', result='miss'), 1)
+        self.assertEqual(delta('polls_cache_requests_total', view='poll-results', family='poll_response', result='hit'), 1)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_token_is_required_when_configured(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self._scrape(HTTP_AUTHORIZATION='Bearer scrape-me')
+
+
+@override_settings(SHARED_CACHE=True)
+class MetricsAggregationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+
+    def _publish_worker(self, worker_id, requests):
+        snapshot = {'counters': [(('http_requests', (('view', 'gone'),)), requests)], 'histograms': []}
+        cache.set(metrics._snapshot_key(worker_id), snapshot, timeout=None)
+        cache.set(metrics._alive_key(worker_id), 1)
+        cache.set(metrics.WORKERS_KEY, (cache.get(metrics.WORKERS_KEY) or []) + [worker_id], timeout=None)
+
+    def _gone_requests(self):
+        return _value(metrics.render_prometheus(), 'polls_http_requests_total', view='gone')
+
+    def test_exited_workers_stay_in_the_counters(self):
+        self._publish_worker('w1', 5)
+        self._publish_worker('w2', 3)
+        self.assertEqual(self._gone_requests(), 8)
+        # w1 exits: its heartbeat runs out, its totals are retired rather than dropped
+        cache.delete(metrics._alive_key('w1'))
+        self.assertEqual(self._gone_requests(), 8)
+        self.assertIsNone(cache.get(metrics._snapshot_key('w1')))
+        self.assertNotIn('w1', cache.get(metrics.WORKERS_KEY))
+        # folded once, counted once
+        self.assertEqual(self._gone_requests(), 8)
+        cache.delete(metrics._alive_key('w2'))
+        self.assertEqual(self._gone_requests(), 8)
+
+    def test_idle_worker_keeps_publishing(self):
+        worker = metrics._Registry()
+        with mock.patch.object(metrics, 'PUBLISH_INTERVAL', 0.01):
+            # the first publish starts the worker's timer thread
+            worker.maybe_publish(force=True)
+            worker.merge({('idle_probe', ()): 1}, ())
+            # no request ends on this worker; the timer publishes the new count anyway
+            deadline = time.monotonic() + 2
+            published = {}
+            while not published.get(('idle_probe', ())) and time.monotonic() < deadline:
+                time.sleep(0.01)
+                published = dict(cache.get(metrics._snapshot_key(worker.worker_id))['counters'])
+        self.assertEqual(published.get(('idle_probe', ())), 1)
+
+
+class PerProcessMetricsTests(APITestCase):
+    def test_scrape_reports_this_worker_without_shared_cache(self):
+        cache.clear()
+        cache.set(metrics._snapshot_key('other'), {'counters': [(('http_requests', (('view', 'other'),)), 99)], 'histograms': []})
+        cache.set(metrics.WORKERS_KEY, ['other'], timeout=None)
+        metrics.count('http_requests', view='local')
+        body = metrics.render_prometheus()
+        self.assertGreaterEqual(_value(body, 'polls_http_requests_total', view='local'), 1)
+        # another worker's snapshot in this process's cache is not summed
+        self.assertEqual(_value(body, 'polls_http_requests_total', view='other'), 0)
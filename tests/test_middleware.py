@@ -0,0 +1,87 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.contrib.sessions.backends.db import SessionStore
+from django.http import HttpResponse, HttpResponseNotFound
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, override_settings
+from polls_backend import middleware
+
+
+async def ok(request):
+    return HttpResponse('ok')
+
+
+class InlineMiddlewareTests(SimpleTestCase):
+    """The forks in polls_backend.middleware: stock behaviour, no thread hop under ASGI."""
+    factory = AsyncRequestFactory()
+
+    def setUp(self):
+        # MiddlewareMixin.__acall__ hops through this; the inline path must not
+        hop = mock.patch('django.utils.deprecation.sync_to_async', side_effect=AssertionError('thread hop'))
+        hop.start()
+        self.addCleanup(hop.stop)
+
+    async def test_security_headers_and_redirect(self):
+        response = await middleware.SecurityMiddleware(ok)(self.factory.get('/api/polls/'))
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        with override_settings(SECURE_SSL_REDIRECT=True):
+            response = await middleware.SecurityMiddleware(ok)(self.factory.get('/api/polls/'))
+        self.assertEqual(response.status_code, 301)
+        self.assertTrue(response['Location'].startswith('https://'))
+
+    async def test_common_appends_slash(self):
+        async def not_found(request):
+            return HttpResponseNotFound()
+
+        response = await middleware.CommonMiddleware(not_found)(self.factory.get('/api/polls'))
+        self.assertEqual(response.status_code, 301)
+        self.assertEqual(response['Location'], '/api/polls/')
+
+    async def test_authentication_leaves_the_user_lazy(self):
+        seen = {}
+
+        async def view(request):
+            seen['user'] = await request.auser()
+            return HttpResponse('ok')
+
+        request = self.factory.get('/api/polls/')
+        request.session = SessionStore()
+        with mock.patch('django.contrib.auth.aget_user') as aget_user:
+            await middleware.AuthenticationMiddleware(view)(request)
+        aget_user.assert_awaited_once_with(request)
+        self.assertIs(seen['user'], aget_user.return_value)
+
+    async def test_x_frame_options(self):
+        response = await middleware.XFrameOptionsMiddleware(ok)(self.factory.get('/api/polls/'))
+        self.assertEqual(response['X-Frame-Options'], 'DENY')
+
+    async def test_whitenoise_serves_static_files_inline(self):
+        root = Path(tempfile.mkdtemp())
+        (root / 'app.css').write_text('body {}')
+        with override_settings(STATIC_ROOT=root, WHITENOISE_AUTOREFRESH=False):
+            whitenoise = middleware.WhiteNoiseMiddleware(ok)
+        response = await whitenoise(self.factory.get('/static/app.css'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'body {}')
+        # everything else goes down the chain
+        response = await whitenoise(self.factory.get('/api/polls/'))
+        self.assertEqual(response.content, b'ok')
+
+
+class SessionMiddlewareTests(TestCase):
+    factory = AsyncRequestFactory()
+
+    async def test_untouched_session_is_not_saved(self):
+        with mock.patch('polls_backend.middleware.sync_to_async') as hop:
+            response = await middleware.SessionMiddleware(ok)(self.factory.get('/api/polls/'))
+        hop.assert_not_called()
+        self.assertNotIn('sessionid', response.cookies)
+
+    async def test_used_session_is_saved_off_the_event_loop(self):
+        async def view(request):
+            request.session['seen'] = True
+            return HttpResponse('ok')
+
+        response = await middleware.SessionMiddleware(view)(self.factory.get('/api/polls/'))
+        key = response.cookies['sessionid'].value
+        self.assertTrue((await SessionStore(key).aload())['seen'])
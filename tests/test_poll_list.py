@@ -1,6 +1,8 @@
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APITestCase
 from rest_framework import status
+from users.models import User
 from polls.models import Poll, Option
 
 
@@ -18,3 +20,74 @@ class PollListTests(APITestCase):
         self.assertIn('polls', resp.data)
         self.assertIsInstance(resp.data['polls'], list)
         self.assertGreaterEqual(len(resp.data['polls']), 3)
+
+
+class PollListQueryCountTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('poll-list-create')
+        self.user = User.objects.create_user(email='owner@example.com', name='Owner', password='pw')
+
+    def _seed(self, n):
+        for i in range(n):
+            p = Poll.objects.create(title=f'Poll {i}', created_by=self.user)
+            Option.objects.create(poll=p, text='A')
+            Option.objects.create(poll=p, text='B')
+
+    def test_query_count_constant_regardless_of_rows(self):
+        self._seed(2)
+        with self.assertNumQueries(1):  # keyset page SELECT, no COUNT
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+        self._seed(10)
+        with self.assertNumQueries(1):
+            resp = self.client.get(self.url)
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+
+    def test_page_number_mode_query_count(self):
+        self._seed(12)
+        with self.assertNumQueries(2):  # opt-in page mode: COUNT + page SELECT
+            resp = self.client.get(self.url, {'page': 2})
+        self.assertEqual(resp.data['count'], 12)
+        self.assertEqual(len(resp.data['polls']), 2)
+
+    def test_created_by_and_totals_present(self):
+        self._seed(1)
+        resp = self.client.get(self.url)
+        rows = resp.data['polls']
+        self.assertEqual(rows[0]['createdBy'], str(self.user.id))
+        self.assertEqual(rows[0]['totalVotes'], 0)
+
+
+class PollListCursorTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('poll-list-create')
+        same_time = timezone.now()
+        for i in range(25):
+            Poll.objects.create(title=f'Poll {i}')
+        # force ties on created_at so the id tie-breaker is exercised
+        Poll.objects.filter(title__in=[f'Poll {i}' for i in range(5, 15)]).update(created_at=same_time)
+
+    def test_walks_every_poll_once_at_constant_cost(self):
+        seen = []
+        url = self.url
+        while url:
+            with self.assertNumQueries(1):
+                resp = self.client.get(url)
+            self.assertEqual(resp.status_code, status.HTTP_200_OK)
+            seen.extend(p['id'] for p in resp.data['polls'])
+            url = resp.data['next']
+        self.assertEqual(len(seen), 25)
+        self.assertEqual(len(set(seen)), 25)
+        expected = [str(pk) for pk in Poll.objects.order_by('-created_at', 'id').values_list('id', flat=True)]
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_prior_page(self):
+        first = self.client.get(self.url)
+        second = self.client.get(first.data['next'])
+        self.assertIsNone(first.data['previous'])
+        back = self.client.get(second.data['previous'])
+        self.assertEqual([p['id'] for p in back.data['polls']], [p['id'] for p in first.data['polls']])
+
+    def test_invalid_cursor_is_404(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'garbage'}).status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,54 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.response import Response
+from rest_framework.test import APITestCase
+from polls.models import Poll, Option, Vote
+
+
+# keyed by poll version, which needs a shared cache
+@override_settings(SHARED_CACHE=True)
+class RenderedResponseCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.poll = Poll.objects.create(title='Hot Poll')
+        self.a = Option.objects.create(poll=self.poll, text='A', order=0)
+        self.b = Option.objects.create(poll=self.poll, text='B', order=1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(poll=self.poll, option=self.a, voter_id='voter-1')
+        self.urls = [reverse(name, kwargs={'pk': self.poll.id}) for name in ('poll-detail', 'poll-results')]
+
+    def test_hit_is_served_as_raw_bytes_without_queries(self):
+        for url in self.urls:
+            first = self.client.get(url)
+            self.assertIsInstance(first, Response)
+            with CaptureQueriesContext(connection) as ctx:
+                second = self.client.get(url)
+            self.assertEqual(second.status_code, 200)
+            self.assertNotIsInstance(second, Response)
+            self.assertEqual(second['Content-Type'], 'application/json')
+            self.assertEqual(len(ctx.captured_queries), 0)
+            self.assertEqual(second.json()['poll']['totalVotes'], first.json()['poll']['totalVotes'])
+
+    def test_vote_retires_cached_bytes(self):
+        for url in self.urls:
+            self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(poll=self.poll, option=self.b, voter_id='voter-2')
+        for url in self.urls:
+            self.assertEqual(self.client.get(url).json()['poll']['totalVotes'], 2)
+
+    def test_voter_flags_are_cached_per_choice(self):
+        for url in self.urls:
+            self.client.get(url, {'voter_id': 'someone'})
+            voted = self.client.get(url, {'voter_id': 'voter-1'}).json()['poll']
+            self.assertTrue(voted['hasVoted'])
+            self.assertEqual([o['voted'] for o in voted['options']], [True, False])
+            self.assertFalse(self.client.get(url, {'voter_id': 'someone'}).json()['poll']['hasVoted'])
+
+    def test_browsable_api_is_not_served_from_json_cache(self):
+        self.client.get(self.urls[0])
+        response = self.client.get(self.urls[0], HTTP_ACCEPT='text/html')
+        self.assertTrue(response['Content-Type'].startswith('text/html'))
@@ -0,0 +1,50 @@
+from unittest import mock
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from polls import results_cache
+from polls.models import Poll, Option, Vote
+
+
+class ResultsDeltaTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.poll = Poll.objects.create(title='Delta Poll')
+        self.o1 = Option.objects.create(poll=self.poll, text='A', order=0)
+        self.o2 = Option.objects.create(poll=self.poll, text='B', order=1)
+        self.url = reverse('poll-results', kwargs={'pk': self.poll.id})
+
+    def _votes(self, resp):
+        return [o['votes'] for o in resp.json()['poll']['options']], resp.json()['poll']['totalVotes']
+
+    def test_votes_update_cache_without_rebuild(self):
+        self.client.get(self.url)
+        with mock.patch.object(results_cache, 'build_results', wraps=results_cache.build_results) as build:
+            for i in range(20):
+                with self.captureOnCommitCallbacks(execute=True):
+                    Vote.objects.create(poll=self.poll, option=self.o1 if i % 4 else self.o2, voter_id=f'v{i}')
+                resp = self.client.get(self.url)
+            self.assertEqual(build.call_count, 0)
+        self.assertEqual(self._votes(resp), ([15, 5], 20))
+
+    def test_vote_delete_decrements_cached_counts(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            vote = Vote.objects.create(poll=self.poll, option=self.o1, voter_id='v1')
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            vote.delete()
+        self.assertEqual(self._votes(self.client.get(self.url)), ([0, 0], 0))
+
+    def test_option_change_rebuilds(self):
+        self.client.get(self.url)
+        with self.captureOnCommitCallbacks(execute=True):
+            Option.objects.create(poll=self.poll, text='C', order=2)
+        resp = self.client.get(self.url)
+        self.assertEqual([o['text'] for o in resp.json()['poll']['options']], ['A', 'B', 'C'])
+
+    def test_missing_counter_forces_rebuild(self):
+        self.client.get(self.url)
+        cache.delete(results_cache._count_key(self.poll.id, 'total'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Vote.objects.create(poll=self.poll, option=self.o2, voter_id='v1')
+        self.assertEqual(self._votes(self.client.get(self.url)), ([0, 1], 1))
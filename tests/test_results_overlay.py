@@ -0,0 +1,46 @@
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from polls.models import Poll, Option, Vote
+from polls.results_cache import results_cache_key
+
+
+class SharedResultsCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.poll = Poll.objects.create(title='Overlay Poll')
+        self.o1 = Option.objects.create(poll=self.poll, text='A', order=0)
+        self.o2 = Option.objects.create(poll=self.poll, text='B', order=1)
+        Vote.objects.create(poll=self.poll, option=self.o1, voter_id='alice')
+        self.url = reverse('poll-results', kwargs={'pk': self.poll.id})
+
+    def test_voter_flags_are_not_shared_through_cache(self):
+        r = self.client.get(self.url, {'voter_id': 'alice'})
+        self.assertEqual(r.status_code, status.HTTP_200_OK)
+        self.assertTrue(r.data['poll']['hasVoted'])
+        self.assertEqual([o['voted'] for o in r.data['poll']['options']], [True, False])
+
+        # bob is served from the entry alice populated but gets his own flags
+        self.assertIsNotNone(cache.get(results_cache_key(self.poll.id)))
+        r = self.client.get(self.url, {'voter_id': 'bob'})
+        self.assertFalse(r.data['poll']['hasVoted'])
+        self.assertEqual([o['voted'] for o in r.data['poll']['options']], [False, False])
+        self.assertEqual(r.data['poll']['totalVotes'], 1)
+
+    def test_cached_entry_holds_only_shared_data(self):
+        self.client.get(self.url, {'voter_id': 'alice'})
+        cached = cache.get(results_cache_key(self.poll.id))['data']
+        self.assertNotIn('hasVoted', cached)
+        self.assertTrue(all('voted' not in o for o in cached['options']))
+
+    def test_cache_hit_costs_one_lookup_for_voter(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'voter_id': 'alice'})
+        with self.assertNumQueries(0):
+            self.client.get(self.url)
+
+    def test_missing_poll_is_404(self):
+        r = self.client.get(reverse('poll-results', kwargs={'pk': '00000000-0000-0000-0000-000000000000'}))
+        self.assertEqual(r.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,129 @@
+import asyncio
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase
+from polls import results_cache
+
+
+class ResultsStampedeTests(SimpleTestCase):
+    poll_id = 'stampede-poll'
+
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+        self.lock = threading.Lock()
+
+    def _slow_build(self, poll_id):
+        with self.lock:
+            self.builds += 1
+            n = self.builds
+        time.sleep(0.1)
+        return {'id': poll_id, 'totalVotes': n, 'options': []}
+
+    def _read_concurrently(self, readers=20):
+        results = []
+        barrier = threading.Barrier(readers)
+
+        def read():
+            barrier.wait()
+            results.append(results_cache.get_results(self.poll_id))
+
+        threads = [threading.Thread(target=read) for _ in range(readers)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
+    def test_cold_cache_builds_once(self):
+        with mock.patch.object(results_cache, 'build_results', side_effect=self._slow_build):
+            results = self._read_concurrently()
+        self.assertEqual(self.builds, 1)
+        self.assertEqual({r['totalVotes'] for r in results}, {1})
+
+    def test_one_recompute_per_invalidation_serving_stale(self):
+        with mock.patch.object(results_cache, 'build_results', side_effect=self._slow_build):
+            results_cache.get_results(self.poll_id)
+            results_cache.invalidate_results(self.poll_id)
+            results = self._read_concurrently()
+            self.assertEqual(self.builds, 2)
+            # everyone who lost the lock got the previous payload instead of waiting
+            self.assertIn(1, {r['totalVotes'] for r in results})
+            # the rebuilt entry is fresh again, so no further rebuilds happen
+            self.assertEqual(results_cache.get_results(self.poll_id)['totalVotes'], 2)
+            self.assertEqual(self.builds, 2)
+
+    def test_invalidation_during_rebuild_leaves_entry_stale(self):
+        def build_then_invalidate(poll_id):
+            data = self._slow_build(poll_id)
+            results_cache.invalidate_results(poll_id)  # a vote lands mid-rebuild
+            return data
+
+        with mock.patch.object(results_cache, 'build_results', side_effect=build_then_invalidate):
+            results_cache.get_results(self.poll_id)
+            results_cache.get_results(self.poll_id)
+        self.assertEqual(self.builds, 2)
+
+    def test_vote_delta_during_rebuild_is_not_lost(self):
+        def build_then_vote(poll_id):
+            data = self._slow_build(poll_id)
+            # the vote commits after the read; its incr finds no counter yet
+            results_cache.apply_cached_vote_delta(poll_id, 'opt', 1)
+            return dict(data, options=[{'id': 'opt', 'votes': 0}], totalVotes=0)
+
+        with mock.patch.object(results_cache, 'build_results', side_effect=build_then_vote):
+            results_cache.get_results(self.poll_id)
+        with mock.patch.object(results_cache, 'build_results', return_value={
+            'id': self.poll_id, 'options': [{'id': 'opt', 'votes': 1}], 'totalVotes': 1,
+        }) as build:
+            self.assertEqual(results_cache.get_results(self.poll_id)['totalVotes'], 1)
+        # the racing rebuild's counters were discarded rather than served
+        build.assert_called_once()
+
+
+class AsyncResultsStampedeTests(SimpleTestCase):
+    poll_id = 'async-stampede-poll'
+
+    def setUp(self):
+        cache.clear()
+        self.builds = 0
+
+    async def _slow_build(self, poll_id):
+        self.builds += 1
+        n = self.builds
+        await asyncio.sleep(0.1)
+        return {'id': poll_id, 'totalVotes': n, 'options': []}
+
+    async def test_cold_cache_builds_once(self):
+        with mock.patch.object(results_cache, 'abuild_results', side_effect=self._slow_build), \
+                mock.patch.object(results_cache, 'build_results') as sync_build:
+            results = await asyncio.gather(*[results_cache.aget_results(self.poll_id) for _ in range(20)])
+        self.assertEqual(self.builds, 1)
+        self.assertEqual({r['totalVotes'] for r in results}, {1})
+        sync_build.assert_not_called()
+
+    async def test_serves_stale_during_rebuild_and_shares_the_sync_entry(self):
+        with mock.patch.object(results_cache, 'abuild_results', side_effect=self._slow_build):
+            await results_cache.aget_results(self.poll_id)
+            results_cache.invalidate_results(self.poll_id)
+            results = await asyncio.gather(*[results_cache.aget_results(self.poll_id) for _ in range(5)])
+        self.assertEqual(self.builds, 2)
+        self.assertIn(1, {r['totalVotes'] for r in results})
+        # the same cache entry and counters as get_results
+        with mock.patch.object(results_cache, 'build_results') as sync_build:
+            self.assertEqual(results_cache.get_results(self.poll_id)['totalVotes'], 2)
+        sync_build.assert_not_called()
+
+    async def test_vote_delta_during_rebuild_is_not_lost(self):
+        async def build_then_vote(poll_id):
+            results_cache.apply_cached_vote_delta(poll_id, 'opt', 1)
+            return {'id': poll_id, 'options': [{'id': 'opt', 'votes': 0}], 'totalVotes': 0}
+
+        with mock.patch.object(results_cache, 'abuild_results', side_effect=build_then_vote):
+            await results_cache.aget_results(self.poll_id)
+        fresh = {'id': self.poll_id, 'options': [{'id': 'opt', 'votes': 1}], 'totalVotes': 1}
+        with mock.patch.object(results_cache, 'abuild_results', return_value=fresh) as build:
+            self.assertEqual((await results_cache.aget_results(self.poll_id))['totalVotes'], 1)
+        build.assert_called_once()
@@ -0,0 +1,84 @@
+import asyncio
+import json
+import threading
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from polls.models import Poll, Option
+from polls.results_cache import aget_results
+from polls.realtime import LocalPubSub, PollHub, get_backend, get_hub
+
+
+class PollHubTests(SimpleTestCase):
+    def test_burst_is_coalesced_into_one_push(self):
+        async def scenario():
+            backend = LocalPubSub()
+            hub = PollHub(backend, interval=0.05)
+            queue = hub.subscribe('p1')
+            other = hub.subscribe('p2')
+
+            def burst():
+                for i in range(100):
+                    backend.publish({'pollId': 'p1', 'optionId': 'a' if i % 2 else 'b', 'delta': 1})
+
+            # votes are published from request threads, not the event loop
+            thread = threading.Thread(target=burst)
+            thread.start()
+            thread.join()
+            await asyncio.sleep(0.15)
+            events = []
+            while not queue.empty():
+                events.append(queue.get_nowait())
+            return events, other.empty()
+
+        events, other_empty = asyncio.run(scenario())
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['totalVotes'], 100)
+        self.assertEqual(events[0]['options'], {'a': 50, 'b': 50})
+        self.assertTrue(other_empty)
+
+
+class ResultsStreamViewTests(TestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(title='Stream Poll')
+        self.option = Option.objects.create(poll=self.poll, text='A')
+        self.url = reverse('poll-results-stream', kwargs={'pk': self.poll.id})
+
+    async def test_stream_starts_with_snapshot(self):
+        response = await self.async_client.get(self.url)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        first = (await anext(stream)).decode()
+        await stream.aclose()
+        self.assertTrue(first.startswith('event: snapshot\n'))
+        payload = json.loads(first.split('data: ', 1)[1])
+        self.assertEqual(payload['id'], str(self.poll.id))
+
+    async def test_vote_during_snapshot_read_is_not_lost(self):
+        vote = {'pollId': str(self.poll.id), 'optionId': str(self.option.id), 'delta': 1}
+        calls = []
+
+        async def read_then_vote(pk):
+            calls.append(pk)
+            if len(calls) == 2:
+                # lands while the stream reads its snapshot
+                get_backend().publish(vote)
+            return await aget_results(pk)
+
+        async def next_event(stream):
+            return (await asyncio.wait_for(anext(stream), timeout=2)).decode()
+
+        with mock.patch('polls.views.aget_results', side_effect=read_then_vote):
+            response = await self.async_client.get(self.url)
+            stream = aiter(response.streaming_content)
+            self.assertTrue((await next_event(stream)).startswith('event: snapshot\n'))
+            # the vote may or may not be in that snapshot: a fresh snapshot, not a delta
+            self.assertTrue((await next_event(stream)).startswith('event: snapshot\n'))
+            # well after the last snapshot, votes go out as deltas
+            await asyncio.sleep(get_hub().interval * 2.5)
+            get_backend().publish(vote)
+            self.assertTrue((await next_event(stream)).startswith('event: delta\n'))
+            await stream.aclose()
+
+    def test_stream_refused_under_wsgi(self):
+        self.assertEqual(self.client.get(self.url).status_code, 501)
@@ -0,0 +1,131 @@
+from unittest import mock
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from polls.models import Poll, Option, Vote
+from polls_backend import throttling
+from users.models import User
+
+
+class SlidingWindowTests(SimpleTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_parse_rate(self):
+        self.assertEqual(throttling.parse_rate('30/min'), (30, 60))
+        self.assertEqual(throttling.parse_rate('100/10s'), (100, 10))
+        self.assertEqual(throttling.parse_rate('5/day'), (5, 86400))
+        with self.assertRaises(ValueError):
+            throttling.parse_rate('5/fortnight')
+
+    def test_limit_within_one_window(self):
+        waits = [throttling.hit('t', 'ip', 'a', 3, 60, now=600.0 + i) for i in range(4)]
+        self.assertEqual(waits[:3], [0, 0, 0])
+        # over on the current window alone: wait for the next one (starts at 660)
+        self.assertEqual(waits[3], 57)
+
+    def test_previous_window_weighs_in(self):
+        for i in range(4):
+            throttling.hit('t', 'ip', 'a', 4, 60, now=600.0 + i)
+        # 15s into the next window, 3/4 of the previous four still count: 3 + 1 fits,
+        # 3 + 2 doesn't until the previous window's share drops to 2 (at 690)
+        self.assertEqual(throttling.hit('t', 'ip', 'a', 4, 60, now=675.0), 0)
+        self.assertEqual(throttling.hit('t', 'ip', 'a', 4, 60, now=675.0), 15)
+        # with the previous window almost gone, there is room again
+        self.assertEqual(throttling.hit('t', 'ip', 'a', 4, 60, now=715.0), 0)
+
+    def test_keys_are_independent(self):
+        self.assertEqual(throttling.hit('t', 'ip', 'a', 1, 60, now=600.0), 0)
+        self.assertEqual(throttling.hit('t', 'ip', 'b', 1, 60, now=600.0), 0)
+        self.assertEqual(throttling.hit('t', 'voter', 'a', 1, 60, now=600.0), 0)
+        self.assertGreater(throttling.hit('t', 'ip', 'a', 1, 60, now=600.0), 0)
+
+
+@override_settings(ALLOW_ANONYMOUS_VOTE=True)
+class VoteThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('vote-create')
+        self.poll = Poll.objects.create(title='Q?')
+        self.option = Option.objects.create(poll=self.poll, text='x')
+
+    def _vote(self, voter):
+        return self.client.post(
+            self.url, {'pollId': str(self.poll.id), 'optionId': str(self.option.id), 'userId': voter}, format='json'
+        )
+
+    @override_settings(THROTTLE_RATES={'vote': {'ip': '3/min'}})
+    def test_burst_is_rejected_without_touching_the_database(self):
+        for i in range(3):
+            self.assertEqual(self._vote(f'voter-{i}').status_code, status.HTTP_201_CREATED)
+        for i in range(3, 20):
+            with self.assertNumQueries(0):
+                resp = self._vote(f'voter-{i}')
+            self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertGreaterEqual(int(resp['Retry-After']), 1)
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 3)
+
+    @override_settings(THROTTLE_RATES={'vote': {'ip': '3/min'}})
+    def test_spoofed_forwarded_for_does_not_reset_the_ip_limit(self):
+        codes = [
+            self.client.post(
+                self.url, {'pollId': str(self.poll.id), 'optionId': str(self.option.id), 'userId': f'voter-{i}'},
+                format='json', HTTP_X_FORWARDED_FOR=f'203.0.113.{i}',
+            ).status_code
+            for i in range(10)
+        ]
+        self.assertEqual(codes, [201] * 3 + [429] * 7)
+
+    @override_settings(THROTTLE_RATES={'vote': {'voter': '2/min'}})
+    def test_repeat_voter_is_limited_before_validation(self):
+        self.assertEqual(self._vote('bot').status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self._vote('bot').status_code, status.HTTP_400_BAD_REQUEST)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._vote('bot').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        # other voters from the same address are unaffected
+        self.assertEqual(self._vote('human').status_code, status.HTTP_201_CREATED)
+
+    @override_settings(THROTTLE_RATES={'vote': {'ip': '30/min', 'voter': '2/min'}})
+    def test_list_body_is_a_bad_request(self):
+        resp = self.client.post(self.url, [{'userId': 'bot'}], format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(THROTTLE_RATES={})
+    def test_no_rates_means_no_limit(self):
+        for i in range(10):
+            self.assertEqual(self._vote(f'voter-{i}').status_code, status.HTTP_201_CREATED)
+
+
+class LoginThrottleTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.url = reverse('token_obtain_pair')
+        User.objects.create_user(email='a@example.com', name='Alice', password='strongpass')
+        User.objects.create_user(email='b@example.com', name='Bob', password='strongpass')
+
+    def _login(self, email):
+        return self.client.post(self.url, {'email': email, 'password': 'strongpass'}, format='json')
+
+    @override_settings(THROTTLE_RATES={'login': {'user': '2/min'}})
+    def test_guesses_against_one_account_are_limited_before_hashing(self):
+        for _ in range(2):
+            self.assertEqual(self._login('a@example.com').status_code, status.HTTP_200_OK)
+        with mock.patch('django.contrib.auth.authenticate') as authenticate, self.assertNumQueries(0):
+            resp = self._login('A@example.com ')
+        self.assertEqual(resp.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', resp)
+        authenticate.assert_not_called()
+        # a different account is still allowed
+        self.assertEqual(self._login('b@example.com').status_code, status.HTTP_200_OK)
+
+    @override_settings(THROTTLE_RATES={'login': {'user': '2/min'}})
+    def test_list_body_is_a_bad_request(self):
+        resp = self.client.post(self.url, [{'email': 'a@example.com'}], format='json')
+        self.assertEqual(resp.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(THROTTLE_RATES={'login': {'ip': '1/min'}})
+    def test_per_ip_limit(self):
+        self.assertEqual(self._login('a@example.com').status_code, status.HTTP_200_OK)
+        self.assertEqual(self._login('b@example.com').status_code, status.HTTP_429_TOO_MANY_REQUESTS)
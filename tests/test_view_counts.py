@@ -0,0 +1,81 @@
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from polls.models import Poll, Option
+from polls import view_counts
+from polls.view_counts import flush_views, pending_views, BUCKET_SECONDS
+
+
+@override_settings(SHARED_CACHE=True)
+class BufferedViewCountTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.poll = Poll.objects.create(title='Viewed Poll')
+        Option.objects.create(poll=self.poll, text='A')
+        self.url = reverse('poll-detail', kwargs={'pk': self.poll.id})
+
+    # rendered responses are cached for a few seconds; turn that off to see every view
+    @mock.patch('polls.response_cache.RESPONSE_TIMEOUT', 0)
+    def test_reads_count_without_writing(self):
+        with CaptureQueriesContext(connection) as ctx:
+            views = [self.client.get(self.url).data['poll']['views'] for _ in range(3)]
+        self.assertEqual(views, [1, 2, 3])
+        self.assertFalse(any(q['sql'].startswith('UPDATE') for q in ctx.captured_queries))
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.views, 0)
+
+    def test_flush_moves_pending_views_to_database(self):
+        for _ in range(3):
+            self.client.get(self.url)
+        # nothing to flush while the bucket is still open
+        self.assertEqual(flush_views(), 0)
+
+        self.assertEqual(flush_views(now=time.time() + BUCKET_SECONDS * 3), 3)
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.views, 3)
+        # flushed buckets are no longer reported as pending, so nothing is counted twice
+        results = self.client.get(reverse('poll-results', kwargs={'pk': self.poll.id}))
+        self.assertEqual(results.data['poll']['views'], 3)
+        self.assertEqual(flush_views(now=time.time() + BUCKET_SECONDS * 3), 0)
+
+    @mock.patch('polls.response_cache.RESPONSE_TIMEOUT', 0)
+    def test_list_reports_pending_views_like_detail(self):
+        for _ in range(2):
+            views = self.client.get(self.url).data['poll']['views']
+        listed = {p['id']: p['views'] for p in self.client.get(reverse('poll-list-create')).json()['polls']}
+        self.assertEqual(listed[str(self.poll.id)], views)
+        paged = self.client.get(reverse('poll-list-create'), {'page': 1}).json()['polls']
+        self.assertEqual(paged[0]['views'], views)
+
+    async def test_async_list_reports_pending_views(self):
+        await view_counts.arecord_view(self.poll.id)
+        with override_settings(ROOT_URLCONF='polls_backend.asgi_urls'):
+            resp = await self.async_client.get(reverse('poll-list-create'))
+        self.assertEqual(resp.json()['polls'][0]['views'], 1)
+
+    def test_missing_poll_records_nothing(self):
+        missing = '00000000-0000-0000-0000-000000000000'
+        self.assertEqual(self.client.get(reverse('poll-detail', kwargs={'pk': missing})).status_code, 404)
+        self.assertEqual(pending_views(missing), 0)
+        self.assertIsNone(cache.get(view_counts._dirty_seq_key(view_counts._bucket())))
+
+    @override_settings(SHARED_CACHE=False)
+    @mock.patch('polls.response_cache.RESPONSE_TIMEOUT', 0)
+    def test_workers_flush_their_own_views_without_shared_cache(self):
+        view_counts._next_local_flush = 0.0
+        for _ in range(2):
+            self.client.get(self.url)
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.views, 0)
+        # a bucket later, the next view flushes the closed buckets from the request
+        later = time.time() + BUCKET_SECONDS * 3
+        with mock.patch('polls.view_counts.time.time', return_value=later), \
+                mock.patch('polls.view_counts.time.monotonic', return_value=time.monotonic() + BUCKET_SECONDS):
+            self.assertEqual(self.client.get(self.url).data['poll']['views'], 3)
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.views, 2)
@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import tracemalloc
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+from polls.models import Poll, Option, Vote
+
+User = get_user_model()
+
+
+class VoteExportTests(APITestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email='owner@example.com', name='Owner', password='pw')
+        self.poll = Poll.objects.create(title='Exported Poll', created_by=self.owner)
+        self.a = Option.objects.create(poll=self.poll, text='A, with comma')
+        self.b = Option.objects.create(poll=self.poll, text='B')
+        self.url = reverse('poll-votes-export', kwargs={'pk': self.poll.id})
+        self.client.force_authenticate(user=self.owner)
+
+    def _seed(self, poll, n):
+        # bulk_create straight away: only the exported rows matter here
+        options = [self.a, self.b] if poll == self.poll else list(poll.options.all())
+        Vote.objects.bulk_create(
+            [Vote(poll=poll, option=options[i % 2], voter_id=f'voter-{i}') for i in range(n)], batch_size=2000
+        )
+
+    def _export(self, url, fmt):
+        response = self.client.get(url, {'format': fmt})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        self._seed(self.poll, 3)
+        rows = list(csv.DictReader(io.StringIO(self._export(self.url, 'csv'))))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({r['voter_id'] for r in rows}, {'voter-0', 'voter-1', 'voter-2'})
+        self.assertEqual(sum(r['option_text'] == 'A, with comma' for r in rows), 2)
+
+    def test_ndjson_export(self):
+        self._seed(self.poll, 3)
+        lines = self._export(self.url, 'ndjson').splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(set(json.loads(lines[0])), {'vote_id', 'option_id', 'option_text', 'voter_id', 'created_at'})
+
+    def test_only_owner_or_staff_may_export(self):
+        self.client.force_authenticate(user=User.objects.create_user(email='x@example.com', name='X', password='pw'))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+        self.client.force_authenticate(user=self.owner)
+        self.assertEqual(self.client.get(self.url, {'format': 'xml'}).status_code, 400)
+
+    def _peak_memory(self, url):
+        tracemalloc.start()
+        try:
+            response = self.client.get(url, {'format': 'csv'})
+            size = sum(len(block) for block in response.streaming_content)
+            return tracemalloc.get_traced_memory()[1], size
+        finally:
+            tracemalloc.stop()
+
+    @mock.patch('polls.export.EXPORT_CHUNK_SIZE', 250)
+    def test_memory_stays_flat_as_the_poll_grows(self):
+        small = Poll.objects.create(title='Small', created_by=self.owner)
+        Option.objects.create(poll=small, text='A, with comma')
+        Option.objects.create(poll=small, text='B')
+        self._seed(small, 2000)
+        self._seed(self.poll, 20000)
+
+        small_peak, small_size = self._peak_memory(reverse('poll-votes-export', kwargs={'pk': small.id}))
+        large_peak, large_size = self._peak_memory(self.url)
+        self.assertGreater(large_size, small_size * 8)
+        # 10x the rows, roughly the same peak: only one chunk is ever held
+        self.assertLess(large_peak, small_peak * 2)
+        self.assertLess(large_peak, 2 * 1024 * 1024)
+
+    async def test_streamed_asynchronously_under_asgi(self):
+        await Vote.objects.abulk_create([Vote(poll=self.poll, option=self.a, voter_id=f'voter-{i}') for i in range(5)])
+        auth = {'AUTHORIZATION': f'Bearer {AccessToken.for_user(self.owner)}'}
+        response = await self.async_client.get(self.url, {'format': 'ndjson'}, headers=auth)
+        self.assertEqual(response.status_code, 200)
+        # an async iterator, so Django sends chunks as they are read instead of buffering
+        self.assertTrue(response.is_async)
+        body = b''.join([block async for block in response.streaming_content])
+        self.assertEqual(len(body.splitlines()), 5)
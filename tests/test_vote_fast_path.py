@@ -0,0 +1,53 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+from users.models import User
+from polls.models import Poll, Option, Vote
+
+
+class VoteFastPathTests(APITestCase):
+    def setUp(self):
+        self.url = reverse('vote-create')
+        self.user = User.objects.create_user(email='fast@example.com', name='Fast', password='pw')
+        self.client.force_authenticate(user=self.user)
+        self.poll = Poll.objects.create(title='Fast Poll')
+        self.opt = Option.objects.create(poll=self.poll, text='A')
+
+    def _vote(self, poll_id, option_id):
+        return self.client.post(self.url, {'pollId': str(poll_id), 'optionId': str(option_id)}, format='json')
+
+    def test_happy_path_reads_once(self):
+        with CaptureQueriesContext(connection) as ctx:
+            r = self._vote(self.poll.id, self.opt.id)
+        self.assertEqual(r.status_code, status.HTTP_201_CREATED)
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertIn('JOIN', selects[0])
+
+    def test_duplicate_rejected_by_constraint(self):
+        self.assertEqual(self._vote(self.poll.id, self.opt.id).status_code, status.HTTP_201_CREATED)
+        r = self._vote(self.poll.id, self.opt.id)
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(r.data, {'non_field_errors': ['Voter has already voted on this poll']})
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 1)
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.total_votes, 1)
+
+    def test_error_messages_unchanged(self):
+        missing = '00000000-0000-0000-0000-000000000000'
+        other = Option.objects.create(poll=Poll.objects.create(title='Other'), text='X')
+        expired = Poll.objects.create(title='Old', expires_at=timezone.now() - timezone.timedelta(days=1))
+        expired_opt = Option.objects.create(poll=expired, text='Y')
+        cases = [
+            ((missing, self.opt.id), 'Poll does not exist'),
+            ((self.poll.id, missing), 'Option does not exist'),
+            ((expired.id, expired_opt.id), 'Poll has expired'),
+            ((self.poll.id, other.id), 'Option does not belong to the poll'),
+        ]
+        for (poll_id, option_id), message in cases:
+            r = self._vote(poll_id, option_id)
+            self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertEqual(r.data['non_field_errors'], [message])
@@ -0,0 +1,79 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from polls import vote_queue
+from polls.models import Poll, Option, Vote
+
+
+@override_settings(VOTE_WRITE_BEHIND=True, ALLOW_ANONYMOUS_VOTE=True)
+class WriteBehindVoteTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.queue = vote_queue.SQLiteVoteQueue(Path(tmp.name) / 'queue.sqlite3')
+        patcher = mock.patch.object(vote_queue, '_queue', self.queue)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.poll = Poll.objects.create(title='Queued Poll')
+        self.opt = Option.objects.create(poll=self.poll, text='A')
+        self.url = reverse('vote-create')
+
+    def _vote(self, voter):
+        return self.client.post(self.url, {'pollId': str(self.poll.id), 'optionId': str(self.opt.id), 'userId': voter}, format='json')
+
+    def test_vote_is_queued_then_committed(self):
+        r = self._vote('u1')
+        self.assertEqual(r.status_code, status.HTTP_202_ACCEPTED)
+        ticket = r.data['ticket']
+        self.assertFalse(Vote.objects.exists())
+        self.assertEqual(self.client.get(reverse('vote-ticket', kwargs={'ticket': ticket})).data['status'], 'queued')
+
+        self.assertEqual(vote_queue.drain_batch(self.queue), 1)
+        self.assertEqual(len(self.queue), 0)
+        self.assertTrue(Vote.objects.filter(id=ticket, voter_id='u1').exists())
+        self.poll.refresh_from_db()
+        self.assertEqual(self.poll.total_votes, 1)
+        r = self.client.get(reverse('vote-ticket', kwargs={'ticket': ticket}))
+        self.assertEqual(r.data['status'], 'created')
+
+    def test_in_flight_duplicate_rejected_up_front(self):
+        self.assertEqual(self._vote('u1').status_code, status.HTTP_202_ACCEPTED)
+        r = self._vote('u1')
+        self.assertEqual(r.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(len(self.queue), 1)
+
+    def test_batch_is_group_committed(self):
+        tickets = [self._vote(f'u{i}').data['ticket'] for i in range(25)]
+        Vote.objects.create(poll=self.poll, option=self.opt, voter_id='u3')  # voted through another path
+        with self.assertNumQueries(10):
+            self.assertEqual(vote_queue.drain_batch(self.queue, batch_size=100), 25)
+        self.assertEqual(vote_queue.ticket_status(tickets[3])['status'], 'duplicate')
+        self.assertEqual(Vote.objects.filter(poll=self.poll).count(), 25)
+
+    def test_redelivered_batch_is_idempotent(self):
+        ticket = self._vote('u1').data['ticket']
+        # a drainer commits the batch but dies before acking it
+        claimed = self.queue.claim(10)
+        vote_queue.ingest_votes([record for _, record in claimed])
+        with mock.patch.object(vote_queue, 'VISIBILITY_TIMEOUT', -1):
+            self.assertEqual(vote_queue.drain_batch(self.queue), 1)
+        self.assertEqual(vote_queue.ticket_status(ticket)['status'], 'created')
+        self.assertEqual(Vote.objects.count(), 1)
+
+
+class WriteBehindConfigurationTests(SimpleTestCase):
+    @override_settings(VOTE_WRITE_BEHIND=True, SHARED_CACHE=False)
+    def test_refuses_per_process_cache(self):
+        with self.assertRaises(ImproperlyConfigured):
+            vote_queue.check_configuration()
+
+    @override_settings(VOTE_WRITE_BEHIND=True, SHARED_CACHE=True)
+    def test_accepts_shared_cache(self):
+        vote_queue.check_configuration()
@@ -0,0 +1,102 @@
+from datetime import timedelta
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from polls.models import Poll, Option, Vote, VoteRollup
+from polls.rollups import compact_rollups, truncate, HOUR
+
+
+class VoteRollupTests(APITestCase):
+    def setUp(self):
+        self.poll = Poll.objects.create(title='Timeline Poll')
+        self.a = Option.objects.create(poll=self.poll, text='A')
+        self.b = Option.objects.create(poll=self.poll, text='B')
+        self.url = reverse('poll-timeline', kwargs={'pk': self.poll.id})
+
+    def test_votes_update_minute_rollups(self):
+        Vote.objects.create(poll=self.poll, option=self.a, voter_id='u1')
+        Vote.objects.create(poll=self.poll, option=self.a, voter_id='u2')
+        vote = Vote.objects.create(poll=self.poll, option=self.b, voter_id='u3')
+        vote.delete()
+        counts = dict(VoteRollup.objects.filter(granularity='minute').values_list('option_id', 'count'))
+        self.assertEqual(counts, {self.a.id: 2, self.b.id: 0})
+
+    def test_timeline_is_served_from_rollups(self):
+        Vote.objects.create(poll=self.poll, option=self.a, voter_id='u1')
+        Vote.objects.create(poll=self.poll, option=self.b, voter_id='u2')
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'granularity': 'day'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(any('"polls_vote"' in q['sql'] for q in ctx.captured_queries))
+        [bucket] = response.data['buckets']
+        self.assertEqual(bucket['total'], 2)
+        self.assertEqual(bucket['votes'], {str(self.a.id): 1, str(self.b.id): 1})
+
+    def test_compacted_and_live_levels_add_up(self):
+        past = timezone.now() - timedelta(hours=3)
+        old = Vote.objects.create(poll=self.poll, option=self.a, voter_id='u1')
+        Vote.objects.filter(pk=old.pk).update(created_at=past)
+        VoteRollup.objects.filter(granularity='minute').update(bucket=truncate(past, 'minute'))
+        self.assertEqual(compact_rollups(), 1)
+        # compaction is idempotent for periods it has already covered
+        self.assertEqual(compact_rollups(), 0)
+        Vote.objects.create(poll=self.poll, option=self.b, voter_id='u2')
+
+        hours = self.client.get(self.url, {'granularity': 'hour'}).data['buckets']
+        self.assertEqual([b['start'] for b in hours], [
+            truncate(past, HOUR).isoformat(), truncate(timezone.now(), HOUR).isoformat(),
+        ])
+        self.assertEqual([b['total'] for b in hours], [1, 1])
+
+        # removing an already compacted vote is reflected at every level
+        Vote.objects.get(pk=old.pk).delete()
+        hours = self.client.get(self.url, {'granularity': 'hour'}).data['buckets']
+        self.assertEqual([b['total'] for b in hours], [0, 1])
+
+    def test_backfill_rebuilds_from_votes_in_chunks(self):
+        past = timezone.now() - timedelta(days=2)
+        for i in range(5):
+            Vote.objects.create(poll=self.poll, option=self.a if i % 2 else self.b, voter_id=f'u{i}')
+        Vote.objects.update(created_at=past)
+        VoteRollup.objects.all().delete()
+
+        call_command('backfill_vote_rollups', chunk_size=2, stdout=open('/dev/null', 'w'))
+        days = self.client.get(self.url, {'granularity': 'day'}).data['buckets']
+        self.assertEqual(days, [{
+            'start': truncate(past, 'day').isoformat(),
+            'votes': {str(self.a.id): 2, str(self.b.id): 3},
+            'total': 5,
+        }])
+        # minutes default to the last day; ask for the window around the votes
+        around = {'from': (past - timedelta(hours=1)).isoformat(), 'to': (past + timedelta(hours=1)).isoformat()}
+        minutes = self.client.get(self.url, around).data['buckets']
+        self.assertEqual(sum(b['total'] for b in minutes), 5)
+
+    def test_bad_granularity_and_unknown_poll(self):
+        self.assertEqual(self.client.get(self.url, {'granularity': 'week'}).status_code, 400)
+        missing = reverse('poll-timeline', kwargs={'pk': '00000000-0000-0000-0000-000000000000'})
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    def test_range_is_bounded_per_granularity(self):
+        Vote.objects.create(poll=self.poll, option=self.a, voter_id='u1')
+        now = timezone.now()
+        # beyond a day of minutes
+        params = {'from': (now - timedelta(days=2)).isoformat(), 'to': now.isoformat()}
+        self.assertEqual(self.client.get(self.url, params).status_code, 400)
+        # the same range in hours is fine
+        response = self.client.get(self.url, dict(params, granularity='hour'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sum(b['total'] for b in response.data['buckets']), 1)
+        self.assertEqual(self.client.get(self.url, {'from': 'yesterday'}).status_code, 400)
+        self.assertEqual(self.client.get(self.url, {'from': now.isoformat(), 'to': (now - timedelta(hours=1)).isoformat()}).status_code, 400)
+
+    def test_range_limits_the_buckets(self):
+        vote = Vote.objects.create(poll=self.poll, option=self.a, voter_id='u1')
+        Vote.objects.create(poll=self.poll, option=self.b, voter_id='u2')
+        VoteRollup.objects.filter(option=self.a).update(bucket=truncate(vote.created_at - timedelta(hours=2), 'minute'))
+        recent = {'from': (timezone.now() - timedelta(hours=1)).isoformat()}
+        buckets = self.client.get(self.url, recent).data['buckets']
+        self.assertEqual([b['votes'] for b in buckets], [{str(self.b.id): 1}])
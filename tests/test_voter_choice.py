@@ -0,0 +1,47 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from rest_framework import status
+from polls.models import Poll, Option, Vote
+
+
+class VoterChoiceQueryTests(APITestCase):
+    def _poll(self, n_options):
+        poll = Poll.objects.create(title=f'{n_options} options')
+        options = [Option.objects.create(poll=poll, text=f'opt {i}', order=i) for i in range(n_options)]
+        Vote.objects.create(poll=poll, option=options[-1], voter_id='voter-1')
+        return poll, options
+
+    def _count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(url, {'voter_id': 'voter-1'})
+        self.assertEqual(resp.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries), resp.data['poll']
+
+    def test_detail_query_count_independent_of_options(self):
+        small, _ = self._poll(2)
+        large, options = self._poll(50)
+        small_queries, _ = self._count_queries(reverse('poll-detail', kwargs={'pk': small.id}))
+        large_queries, data = self._count_queries(reverse('poll-detail', kwargs={'pk': large.id}))
+        self.assertEqual(small_queries, large_queries)
+        self.assertTrue(data['hasVoted'])
+        voted = [o['id'] for o in data['options'] if o['voted']]
+        self.assertEqual(voted, [str(options[-1].id)])
+
+    def test_results_query_count_independent_of_options(self):
+        small, _ = self._poll(2)
+        large, options = self._poll(50)
+        small_queries, _ = self._count_queries(reverse('poll-results', kwargs={'pk': small.id}))
+        large_queries, data = self._count_queries(reverse('poll-results', kwargs={'pk': large.id}))
+        self.assertEqual(small_queries, large_queries)
+        self.assertTrue(data['hasVoted'])
+        self.assertEqual(sum(1 for o in data['options'] if o['voted']), 1)
+
+    def test_unknown_voter_has_not_voted(self):
+        poll, _ = self._poll(3)
+        resp = self.client.get(reverse('poll-detail', kwargs={'pk': poll.id}), {'voter_id': 'someone-else'})
+        self.assertFalse(resp.data['poll']['hasVoted'])
+        self.assertFalse(any(o['voted'] for o in resp.data['poll']['options']))
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APITestCase
+from polls.models import Poll, Option, Vote
+from polls.voter_filter import BloomFilter, stats
+
+User = get_user_model()
+
+
+def _vote_lookups(ctx):
+    return [q for q in ctx.captured_queries if 'FROM "polls_vote"' in q['sql']]
+
+
+# the Bloom backend is only correct when one process sees every vote, as here
+@override_settings(POLLS_VOTER_FILTER_BACKEND='polls.voter_filter.BloomVoterFilter')
+class VoterFilterTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        stats.reset()
+        self.poll = Poll.objects.create(title='Filtered Poll')
+        self.opt = Option.objects.create(poll=self.poll, text='A')
+        Vote.objects.create(poll=self.poll, option=self.opt, voter_id='voter-1')
+        self.url = reverse('poll-detail', kwargs={'pk': self.poll.id})
+
+    def _get(self, voter_id):
+        with CaptureQueriesContext(connection) as ctx:
+            resp = self.client.get(self.url, {'voter_id': voter_id})
+        return resp.json()['poll']['hasVoted'], len(_vote_lookups(ctx))
+
+    def test_non_voter_skips_the_vote_lookup(self):
+        self.assertEqual(self._get('someone-else'), (False, 0))
+        self.assertEqual(self._get('voter-1'), (True, 1))
+        counts = stats.snapshot()
+        self.assertEqual((counts['avoided'], counts['maybe']), (1, 1))
+
+    def test_missing_filter_falls_back_to_database(self):
+        cache.clear()
+        self.assertEqual(self._get('someone-else'), (False, 1))
+        self.assertEqual(self._get('voter-1'), (True, 1))
+        self.assertEqual(stats.snapshot()['unknown'], 2)
+
+        call_command('rebuild_voter_filter', stdout=open('/dev/null', 'w'))
+        self.assertEqual(self._get('someone-else'), (False, 0))
+        self.assertEqual(self._get('voter-1'), (True, 1))
+
+    def test_bulk_votes_are_added(self):
+        self.client.force_authenticate(user=User.objects.create_superuser(email='a@example.com', name='A', password='pw'))
+        records = [{'pollId': str(self.poll.id), 'optionId': str(self.opt.id), 'userId': 'kiosk-1'}]
+        self.client.post(reverse('vote-bulk-create'), records, format='json')
+        self.client.force_authenticate(user=None)
+        self.assertEqual(self._get('kiosk-1'), (True, 1))
+
+
+class NoRedisFilterTests(APITestCase):
+    def test_every_lookup_goes_to_the_database(self):
+        # settings' default without REDIS_URL: another worker's vote is never missed
+        poll = Poll.objects.create(title='Unfiltered')
+        opt = Option.objects.create(poll=poll, text='A')
+        Vote.objects.create(poll=poll, option=opt, voter_id='voter-1')
+        url = reverse('poll-detail', kwargs={'pk': poll.id})
+        for voter_id, voted in (('someone-else', False), ('voter-1', True)):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.client.get(url, {'voter_id': voter_id})
+            self.assertEqual(resp.json()['poll']['hasVoted'], voted)
+            self.assertEqual(len(_vote_lookups(ctx)), 1)
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        members = [f'member-{i}' for i in range(2000)]
+        for item in members:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in members))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
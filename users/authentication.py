@@ -0,0 +1,128 @@
+"""JWT authentication that resolves the user from a cached snapshot.
+
+simplejwt's JWTAuthentication loads the user row on every authenticated request. The
+token is still verified here as usual, but the user comes from a short-lived snapshot
+of its columns in the default cache, so views that only need `request.user.id` (voting,
+`hasVoted`) make no auth query. users/signals.py drops the snapshot whenever the user
+is saved (profile edits, deactivation, password changes, last_login) or deleted.
+
+Snapshots are only kept in a shared cache (SHARED_CACHE): on the locmem fallback the
+drop would only reach the worker that saved the user, and the others would keep
+accepting a deactivated user for up to SNAPSHOT_TIMEOUT. There every request loads the
+user row, as with the stock class.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+SNAPSHOT_TIMEOUT = 60
+# never cached: the hash stays out of the cache and is loaded on first access; the
+# revoke-token check compares against its md5 instead
+EXCLUDED_FIELDS = ('password',)
+
+
+def snapshot_key(user_id):
+    return f"user_snapshot:{user_id}"
+
+
+def _snapshot_fields(model):
+    return [f.attname for f in model._meta.concrete_fields if f.attname not in EXCLUDED_FIELDS]
+
+
+def _take_snapshot(user):
+    fields = _snapshot_fields(type(user))
+    return {
+        'values': [getattr(user, name) for name in fields],
+        'password_md5': get_md5_hash_password(user.password),
+    }
+
+
+def _from_snapshot(model, snapshot):
+    # from_db marks the instance as loaded, with `password` deferred; saving it later
+    # only writes the loaded columns, so the hash can't be blanked by accident
+    return model.from_db('default', _snapshot_fields(model), snapshot['values'])
+
+
+def forget_user(user_id):
+    cache.delete(snapshot_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_('Token contained no recognizable user identification')) from e
+
+    def _check(self, user, snapshot, validated_token):
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_('User is inactive'), code='user_inactive')
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != snapshot['password_md5']:
+                raise AuthenticationFailed(_("The user's password has been changed."), code='password_changed')
+        return user
+
+    def get_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        model = get_user_model()
+        if api_settings.USER_ID_FIELD != model._meta.pk.name:
+            # snapshots are keyed by primary key
+            return super().get_user(validated_token)
+
+        key = snapshot_key(user_id)
+        snapshot = cache.get(key) if settings.SHARED_CACHE else None
+        if snapshot is None:
+            try:
+                user = model.objects.get(pk=user_id)
+            except (model.DoesNotExist, ValueError, TypeError) as e:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+            snapshot = _take_snapshot(user)
+            if settings.SHARED_CACHE:
+                cache.set(key, snapshot, timeout=SNAPSHOT_TIMEOUT)
+        else:
+            user = _from_snapshot(model, snapshot)
+        return self._check(user, snapshot, validated_token)
+
+    async def aget_user(self, validated_token):
+        user_id = self._user_id(validated_token)
+        model = get_user_model()
+        if api_settings.USER_ID_FIELD != model._meta.pk.name:
+            return await sync_to_async(super().get_user)(validated_token)
+
+        key = snapshot_key(user_id)
+        snapshot = await cache.aget(key) if settings.SHARED_CACHE else None
+        if snapshot is None:
+            try:
+                user = await model.objects.aget(pk=user_id)
+            except (model.DoesNotExist, ValueError, TypeError) as e:
+                raise AuthenticationFailed(_('User not found'), code='user_not_found') from e
+            snapshot = _take_snapshot(user)
+            if settings.SHARED_CACHE:
+                await cache.aset(key, snapshot, timeout=SNAPSHOT_TIMEOUT)
+        else:
+            user = _from_snapshot(model, snapshot)
+        return self._check(user, snapshot, validated_token)
+
+    async def aauthenticate(self, request):
+        """`authenticate` for the async views, which get a plain Django request."""
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+
+class CachedJWTScheme(SimpleJWTScheme):
+    # same `jwtAuth` bearer scheme in the OpenAPI schema as the stock class
+    target_class = 'users.authentication.CachedJWTAuthentication'
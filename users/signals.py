@@ -0,0 +1,15 @@
+from functools import partial
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import forget_user
+from .models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    # drop it now so this worker stops serving it, and again after commit in case a
+    # concurrent request re-cached the pre-commit row in between
+    forget_user(instance.pk)
+    transaction.on_commit(partial(forget_user, instance.pk))
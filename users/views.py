@@ -4,6 +4,7 @@ from .serializers import UserSerializer, RegisterSerializer
 from .models import User
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from rest_framework_simplejwt.views import TokenObtainPairView
+from polls_backend.throttling import CacheRateThrottle
 
 
 class LoginView(TokenObtainPairView):
@@ -13,6 +14,9 @@ class LoginView(TokenObtainPairView):
     """
 
     serializer_class = TokenObtainPairSerializer
+    # checked before the password hash is
+    throttle_classes = [CacheRateThrottle]
+    throttle_scope = 'login'
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)